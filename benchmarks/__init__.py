@@ -0,0 +1,6 @@
+"""
+Бенчмарки ExcelConcatenator.
+
+Запуск из корня репозитория, например:
+    python -m benchmarks.bench_concatenate_scaling
+"""
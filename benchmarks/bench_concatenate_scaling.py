@@ -0,0 +1,70 @@
+"""
+Регрессионный бенчмарк масштабирования concatenate_files по количеству файлов.
+
+Проверяет, что время обработки одного файла не растет с увеличением количества файлов
+(линейная зависимость общего времени), и сравнивает накопление блоков с прежним
+попарным pd.concat.
+"""
+import argparse
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.workload import make_csv_files
+from src.excel_concatenator.files_processing import _combine_blocks, concatenate_files, read_file_excel_formats
+
+
+def legacy_accumulate(blocks: list) -> pd.DataFrame:
+    """Прежняя схема: pd.concat на каждый новый файл."""
+    result = pd.DataFrame()
+    for block in blocks:
+        result = pd.concat([result.reset_index(drop=True), block.reset_index(drop=True)], ignore_index=True)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--counts', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--rows', type=int, default=200)
+    parser.add_argument('--columns', type=int, default=10)
+    parser.add_argument('--max-ratio', type=float, default=2.0,
+                        help='Допустимый рост времени на файл между наименьшим и наибольшим набором.')
+    parser.add_argument('--legacy-limit', type=int, default=200,
+                        help='Максимальное количество файлов для замера прежней схемы (она квадратична).')
+    args = parser.parse_args()
+
+    per_file = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        files = make_csv_files(tmp, max(args.counts), args.rows, args.columns)
+        blocks = [read_file_excel_formats(file, csv_delimiter=';') for file in files]
+
+        print(f"{'files':>6} {'total, s':>10} {'per file, ms':>13} {'accumulate, ms':>15} {'legacy, ms':>11}")
+        for count in args.counts:
+            start = time.perf_counter()
+            concatenate_files(files[:count], add_filename_column=True, csv_delimiter=';')
+            total = time.perf_counter() - start
+
+            start = time.perf_counter()
+            _combine_blocks(blocks[:count])
+            accumulate = time.perf_counter() - start
+
+            legacy = float('nan')
+            if count <= args.legacy_limit:
+                start = time.perf_counter()
+                legacy_accumulate(blocks[:count])
+                legacy = time.perf_counter() - start
+
+            per_file[count] = total / count
+            print(f"{count:>6} {total:>10.3f} {per_file[count] * 1000:>13.3f} "
+                  f"{accumulate * 1000:>15.2f} {legacy * 1000:>11.2f}")
+
+    ratio = per_file[max(args.counts)] / per_file[min(args.counts)]
+    print(f"Рост времени на файл: x{ratio:.2f} (допустимо x{args.max_ratio})")
+    if ratio > args.max_ratio:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""
+Бенчмарк движков чтения CSV в read_file_excel_formats: 'python', 'c' и 'pyarrow'.
+
+Файл содержит строки сверху, многострочный заголовок и итоговые строки снизу, чтобы
+задействовать skip_top_rows, header_rows и skip_bottom_rows. Результаты движков сравниваются
+с результатом движка 'python'; кроме того, проверяется, что все движки сообщают об ошибке
+для строк шире заголовков.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.workload import make_frame
+from src.excel_concatenator.files_processing import CSV_ENGINES, concatenate_to_file, read_file_excel_formats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=500_000)
+    parser.add_argument('--columns', type=int, default=10)
+    parser.add_argument('--engines', nargs='+', default=list(CSV_ENGINES), choices=CSV_ENGINES)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'data.csv')
+        with open(path, 'w', encoding='utf-8') as handle:
+            handle.write('Отчет;' + ';' * (args.columns - 2) + '\n')
+            handle.write(';'.join(f'group_{i // 3}' for i in range(args.columns)) + '\n')
+            make_frame(args.rows, args.columns).to_csv(handle, sep=';', index=False)
+            handle.write('Итого;' + ';' * (args.columns - 2) + '\n')
+        size_mb = os.path.getsize(path) / 2 ** 20
+
+        baseline = None
+        print(f"{'engine':>8} {'time, s':>9} {'MB/s':>8} {'rows/s':>12}")
+        for engine in args.engines:
+            start = time.perf_counter()
+            try:
+                result = read_file_excel_formats(path, skip_top_rows=1, header_rows=2, skip_bottom_rows=1,
+                                                 csv_delimiter=';', csv_engine=engine)
+            except RuntimeError as e:
+                print(f"{engine:>8} недоступен: {e}")
+                continue
+            elapsed = time.perf_counter() - start
+
+            if baseline is None:
+                baseline = result
+            elif not result.equals(baseline):
+                print(f"Результат движка {engine} отличается от {args.engines[0]}")
+                sys.exit(1)
+            print(f"{engine:>8} {elapsed:>9.3f} {size_mb / elapsed:>8.1f} {len(result) / elapsed:>12.0f}")
+
+        check_wide_rows(tmp, args.engines)
+
+
+def check_wide_rows(tmp: str, engines: list) -> None:
+    """
+    Проверяет, что движки и потоковое объединение (concatenate_to_file, частями по 2 строки) не теряют поля
+    строк шире заголовков, а сообщают об ошибке, в том числе когда такая строка первая в файле или в части
+    и когда лишнее поле пустое (разделитель в конце строки).
+    """
+    cases = (('wide_first.csv', 'A;B\n1;2;3\n4;5;6\n'), ('wide_later.csv', 'A;B\n1;2\n3;4\n5;6;7\n'),
+             ('trailing_first.csv', 'A;B\n1;2;\n3;4;\n'), ('trailing_later.csv', 'A;B\n1;2\n3;4\n5;6;\n'))
+    for name, content in cases:
+        path = os.path.join(tmp, name)
+        with open(path, 'w', encoding='utf-8') as handle:
+            handle.write(content)
+        for engine in engines:
+            try:
+                result = read_file_excel_formats(path, csv_delimiter=';', csv_engine=engine)
+            except RuntimeError:
+                # Ошибки разбора read_file_excel_formats сообщает как RuntimeError
+                continue
+            print(f"Движок {engine} прочитал строки шире заголовков без ошибки ({name}): {result.values.tolist()}")
+            sys.exit(1)
+        try:
+            concatenate_to_file([path], os.path.join(tmp, 'wide_result.csv'), csv_delimiter=';', chunk_size=2)
+        except ValueError:
+            continue
+        print(f"Потоковое объединение записало строки шире заголовков без ошибки ({name})")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
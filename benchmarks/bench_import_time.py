@@ -0,0 +1,58 @@
+"""
+Замер времени импорта пакета и проверка ленивых импортов.
+
+Импорт пакета, модуля командной строки и модулей обработки не должен загружать tkinter и PIL,
+а разбор аргументов командной строки - еще и pandas. Завершается с кодом 1, если это не так.
+"""
+import argparse
+import json
+import subprocess
+import sys
+
+# Модуль, который импортируется, и модули, которые при этом не должны загружаться
+CHECKS = [
+    ('src.excel_concatenator', ('tkinter', 'PIL', 'pandas')),
+    ('src.excel_concatenator.cli', ('tkinter', 'PIL', 'pandas')),
+    ('src.excel_concatenator.files_processing', ('tkinter', 'PIL', 'openpyxl', 'xlrd', 'pyxlsb')),
+]
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{'seconds': elapsed, 'modules': sorted(sys.modules)}}))
+"""
+
+
+def measure(module: str, repeat: int) -> tuple:
+    """Импортирует модуль в отдельных процессах и возвращает лучшее время и список загруженных модулей."""
+    best, modules = None, None
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, '-c', PROBE.format(module=module)],
+                                check=True, capture_output=True, text=True).stdout
+        result = json.loads(output)
+        if best is None or result['seconds'] < best:
+            best, modules = result['seconds'], result['modules']
+    return best, modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    failed = False
+    print(f"{'module':<42} {'import, ms':>11}  unexpected modules")
+    for module, forbidden in CHECKS:
+        seconds, modules = measure(module, args.repeat)
+        unexpected = [name for name in forbidden if name in modules]
+        failed = failed or bool(unexpected)
+        print(f"{module:<42} {seconds * 1000:>11.1f}  {', '.join(unexpected) or '-'}")
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
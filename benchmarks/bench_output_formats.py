@@ -0,0 +1,68 @@
+"""
+Бенчмарк форматов выходного файла save_file: скорость записи, размер файла и скорость обратного чтения
+для .xlsx, .csv, .parquet, .feather и .arrow с разным сжатием.
+
+Обратное чтение выполняется read_file_excel_formats и сравнивается с записанными данными
+для колоночных форматов, которые должны восстанавливать заголовки MultiIndex без потерь.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.workload import make_frame
+from src.excel_concatenator.files_processing import read_file_excel_formats, save_file
+
+# (расширение, сжатие, способ записи .xlsx)
+VARIANTS = [
+    ('.xlsx', None, 'streaming'),
+    ('.csv', None, 'pandas'),
+    ('.parquet', 'snappy', 'pandas'),
+    ('.parquet', 'zstd', 'pandas'),
+    ('.feather', 'lz4', 'pandas'),
+    ('.feather', 'zstd', 'pandas'),
+    ('.arrow', 'none', 'pandas'),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=200_000)
+    parser.add_argument('--columns', type=int, default=10)
+    parser.add_argument('--row-group-size', type=int, default=None)
+    parser.add_argument('--skip-xlsx', action='store_true', help="Не измерять .xlsx (самый медленный формат).")
+    args = parser.parse_args()
+
+    data = make_frame(args.rows, args.columns)
+    data.columns = pd.MultiIndex.from_arrays([data.columns])
+    data['Source'] = 'file.csv'
+
+    print(f"{'format':>16} {'write, s':>9} {'rows/s':>11} {'size, MB':>9} {'read, s':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for extension, compression, xlsx_writer in VARIANTS:
+            if extension == '.xlsx' and args.skip_xlsx:
+                continue
+            path = os.path.join(tmp, f'result_{compression}{extension}')
+
+            start = time.perf_counter()
+            save_file(data, path, csv_delimiter=';', xlsx_writer=xlsx_writer, index=False, compression=compression,
+                      row_group_size=args.row_group_size)
+            write_time = time.perf_counter() - start
+            size_mb = os.path.getsize(path) / 2 ** 20
+
+            start = time.perf_counter()
+            result = read_file_excel_formats(path, csv_delimiter=';', csv_engine='c')
+            read_time = time.perf_counter() - start
+            if extension not in ('.xlsx', '.csv') and not result.equals(data):
+                print(f"Прочитанные данные {path} отличаются от записанных")
+                sys.exit(1)
+
+            name = extension + (f' {compression}' if compression else '')
+            print(f"{name:>16} {write_time:>9.3f} {len(data) / write_time:>11.0f} {size_mb:>9.2f} {read_time:>8.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+"""
+Бенчмарк параллельного чтения файлов в concatenate_files.
+
+Сообщает ускорение относительно последовательного чтения для разного количества процессов
+и проверяет, что результат совпадает с последовательным режимом.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.workload import make_xlsx_files
+from src.excel_concatenator.files_processing import concatenate_files
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--files', type=int, default=32)
+    parser.add_argument('--rows', type=int, default=2000)
+    parser.add_argument('--columns', type=int, default=10)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8, os.cpu_count()])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        files = make_xlsx_files(tmp, args.files, args.rows, args.columns)
+
+        baseline = None
+        serial_time = None
+        print(f"{'workers':>8} {'time, s':>9} {'speedup':>8}")
+        for workers in sorted(set(args.workers)):
+            start = time.perf_counter()
+            result = concatenate_files(files, add_filename_column=True, workers=workers)
+            elapsed = time.perf_counter() - start
+
+            if baseline is None:
+                baseline, serial_time = result, elapsed
+            elif not result.equals(baseline):
+                print(f"Результат при workers={workers} отличается от последовательного")
+                sys.exit(1)
+            print(f"{workers:>8} {elapsed:>9.3f} {serial_time / elapsed:>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+Бенчмарк записи .xlsx в save_file: DataFrame.to_excel ('pandas') против потоковой записи ('streaming').
+
+Каждый способ запускается в отдельном процессе, чтобы пиковое потребление памяти (peak RSS)
+измерялось независимо. Требуется модуль resource (Linux, macOS).
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+
+def peak_rss_mb() -> float:
+    """Пиковое потребление памяти текущим процессом в МБ."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # В Linux значение в КБ, в macOS - в байтах
+    return peak / 2 ** 20 if sys.platform == 'darwin' else peak / 2 ** 10
+
+
+def run_single(writer: str, rows: int, columns: int) -> dict:
+    """Записывает DataFrame выбранным способом и возвращает показатели."""
+    from benchmarks.workload import make_frame
+    from src.excel_concatenator.files_processing import save_file
+
+    data = make_frame(rows, columns)
+    rss_before = peak_rss_mb()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'result.xlsx')
+        start = time.perf_counter()
+        save_file(data, path, xlsx_writer=writer)
+        elapsed = time.perf_counter() - start
+        size_mb = os.path.getsize(path) / 2 ** 20
+    return {'writer': writer, 'seconds': elapsed, 'rows_per_second': rows / elapsed, 'size_mb': size_mb,
+            'peak_rss_mb': peak_rss_mb(), 'rss_before_save_mb': rss_before}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=200_000)
+    parser.add_argument('--columns', type=int, default=10)
+    parser.add_argument('--single', choices=['pandas', 'streaming'], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single:
+        print(json.dumps(run_single(args.single, args.rows, args.columns)))
+        return
+
+    print(f"{'writer':>10} {'time, s':>9} {'rows/s':>10} {'peak RSS, MB':>13} {'before save, MB':>16}")
+    for writer in ('pandas', 'streaming'):
+        output = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.bench_save_xlsx', '--single', writer,
+             '--rows', str(args.rows), '--columns', str(args.columns)],
+            check=True, capture_output=True, text=True).stdout
+        result = json.loads(output)
+        print(f"{writer:>10} {result['seconds']:>9.2f} {result['rows_per_second']:>10.0f} "
+              f"{result['peak_rss_mb']:>13.1f} {result['rss_before_save_mb']:>16.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""
+Бенчмарк типизированного чтения в concatenate_files: все значения строками (dtypes=None)
+против определения типов по выборке (dtypes='infer').
+
+Каждый режим запускается в отдельном процессе, чтобы пиковое потребление памяти (peak RSS)
+измерялось независимо. Требуется модуль resource (Linux, macOS). Кроме того, проверяется, что столбец,
+ставший при согласовании типов текстовым, сохраняет исходную запись чисел.
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+MODES = {'str': None, 'infer': 'infer'}
+
+
+def peak_rss_mb() -> float:
+    """Пиковое потребление памяти текущим процессом в МБ."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # В Linux значение в КБ, в macOS - в байтах
+    return peak / 2 ** 20 if sys.platform == 'darwin' else peak / 2 ** 10
+
+
+def run_single(mode: str, directory: str) -> dict:
+    """Объединяет файлы из папки в выбранном режиме и возвращает показатели."""
+    from src.excel_concatenator.files_processing import concatenate_files
+
+    files = sorted(os.path.join(directory, name) for name in os.listdir(directory))
+    rss_before = peak_rss_mb()
+    start = time.perf_counter()
+    result = concatenate_files(files, csv_delimiter=';', csv_engine='c', dtypes=MODES[mode])
+    elapsed = time.perf_counter() - start
+    return {'mode': mode, 'seconds': elapsed, 'rows': len(result), 'peak_rss_mb': peak_rss_mb(),
+            'rss_before_mb': rss_before, 'result_mb': result.memory_usage(deep=True).sum() / 2 ** 20,
+            'dtypes': sorted({str(dtype) for dtype in result.dtypes})}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--files', type=int, default=10)
+    parser.add_argument('--rows', type=int, default=100_000, help="Количество строк в каждом файле.")
+    parser.add_argument('--single', choices=list(MODES), help=argparse.SUPPRESS)
+    parser.add_argument('--directory', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single:
+        print(json.dumps(run_single(args.single, args.directory)))
+        return
+
+    from benchmarks.workload import make_ledger_frame
+
+    with tempfile.TemporaryDirectory() as tmp:
+        check_text_fallback(tmp)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for i in range(args.files):
+            make_ledger_frame(args.rows, seed=i).to_csv(os.path.join(tmp, f'ledger_{i:05d}.csv'), sep=';',
+                                                        index=False)
+
+        print(f"{'mode':>6} {'time, s':>9} {'peak RSS, MB':>13} {'result, MB':>11}  dtypes")
+        results = {}
+        for mode in MODES:
+            output = subprocess.run(
+                [sys.executable, '-m', 'benchmarks.bench_typed_memory', '--single', mode, '--directory', tmp],
+                check=True, capture_output=True, text=True).stdout
+            results[mode] = result = json.loads(output)
+            print(f"{mode:>6} {result['seconds']:>9.2f} {result['peak_rss_mb']:>13.1f} {result['result_mb']:>11.1f}  "
+                  f"{', '.join(result['dtypes'])}")
+
+        print(f"Пиковое потребление памяти 'infer' / 'str': "
+              f"{results['infer']['peak_rss_mb'] / results['str']['peak_rss_mb']:.2f}")
+
+
+
+def check_text_fallback(tmp: str) -> None:
+    """
+    Проверяет, что числа, преобразованные при чтении одного файла, сохраняют исходную запись ('1.10'),
+    если в другом файле тот же столбец текстовый и при согласовании типов столбец становится текстовым.
+    """
+    from src.excel_concatenator.files_processing import concatenate_files
+
+    files = []
+    for name, content in (('numbers.csv', 'A;B\n1.10;1\n2.50;2\n'), ('text.csv', 'A;B\nabc;3\n')):
+        files.append(os.path.join(tmp, name))
+        with open(files[-1], 'w', encoding='utf-8') as handle:
+            handle.write(content)
+    values = concatenate_files(files, csv_delimiter=';', dtypes='infer').iloc[:, 0].tolist()
+    if values != ['1.10', '2.50', 'abc']:
+        print(f"Текстовый столбец после согласования типов не совпадает с исходными значениями: {values}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
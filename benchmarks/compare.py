@@ -0,0 +1,87 @@
+"""
+Сравнение двух файлов результатов benchmarks.suite (например, до и после изменения).
+
+Для каждого замера выводится лучшее время и пиковое потребление памяти обоих запусков и их отношение.
+Замер считается регрессией, если время или память выросли больше чем на --threshold.
+Код завершения 1, если найдена хотя бы одна регрессия.
+"""
+import argparse
+import json
+import sys
+
+from benchmarks.suite import RESULTS_VERSION
+
+
+def load_results(path: str) -> dict:
+    """
+    Читает файл результатов и возвращает словарь {имя замера: показатели}.
+
+    raises:
+        ValueError: Если версия файла не поддерживается.
+    """
+    with open(path, encoding='utf-8') as handle:
+        report = json.load(handle)
+    if report.get('version') != RESULTS_VERSION:
+        raise ValueError(f"Неподдерживаемая версия файла результатов {path}: {report.get('version')}")
+    return report
+
+
+def ratio(new, base):
+    """Отношение new / base или None, если одно из значений неизвестно."""
+    if new is None or base is None or base == 0:
+        return None
+    return new / base
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('base', help="Результаты базового коммита.")
+    parser.add_argument('new', help="Результаты проверяемого коммита.")
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help="Допустимый относительный рост времени и памяти (по умолчанию 0.10 - 10%%).")
+    args = parser.parse_args()
+
+    base_report, new_report = load_results(args.base), load_results(args.new)
+    for label, report in (('base', base_report), ('new', new_report)):
+        environment = report['environment']
+        print(f"{label}: {environment['commit'] or '-'}{' (изменен)' if environment['dirty'] else ''}, "
+              f"{environment['timestamp']}, Python {environment['versions']['python']}, "
+              f"pandas {environment['versions']['pandas']}")
+    if base_report['parameters'] != new_report['parameters']:
+        print("Внимание: параметры запусков отличаются, сравнение может быть некорректным.")
+
+    base = {result['name']: result for result in base_report['results']}
+    new = {result['name']: result for result in new_report['results']}
+
+    regressions = []
+    print(f"{'case':<24} {'base, s':>9} {'new, s':>9} {'time':>7} {'base MB':>8} {'new MB':>8} {'memory':>7}")
+    for name in list(base) + [name for name in new if name not in base]:
+        if name not in new or name not in base:
+            print(f"{name:<24} {'есть только в ' + ('base' if name in base else 'new'):>30}")
+            continue
+        time_ratio = ratio(new[name]['seconds'], base[name]['seconds'])
+        memory_ratio = ratio(new[name]['peak_rss_mb'], base[name]['peak_rss_mb'])
+        flags = [label for label, value in (('время', time_ratio), ('память', memory_ratio))
+                 if value is not None and value > 1 + args.threshold]
+        if flags:
+            regressions.append(f"{name} ({', '.join(flags)})")
+        print(f"{name:<24} {base[name]['seconds']:>9.3f} {new[name]['seconds']:>9.3f} {_format_ratio(time_ratio):>7} "
+              f"{_format_mb(base[name]['peak_rss_mb']):>8} {_format_mb(new[name]['peak_rss_mb']):>8} "
+              f"{_format_ratio(memory_ratio):>7}{'  <- регрессия' if flags else ''}")
+
+    if regressions:
+        print(f"Регрессии (порог {args.threshold:.0%}): " + "; ".join(regressions))
+        sys.exit(1)
+    print("Регрессий нет.")
+
+
+def _format_ratio(value) -> str:
+    return '-' if value is None else f'x{value:.2f}'
+
+
+def _format_mb(value) -> str:
+    return '-' if value is None else f'{value:.1f}'
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,243 @@
+"""
+Набор бенчмарков для сравнения производительности между коммитами.
+
+Измеряет на детерминированных синтетических файлах (см. workload.make_input_files):
+    - read/<формат>/<движок> - скорость чтения read_file_excel_formats для каждого формата и движка
+      (для .xlsx и .xlsm - openpyxl и потоковый движок lxml);
+    - concat/<N> - масштабирование concatenate_files по количеству файлов;
+    - save/<формат> - скорость записи save_file;
+    - pipeline/unbounded и pipeline/budget - объединение всех CSV файлов с записью в .csv без ограничения
+      памяти и с бюджетом памяти (--memory-budget), при котором блоки выгружаются на диск;
+и пиковое потребление памяти (peak RSS) каждого замера. Каждый замер выполняется в отдельном процессе,
+чтобы память и кэши одного замера не влияли на другой.
+
+Результаты записываются в JSON (--output) и сравниваются между коммитами командой
+python -m benchmarks.compare base.json new.json.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from benchmarks.workload import INPUT_FORMATS, make_input_files
+
+# Версия формата файла результатов
+RESULTS_VERSION = 1
+
+# Движки чтения для каждого формата; для .xls и .xlsb движок выбирается по расширению файла
+READ_ENGINES = {'csv': ('python', 'c', 'pyarrow'), 'xlsx': ('openpyxl', 'lxml'), 'xlsm': ('openpyxl', 'lxml')}
+
+# Форматы, движок которых задается параметром excel_engine
+EXCEL_ENGINE_FORMATS = ('xlsx', 'xlsm')
+
+# (расширение, способ записи .xlsx) для замеров save_file
+SAVE_VARIANTS = [('.xlsx', 'pandas'), ('.xlsx', 'streaming'), ('.csv', 'pandas'), ('.parquet', 'pandas')]
+
+
+def peak_rss_mb():
+    """Пиковое потребление памяти текущим процессом в МБ или None, если модуль resource недоступен."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # В Linux значение в КБ, в macOS - в байтах
+    return peak / 2 ** 20 if sys.platform == 'darwin' else peak / 2 ** 10
+
+
+def run_case(case: dict) -> dict:
+    """
+    Выполняет один замер в текущем процессе и возвращает его показатели.
+
+    params:
+        case: Описание замера, составленное build_cases.
+    return:
+        Словарь с лучшим и всеми временами, количеством строк, объемом входных данных и памятью.
+    """
+    from src.excel_concatenator.files_processing import concatenate_files, read_file_excel_formats, save_file
+
+    options = case['read_options']
+    data = None
+    if case['kind'] == 'save':
+        data = concatenate_files(case['files'], add_filename_column=True, csv_engine='c', **options)
+    rss_before = peak_rss_mb()
+
+    times = []
+    rows = 0
+    for _ in range(case['repeat']):
+        start = time.perf_counter()
+        if case['kind'] == 'read':
+            rows = sum(len(read_file_excel_formats(file, **case['engine_options'], **options))
+                       for file in case['files'])
+        elif case['kind'] == 'pipeline':
+            result = concatenate_files(case['files'], add_filename_column=True, csv_engine='c',
+                                       memory_budget=case['memory_budget'], **options)
+            save_file(result, case['save_path'], csv_delimiter=options['csv_delimiter'])
+            rows = len(result)
+            del result
+        elif case['kind'] == 'concat':
+            rows = len(concatenate_files(case['files'], add_filename_column=True, csv_engine=case['engine'],
+                                         **options))
+        else:
+            save_file(data, case['save_path'], csv_delimiter=options['csv_delimiter'],
+                      xlsx_writer=case['xlsx_writer'])
+            rows = len(data)
+        times.append(time.perf_counter() - start)
+
+    input_mb = sum(os.path.getsize(file) for file in case['files']) / 2 ** 20
+    if case['kind'] == 'save':
+        input_mb = os.path.getsize(case['save_path']) / 2 ** 20
+    seconds = min(times)
+    return {
+        'name': case['name'],
+        'group': case['kind'],
+        'seconds': seconds,
+        'seconds_all': times,
+        'rows': rows,
+        'files': len(case['files']),
+        'mb': input_mb,
+        'rows_per_s': rows / seconds if seconds else None,
+        'mb_per_s': input_mb / seconds if seconds else None,
+        'peak_rss_mb': peak_rss_mb(),
+        'rss_before_mb': rss_before,
+    }
+
+
+def build_cases(args: argparse.Namespace, inputs: dict, directory: str) -> list:
+    """
+    Составляет список замеров по созданным входным файлам.
+
+    params:
+        args: Параметры командной строки.
+        inputs: Словарь {формат: список файлов}.
+        directory: Временная папка для выходных файлов.
+    return:
+        Список описаний замеров.
+    """
+    read_options = {'skip_top_rows': args.skip_top_rows, 'header_rows': args.header_rows,
+                    'skip_bottom_rows': args.footer_rows, 'csv_delimiter': ';'}
+    cases = []
+    for file_format, files in inputs.items():
+        for engine in READ_ENGINES.get(file_format, ('default',)):
+            if file_format in EXCEL_ENGINE_FORMATS:
+                engine_options = {'excel_engine': engine}
+            else:
+                engine_options = {'csv_engine': 'python' if engine == 'default' else engine}
+            cases.append({'name': f'read/{file_format}/{engine}', 'kind': 'read', 'files': files,
+                          'engine_options': engine_options})
+
+    if 'csv' in inputs:
+        for count in args.counts:
+            cases.append({'name': f'concat/{count}', 'kind': 'concat', 'files': inputs['csv'][:count],
+                          'engine': 'c'})
+        for extension, xlsx_writer in SAVE_VARIANTS:
+            name = extension.lstrip('.') + (f'/{xlsx_writer}' if extension == '.xlsx' else '')
+            cases.append({'name': f'save/{name}', 'kind': 'save', 'files': inputs['csv'][:args.files],
+                          'xlsx_writer': xlsx_writer, 'save_path': os.path.join(directory, 'result' + extension)})
+        for name, memory_budget in (('unbounded', None), ('budget', args.memory_budget * 2 ** 20)):
+            cases.append({'name': f'pipeline/{name}', 'kind': 'pipeline', 'files': inputs['csv'],
+                          'memory_budget': memory_budget, 'save_path': os.path.join(directory, 'pipeline.csv')})
+
+    for case in cases:
+        case['read_options'] = read_options
+        case['repeat'] = args.repeat
+    if args.filter:
+        cases = [case for case in cases if any(pattern in case['name'] for pattern in args.filter)]
+    return cases
+
+
+def environment() -> dict:
+    """
+    Описывает окружение замера: коммит, версии Python и библиотек, платформу.
+    """
+    import numpy
+    import pandas
+
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                                check=True).stdout.strip()
+        dirty = bool(subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], capture_output=True,
+                                    text=True, check=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        commit, dirty = None, None
+
+    versions = {'python': platform.python_version(), 'pandas': pandas.__version__, 'numpy': numpy.__version__}
+    for module in ('pyarrow', 'openpyxl', 'lxml', 'xlrd', 'pyxlsb'):
+        try:
+            versions[module] = __import__(module).__version__
+        except ImportError:
+            versions[module] = None
+
+    return {'commit': commit, 'dirty': dirty, 'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'platform': platform.platform(), 'cpu_count': os.cpu_count(), 'versions': versions}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--formats', nargs='+', default=list(INPUT_FORMATS), choices=INPUT_FORMATS)
+    parser.add_argument('--rows', type=int, default=20_000, help="Количество строк данных в каждом файле.")
+    parser.add_argument('--columns', type=int, default=10)
+    parser.add_argument('--files', type=int, default=4, help="Количество файлов для замеров чтения и записи.")
+    parser.add_argument('--counts', type=int, nargs='+', default=[1, 4, 16],
+                        help="Количество файлов для замеров масштабирования concatenate_files.")
+    parser.add_argument('--memory-budget', type=int, default=64,
+                        help="Бюджет памяти в МБ для замера pipeline/budget.")
+    parser.add_argument('--header-rows', type=int, default=2)
+    parser.add_argument('--skip-top-rows', type=int, default=1)
+    parser.add_argument('--footer-rows', type=int, default=1)
+    parser.add_argument('--repeat', type=int, default=3, help="Количество повторов; в результат идет лучшее время.")
+    parser.add_argument('--filter', nargs='+', help="Выполнить только замеры, имя которых содержит подстроку.")
+    parser.add_argument('--output', help="Путь к JSON файлу результатов.")
+    parser.add_argument('--single', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single:
+        print(json.dumps(run_case(json.loads(args.single))))
+        return
+
+    results = []
+    skipped = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        inputs = {}
+        for file_format in args.formats:
+            # Для замеров масштабирования нужно наибольшее количество CSV файлов
+            count = max([args.files] + args.counts) if file_format == 'csv' else args.files
+            try:
+                inputs[file_format] = make_input_files(os.path.join(tmp, file_format), file_format, count, args.rows,
+                                                       args.columns, header_rows=args.header_rows,
+                                                       skip_top_rows=args.skip_top_rows, footer_rows=args.footer_rows)
+            except RuntimeError as e:
+                skipped[file_format] = str(e)
+                print(f"{file_format}: пропущен - {e}", file=sys.stderr)
+
+        print(f"{'case':<24} {'time, s':>9} {'rows/s':>11} {'MB/s':>8} {'peak RSS, MB':>13}")
+        for case in build_cases(args, inputs, tmp):
+            completed = subprocess.run([sys.executable, '-m', 'benchmarks.suite', '--single', json.dumps(case)],
+                                       capture_output=True, text=True)
+            if completed.returncode != 0:
+                error = completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else 'ошибка'
+                skipped[case['name']] = error
+                print(f"{case['name']:<24} ошибка: {error}")
+                continue
+            result = json.loads(completed.stdout)
+            results.append(result)
+            peak = f"{result['peak_rss_mb']:.1f}" if result['peak_rss_mb'] is not None else '-'
+            print(f"{result['name']:<24} {result['seconds']:>9.3f} {result['rows_per_s']:>11.0f} "
+                  f"{result['mb_per_s']:>8.1f} {peak:>13}")
+
+    if args.output:
+        parameters = {key: value for key, value in vars(args).items() if key not in ('output', 'single')}
+        report = {'version': RESULTS_VERSION, 'environment': environment(), 'parameters': parameters,
+                  'results': results, 'skipped': skipped}
+        with open(args.output, 'w', encoding='utf-8') as handle:
+            json.dump(report, handle, ensure_ascii=False, indent=1)
+        print(f"Результаты сохранены: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,199 @@
+"""
+Генерация синтетических входных файлов для бенчмарков.
+"""
+import importlib.util
+import os
+
+import numpy as np
+import pandas as pd
+
+
+def make_frame(rows: int, columns: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Создает детерминированный DataFrame со строковыми значениями.
+
+    params:
+        rows: Количество строк данных.
+        columns: Количество столбцов.
+        seed: Зерно генератора случайных чисел.
+    return:
+        DataFrame с заголовками col_1..col_N.
+    """
+    rng = np.random.default_rng(seed)
+    values = rng.integers(0, 1_000_000, size=(rows, columns)).astype(str)
+    return pd.DataFrame(values, columns=[f'col_{i + 1}' for i in range(columns)])
+
+
+def make_csv_files(directory: str, file_count: int, rows: int, columns: int, delimiter: str = ';') -> list:
+    """
+    Создает набор CSV файлов с одинаковой структурой.
+
+    params:
+        directory: Папка, в которую записываются файлы.
+        file_count: Количество файлов.
+        rows: Количество строк данных в каждом файле.
+        columns: Количество столбцов в каждом файле.
+        delimiter: Разделитель CSV.
+    return:
+        Отсортированный список путей к созданным файлам.
+    """
+    os.makedirs(directory, exist_ok=True)
+    files = []
+    for i in range(file_count):
+        path = os.path.join(directory, f'file_{i:05d}.csv')
+        make_frame(rows, columns, seed=i).to_csv(path, sep=delimiter, index=False)
+        files.append(path)
+    return files
+
+
+def make_xlsx_files(directory: str, file_count: int, rows: int, columns: int) -> list:
+    """
+    Создает набор файлов .xlsx с одинаковой структурой.
+
+    params:
+        directory: Папка, в которую записываются файлы.
+        file_count: Количество файлов.
+        rows: Количество строк данных в каждом файле.
+        columns: Количество столбцов в каждом файле.
+    return:
+        Отсортированный список путей к созданным файлам.
+    """
+    os.makedirs(directory, exist_ok=True)
+    files = []
+    for i in range(file_count):
+        path = os.path.join(directory, f'file_{i:05d}.xlsx')
+        make_frame(rows, columns, seed=i).to_excel(path, index=False)
+        files.append(path)
+    return files
+
+
+def make_ledger_frame(rows: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Создает детерминированный DataFrame, похожий на выгрузку проводок: числа, суммы, даты
+    и текстовые столбцы с небольшим числом различных значений.
+
+    params:
+        rows: Количество строк данных.
+        seed: Зерно генератора случайных чисел.
+    return:
+        DataFrame со строковыми значениями.
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 365, size=rows), unit='D')
+    return pd.DataFrame({
+        'doc_id': np.arange(seed * rows, (seed + 1) * rows).astype(str),
+        'date': dates.strftime('%Y-%m-%d'),
+        'account': rng.choice([f'6{i:03d}' for i in range(1, 60)], size=rows),
+        'currency': rng.choice(['RUB', 'USD', 'EUR'], size=rows),
+        'amount': np.round(rng.uniform(-1e6, 1e6, size=rows), 2).astype(str),
+        'quantity': rng.integers(1, 1000, size=rows).astype(str),
+        'price': np.round(rng.uniform(1, 5000, size=rows), 2).astype(str),
+        'comment': [f'Оплата по счету {n}' for n in rng.integers(0, 10 ** 9, size=rows)],
+    })
+
+
+# Форматы входных файлов, которые умеет создавать make_input_files
+INPUT_FORMATS = ('csv', 'xlsx', 'xlsm', 'xls', 'xlsb')
+
+
+def make_input_files(directory: str, file_format: str, file_count: int, rows: int, columns: int,
+                     header_rows: int = 1, skip_top_rows: int = 0, footer_rows: int = 0,
+                     delimiter: str = ';') -> list:
+    """
+    Создает набор детерминированных входных файлов одного формата с одинаковой структурой.
+
+    Каждый файл содержит skip_top_rows строк заголовка отчета, header_rows строк заголовков столбцов
+    (верхние уровни - группы столбцов, нижний уровень - col_1..col_N), rows строк данных и footer_rows
+    итоговых строк, поэтому файлы читаются с параметрами skip_top_rows, header_rows и skip_bottom_rows.
+
+    params:
+        directory: Папка, в которую записываются файлы.
+        file_format: Формат файлов: 'csv', 'xlsx', 'xlsm', 'xls' или 'xlsb'.
+        file_count: Количество файлов.
+        rows: Количество строк данных в каждом файле.
+        columns: Количество столбцов в каждом файле.
+        header_rows: Количество строк заголовков столбцов.
+        skip_top_rows: Количество строк над заголовками.
+        footer_rows: Количество итоговых строк под данными.
+        delimiter: Разделитель CSV.
+    return:
+        Отсортированный список путей к созданным файлам.
+    raises:
+        RuntimeError: Если формат нельзя создать в текущем окружении ('xls' требует xlwt,
+            а библиотеки для записи 'xlsb' в Python нет).
+    """
+    if file_format not in INPUT_FORMATS:
+        raise ValueError(f"Неподдерживаемый формат: {file_format}")
+    if file_format == 'xlsb':
+        raise RuntimeError("Для записи .xlsb нет библиотеки Python; файлы .xlsb нужно подготовить в Excel.")
+    if file_format == 'xls' and importlib.util.find_spec('xlwt') is None:
+        raise RuntimeError("Для записи .xls требуется пакет xlwt.")
+
+    os.makedirs(directory, exist_ok=True)
+    files = []
+    for i in range(file_count):
+        path = os.path.join(directory, f'file_{i:05d}.{file_format}')
+        table = _report_rows(make_frame(rows, columns, seed=i), header_rows, skip_top_rows, footer_rows)
+        if file_format == 'csv':
+            with open(path, 'w', encoding='utf-8', newline='') as handle:
+                handle.writelines(delimiter.join(row) + '\n' for row in table)
+        elif file_format == 'xls':
+            _write_xls(path, table)
+        else:
+            _write_xlsx(path, table, macro_enabled=file_format == 'xlsm')
+        files.append(path)
+    return files
+
+
+def _report_rows(data: pd.DataFrame, header_rows: int, skip_top_rows: int, footer_rows: int) -> list:
+    """
+    Составляет строки файла-отчета: заголовок отчета, заголовки столбцов, данные и итоги.
+    """
+    columns = data.shape[1]
+    table = [[f'Отчет, строка {i + 1}'] + [''] * (columns - 1) for i in range(skip_top_rows)]
+    for level in range(header_rows - 1):
+        table.append([f'group_{level + 1}_{position // 3 + 1}' for position in range(columns)])
+    table.append(list(data.columns))
+    table.extend(data.values.tolist())
+    table.extend([f'Итого {i + 1}'] + [''] * (columns - 1) for i in range(footer_rows))
+    return table
+
+
+def _write_xlsx(path: str, table: list, macro_enabled: bool = False) -> None:
+    """
+    Записывает строки в файл .xlsx (или .xlsm без макросов) потоковым режимом openpyxl.
+    """
+    import zipfile
+
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Sheet1')
+    for row in table:
+        sheet.append(row)
+    workbook.save(path)
+
+    if macro_enabled:
+        # Книга с поддержкой макросов отличается от .xlsx только типом содержимого основной части
+        with zipfile.ZipFile(path) as archive:
+            parts = {name: archive.read(name) for name in archive.namelist()}
+        parts['[Content_Types].xml'] = parts['[Content_Types].xml'].replace(
+            b'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml',
+            b'application/vnd.ms-excel.sheet.macroEnabled.main+xml')
+        with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as archive:
+            for name, content in parts.items():
+                archive.writestr(name, content)
+
+
+def _write_xls(path: str, table: list) -> None:
+    """
+    Записывает строки в файл .xls (формат Excel 97-2003) с помощью xlwt.
+    """
+    import xlwt
+
+    workbook = xlwt.Workbook()
+    sheet = workbook.add_sheet('Sheet1')
+    for row_number, row in enumerate(table):
+        for column_number, value in enumerate(row):
+            sheet.write(row_number, column_number, value)
+    workbook.save(path)
@@ -2,12 +2,29 @@
 ExcelConcatenator Package
 """
 
-# Импортирование необходимых классов и функций
-from src.excel_concatenator.app import ExcelConcatenatorApp
-from src.excel_concatenator.files_processing import read_file_excel_formats, save_file
-from src.excel_concatenator.utils import resource_path  # Пример функции из utils.py
+import importlib
+
+# Классы и функции импортируются при первом обращении, чтобы использование пакета как библиотеки
+# или из командной строки не загружало tkinter и PIL
+_LAZY_ATTRIBUTES = {
+    'ExcelConcatenatorApp': 'src.excel_concatenator.app',
+    'concatenate_files': 'src.excel_concatenator.files_processing',
+    'concatenate_to_file': 'src.excel_concatenator.files_processing',
+    'preview_files': 'src.excel_concatenator.files_processing',
+    'read_file_excel_formats': 'src.excel_concatenator.files_processing',
+    'save_file': 'src.excel_concatenator.files_processing',
+    'resource_path': 'src.excel_concatenator.utils',  # Пример функции из utils.py
+}
 
 __all__ = ['ExcelConcatenatorApp', 'resource_path']
 
 # Определение версии пакета
 __version__ = '1.2.0'
+
+
+def __getattr__(name):
+    if name in _LAZY_ATTRIBUTES:
+        value = getattr(importlib.import_module(_LAZY_ATTRIBUTES[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,9 @@
+import multiprocessing
+import sys
+
+from src.excel_concatenator.cli import main
+
+if __name__ == "__main__":
+    # Необходимо для пула процессов в исполняемом файле, собранном PyInstaller
+    multiprocessing.freeze_support()
+    sys.exit(main())
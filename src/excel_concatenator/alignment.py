@@ -0,0 +1,141 @@
+import numpy as np
+import pandas as pd
+
+# Режимы сопоставления столбцов файлов по заголовкам
+ALIGN_MODES = ('strict', 'union', 'intersection')
+
+
+def header_keys(columns: pd.Index) -> tuple:
+    """
+    Возвращает нормализованную сигнатуру заголовков: кортеж ключей столбцов.
+
+    Ключ столбца - кортеж уровней заголовка, в котором пустые уровни (NaN) заменены на '',
+    а пробелы по краям удалены, и номер повторения такого же ключа в файле.
+
+    params:
+        columns: Заголовки DataFrame.
+    return:
+        Кортеж ключей в порядке столбцов.
+    """
+    keys = []
+    seen = {}
+    for column in columns:
+        column = column if isinstance(column, tuple) else (column,)
+        key = tuple('' if pd.isna(level) else str(level).strip() for level in column)
+        seen[key] = seen.get(key, -1) + 1
+        keys.append((key, seen[key]))
+    return tuple(keys)
+
+
+class ColumnAligner:
+    """
+    Приводит столбцы файлов с разным порядком и составом столбцов к общим заголовкам.
+
+    Режимы:
+        'strict' - состав столбцов всех файлов должен совпадать с первым файлом, порядок может отличаться;
+        'union' - результат содержит все столбцы всех файлов, отсутствующие в файле столбцы пустые;
+        'intersection' - результат содержит только столбцы, которые есть во всех файлах.
+    Столбцы сопоставляются по нормализованным заголовкам (см. header_keys) и выводятся в порядке
+    их первого появления. Позиции столбцов вычисляются один раз для каждой различной сигнатуры
+    заголовков и сохраняются, поэтому для тысяч файлов с несколькими вариантами заголовков
+    выравнивание сводится к выборке столбцов по готовым позициям.
+    """
+
+    def __init__(self, mode: str, headers: list, names: list = None):
+        """
+        params:
+            mode: Режим сопоставления: 'strict', 'union' или 'intersection'.
+            headers: Заголовки всех файлов (Index или MultiIndex) в порядке объединения.
+            names: Имена файлов для сообщений об ошибках.
+        raises:
+            ValueError: Если режим не поддерживается, количество строк заголовков файлов различается
+                или в режиме 'strict' состав столбцов отличается.
+        """
+        if mode not in ALIGN_MODES:
+            raise ValueError(f"Неподдерживаемый режим сопоставления столбцов: {mode}")
+        levels = {columns.nlevels for columns in headers}
+        if len(levels) > 1:
+            raise ValueError(f"Количество строк заголовков файлов различается: {sorted(levels)}.")
+        self.mode = mode
+        self.plans = {}  # Сигнатура заголовков -> позиции столбцов в общих заголовках (-1 - пустой столбец)
+
+        labels = {}  # Ключ -> заголовок столбца в результате (как в первом файле, где он встретился)
+        signatures = []
+        for columns in headers:
+            signature = header_keys(columns)
+            signatures.append(signature)
+            for key, column in zip(signature, columns):
+                labels.setdefault(key, column)
+
+        first = signatures[0] if signatures else ()
+        if mode == 'strict':
+            problems = []
+            first_keys = set(first)
+            for position, signature in enumerate(signatures):
+                signature_keys = set(signature)
+                missing = [key for key in first if key not in signature_keys]
+                extra = [key for key in signature if key not in first_keys]
+                if missing or extra:
+                    name = names[position] if names is not None else f'№{position + 1}'
+                    problems.append(f"{name}: " + "; ".join(
+                        part for part in (_describe_keys("нет столбцов", missing), _describe_keys("лишние столбцы", extra))
+                        if part))
+            if problems:
+                raise ValueError("Состав столбцов не совпадает с первым файлом:\n" + "\n".join(problems))
+            keys = list(first)
+        elif mode == 'union':
+            keys = list(labels)
+        else:
+            common = set(first).intersection(*map(set, signatures[1:]))
+            keys = [key for key in first if key in common]
+
+        self.keys = {key: position for position, key in enumerate(keys)}
+        columns = [labels[key] for key in keys]
+        if columns and all(isinstance(column, tuple) for column in columns):
+            self.columns = pd.MultiIndex.from_tuples(columns, names=headers[0].names)
+        else:
+            self.columns = pd.Index(columns)
+
+    def align(self, data: pd.DataFrame) -> pd.DataFrame:
+        """
+        Возвращает DataFrame с общими заголовками.
+
+        params:
+            data: Прочитанный DataFrame одного из файлов, переданных при создании объекта.
+        return:
+            DataFrame со столбцами в порядке общих заголовков.
+        """
+        indexer = self._plan(data.columns)
+        present = indexer >= 0
+        if not len(data.columns):
+            # Файл без столбцов (например, пустой результат объединения) - все общие столбцы пустые
+            aligned = pd.DataFrame(np.nan, index=data.index, columns=range(len(indexer)), dtype=object)
+            aligned.attrs.update(data.attrs)
+            aligned.columns = self.columns
+            return aligned
+        aligned = data.take(np.where(present, indexer, 0), axis=1)
+        for position in np.flatnonzero(~present):
+            aligned.isetitem(position, pd.Series(np.nan, index=data.index, dtype=object))
+        aligned.columns = self.columns
+        return aligned
+
+    def _plan(self, columns: pd.Index) -> np.ndarray:
+        """
+        Возвращает для каждого общего столбца позицию столбца в файле (или -1) по сигнатуре заголовков.
+        """
+        signature = header_keys(columns)
+        indexer = self.plans.get(signature)
+        if indexer is None:
+            indexer = np.full(len(self.keys), -1, dtype=np.intp)
+            for position, key in enumerate(signature):
+                target = self.keys.get(key)
+                if target is not None:
+                    indexer[target] = position
+            self.plans[signature] = indexer
+        return indexer
+
+
+def _describe_keys(title: str, keys: list) -> str:
+    if not keys:
+        return ''
+    return f"{title} " + ", ".join("'" + " / ".join(level for level in key if level) + "'" for key, _ in keys)
@@ -1,11 +1,43 @@
 import os
+import queue
+import threading
+import time
 import tkinter as tk
-from tkinter import filedialog, messagebox
+from datetime import datetime
+from tkinter import filedialog, messagebox, ttk
 
+import pandas as pd
 from PIL import Image, ImageTk
 
-from src.excel_concatenator.files_processing import concatenate_files, save_file
+from src.excel_concatenator.cache import MemoryFileCache
+from src.excel_concatenator.dedup import DEDUP_MEMORY_BYTES, RowDeduplicator
+from src.excel_concatenator.discovery import discover_files, is_supported_file
+from src.excel_concatenator.file_metadata import FileMetadataLoader
+from src.excel_concatenator.files_processing import (PREVIEW_ROWS, ConcatenationCancelled, concatenate_files,
+                                                     preview_files, save_file)
+from src.excel_concatenator.fingerprint import FingerprintStore
+from src.excel_concatenator.instrumentation import RunReport
 from src.excel_concatenator.utils import resource_path
+from src.excel_concatenator.writers import STREAM_WRITER_EXTENSIONS, UNSUPPORTED_FORMAT_MESSAGE
+
+# Столбцы списка выбранных файлов: имя -> (заголовок, ширина, выравнивание)
+FILE_LIST_COLUMNS = {
+    'name': ("Файл", 300, tk.W),
+    'size': ("Размер", 80, tk.E),
+    'modified': ("Изменен", 120, tk.CENTER),
+    'format': ("Формат", 60, tk.CENTER),
+    'sheets': ("Страниц", 60, tk.E),
+    'rows': ("Строк", 80, tk.E),
+}
+
+# Количество строк, добавляемых в список выбранных файлов за один шаг
+FILE_LIST_CHUNK = 1000
+
+# Пауза после прокрутки списка файлов перед запросом сведений о видимых файлах, мс
+FILE_DETAILS_DELAY = 150
+
+# Количество процессов для чтения первых строк файлов при предварительном просмотре
+PREVIEW_WORKERS = 4
 
 
 class ExcelConcatenatorApp:
@@ -18,11 +50,19 @@ class ExcelConcatenatorApp:
         """
         self.main_screen = tk.Tk()  # Создаем главное окно приложения
         self.loading_screen = None  # Окно индикатора загрузки
+        self.job_queue = None  # Очередь сообщений от фонового потока обработки
+        self.cancel_event = None  # Событие отмены фоновой обработки
+        self.job_started = None  # Время запуска фоновой обработки
         self.selected_files = []  # Список выбранных файлов
         self.skip_top_rows = 0
         self.header_rows = 1
         self.skip_bottom_rows = 0
         self.csv_delimiter =';'
+        self.fingerprint_store = FingerprintStore()  # Хеши файлов сохраняются между запусками в рамках сеанса
+        self.file_metadata = FileMetadataLoader()  # Сведения о файлах для списка выбранных файлов
+        self.file_fill_job = None  # Запланированный шаг заполнения списка выбранных файлов
+        self.preview_cache = MemoryFileCache()  # Первые строки файлов, прочитанные для предварительного просмотра
+        self.preview_cancel_event = None  # Событие отмены выполняющегося предварительного просмотра
         # self.include_filename_column = tk.BooleanVar(value=True)  # Переменная для состояния чекбокса
         self.setup_main_screen()  # Настраиваем основной экран
         self.show_screen(self.main_screen)  # Отображаем главный экран
@@ -95,7 +135,8 @@ class ExcelConcatenatorApp:
         # Инструкция 2
         label2 = tk.Label(
             main_frame,
-            text=f"Поддерживаются файлы формата .xlsx .csv .xls .xlsm\n Строго с одной страницей",
+            text=f"Поддерживаются файлы формата .xlsx .csv .xls .xlsm .parquet .feather .arrow\n"
+                 f" Файлы Excel с одной страницей (или все страницы книг - на следующем шаге)",
             bg='#e0f7fa',
             font=('Arial', 10)
         )
@@ -125,6 +166,15 @@ class ExcelConcatenatorApp:
         )
         select_folder_btn.pack(side=tk.LEFT, padx=10)
 
+        # Чекбокс для поиска файлов во вложенных папках
+        self.recursive_search = tk.BooleanVar(value=False)
+        tk.Checkbutton(
+            buttons_frame,
+            text="Включая вложенные папки",
+            variable=self.recursive_search,
+            bg='#e0f7fa'
+        ).pack(side=tk.TOP, pady=(10, 0))
+
         # Кнопка "Завершить"
         exit_btn = tk.Button(
             main_frame,
@@ -133,15 +183,32 @@ class ExcelConcatenatorApp:
         )
         exit_btn.pack(pady=(10, 0))
 
-    def setup_loading_screen(self):
+    def setup_loading_screen(self, files_total):
         """
-        создаеь окно индикатора загрузки.
+        Создает окно индикатора выполнения с количеством файлов, строк, оставшимся временем и кнопкой отмены.
+
+        Args:
+            files_total (int): Общее количество обрабатываемых файлов.
         """
-        self.loading_screen = tk.Toplevel()
+        self.loading_screen = tk.Toplevel(self.main_screen)
         self.loading_screen.geometry("400x200")
         self.loading_screen.title("Пожалуйста, подождите")
-        loading_label = tk.Label(self.loading_screen, text="Обработка файлов, пожалуйста, подождите...")
-        loading_label.pack(expand=True)
+        self.loading_screen.protocol("WM_DELETE_WINDOW", self.cancel_job)  # Закрытие окна отменяет обработку
+        self.loading_label = tk.Label(self.loading_screen, text="Обработка файлов, пожалуйста, подождите...")
+        self.loading_label.pack(pady=(20, 10))
+
+        self.progress_bar = ttk.Progressbar(self.loading_screen, orient=tk.HORIZONTAL, length=350,
+                                            mode='determinate', maximum=max(files_total, 1))
+        self.progress_bar.pack(pady=5)
+
+        self.progress_label = tk.Label(self.loading_screen, text=f"Файлов: 0 из {files_total}, строк: 0")
+        self.progress_label.pack(pady=5)
+
+        self.cancel_button = tk.Button(self.loading_screen, text="Отмена", command=self.cancel_job)
+        self.cancel_button.pack(pady=10)
+
+        # Блокируем главное окно, пока идет обработка
+        self.loading_screen.grab_set()
 
     def display_image(self, image_path, root, size=(20, 20)):
         """
@@ -187,9 +254,10 @@ class ExcelConcatenatorApp:
                 initialdir=downloads_path,
                 title="Выберите файлы Excel или CSV",
                 filetypes=[
-                    ("Supported filetypes", "*.xlsx;*.xls;*.xlsm;*.csv"),  # Все поддерживаемые форматы
+                    ("Supported filetypes", "*.xlsx;*.xls;*.xlsm;*.csv;*.parquet;*.feather;*.arrow"),  # Все форматы
                     ("Excel files", "*.xlsx;*.xls;*.xlsm"),  # Файлы Excel
                     ("CSV files", "*.csv"),  # Файлы CSV
+                    ("Parquet / Arrow files", "*.parquet;*.feather;*.arrow"),  # Колоночные форматы
                     ("Все файлы", "*.*")  # Все файлы
                 ]
             )
@@ -228,23 +296,19 @@ class ExcelConcatenatorApp:
                 self.show_screen(self.main_screen)
                 return
 
-            # Поддерживаемые расширения файлов
-            supported_extensions = ('.xlsx', '.xls', '.xlsm', '.csv', 'xlsb')
-
+            invalid_files = []
             # Если input_path - это список файлов
             if isinstance(input_path, tuple):
                 files = input_path
                 if not files:
                     raise ValueError("Выбор файлов отменен.")
-                # Фильтруем выбранные файлы, оставляя только поддерживаемые форматы
-                self.selected_files = [file for file in files if file.lower().endswith(supported_extensions)]
-                invalid_files = [file for file in files if not file.lower().endswith(supported_extensions)]
+                # Файлы неподдерживаемых форматов и файлы блокировки Office пропускаются
+                self.selected_files = [file for file in files if is_supported_file(file)]
+                invalid_files = [file for file in files if not is_supported_file(file)]
             # Если input_path - это путь к папке
             elif isinstance(input_path, str) and os.path.isdir(input_path):
-                folder = input_path
-                files = [os.path.join(folder, file) for file in os.listdir(folder)]
-                self.selected_files = [file for file in files if file.lower().endswith(supported_extensions)]
-                invalid_files = [file for file in files if not file.lower().endswith(supported_extensions)]
+                # В папке отбираются только поддерживаемые файлы, остальные файлы не считаются ошибкой
+                self.selected_files = discover_files(input_path, recursive=self.recursive_search.get())
             else:
                 raise ValueError("Неверный формат входных данных. Ожидался путь к папке или список файлов.")
 
@@ -255,7 +319,7 @@ class ExcelConcatenatorApp:
                 raise ValueError("Необходимо выбрать более одного файла для объединения.")
             elif invalid_files:
                 invalid_files_list = "\n".join(os.path.basename(file) for file in invalid_files)
-                raise ValueError(f"Некорректные файлы:\n{invalid_files_list}")
+                messagebox.showwarning("Выбор файлов", f"Пропущены файлы неподдерживаемых форматов:\n{invalid_files_list}")
 
             # Переходим к экрану подтверждения выбора
             self.selection_confirmation_frame()
@@ -279,37 +343,45 @@ class ExcelConcatenatorApp:
         content_frame = tk.Frame(self.main_screen, bg='#e0f7fa')
         content_frame.pack(side=tk.TOP, fill=tk.BOTH, expand=True)
 
-        # Создаем холст и вертикальный скроллбар
-        canvas = tk.Canvas(content_frame, bg='#e0f7fa')
-        scrollbar = tk.Scrollbar(content_frame, orient=tk.VERTICAL, command=canvas.yview)
-        scrollable_frame = tk.Frame(canvas, bg='#e0f7fa')
-
-        # Функция для обновления области прокрутки при изменении размера scrollable_frame
-        def update_scroll_region(event):
-            canvas.configure(scrollregion=canvas.bbox("all"))
-
-        scrollable_frame.bind("<Configure>", update_scroll_region)
-
-        # Помещаем scrollable_frame на холст
-        canvas.create_window((0, 0), window=scrollable_frame, anchor=tk.NW)
-        canvas.grid(row=0, column=0, sticky="nsew")
-        scrollbar.grid(row=0, column=1, sticky="ns")
-        canvas.configure(yscrollcommand=scrollbar.set)
-
-        # Запрещаем изменение размера фрейма, содержащего прокрутку
-        content_frame.grid_rowconfigure(0, weight=1)
+        # Добавляем метку о выбранных файлах
+        selection_label = tk.Label(content_frame, text=f"Вы выбрали файлов: {len(self.selected_files)}",
+                                   bg='#e0f7fa')
+        selection_label.grid(row=0, column=0, columnspan=2, pady=10)
+
+        # Список выбранных файлов: Treeview отрисовывает только видимые строки, поэтому окно открывается
+        # сразу при любом количестве файлов. Размер, дата изменения, количество страниц и строк
+        # дочитываются в фоновом потоке
+        self.file_tree = ttk.Treeview(content_frame, columns=tuple(FILE_LIST_COLUMNS), show='headings',
+                                      selectmode='browse')
+        for column, (title, width, anchor) in FILE_LIST_COLUMNS.items():
+            self.file_tree.heading(column, text=title, command=lambda column=column: self.sort_file_list(column))
+            self.file_tree.column(column, width=width, anchor=anchor, stretch=column == 'name')
+        scrollbar = ttk.Scrollbar(content_frame, orient=tk.VERTICAL, command=self.file_tree.yview)
+        self.file_tree.configure(yscrollcommand=lambda first, last: (scrollbar.set(first, last),
+                                                                     self.schedule_file_details()))
+        self.file_tree.grid(row=1, column=0, sticky="nsew", padx=(10, 0))
+        scrollbar.grid(row=1, column=1, sticky="ns", padx=(0, 10))
+
+        content_frame.grid_rowconfigure(1, weight=1)
         content_frame.grid_columnconfigure(0, weight=1)
         content_frame.grid_columnconfigure(1, weight=0)
 
-        # Добавляем метку о выбранных файлах
-        selection_label = tk.Label(scrollable_frame, text="Вы выбрали следующие файлы:", bg='#e0f7fa')
-        selection_label.pack(pady=10)
-
-        # Добавляем список выбранных файлов
-        for file in self.selected_files:
-            file_label = tk.Label(scrollable_frame, text=os.path.basename(file), anchor="w", justify=tk.LEFT,
-                                  bg='#e0f7fa')
-            file_label.pack(fill=tk.BOTH, padx=10)
+        # Строки списка: значения столбцов каждого файла в порядке self.selected_files
+        self.file_rows = [{'name': os.path.basename(file), 'size': None, 'modified': None,
+                           'format': os.path.splitext(file)[1].lstrip('.').lower(), 'sheets': None, 'rows': None,
+                           'details': None}
+                          for file in self.selected_files]
+        self.file_order = list(range(len(self.selected_files)))
+        self.file_sort = None  # (столбец, по убыванию) текущей сортировки
+        self.file_index = {file: index for index, file in enumerate(self.selected_files)}
+        if self.file_fill_job is not None:
+            # Заполнение списка, открытого ранее, не должно продолжиться в новом списке
+            self.main_screen.after_cancel(self.file_fill_job)
+            self.file_fill_job = None
+        self.file_details_job = None
+        self.fill_file_list()
+        self.file_metadata.load_stats(self.selected_files)
+        self.main_screen.after(100, self.poll_file_metadata, self.file_tree)
 
         # Создаем фрейм для кнопок и чекбокса
         controls_frame = tk.Frame(self.main_screen, bg='#e0f7fa')
@@ -345,6 +417,42 @@ class ExcelConcatenatorApp:
         )
         self.include_filename_checkbox_entry.pack(side=tk.TOP, pady=10)
 
+        # Чекбокс для объединения всех страниц книг Excel
+        self.all_sheets = tk.BooleanVar(value=False)
+        tk.Checkbutton(
+            controls_frame,
+            text="Объединять все страницы книг",
+            variable=self.all_sheets,
+            bg='#e0f7fa'
+        ).pack(side=tk.TOP)
+
+        # Чекбокс для пропуска побайтно одинаковых файлов
+        self.skip_duplicate_files = tk.BooleanVar(value=False)
+        tk.Checkbutton(
+            controls_frame,
+            text="Пропускать одинаковые файлы",
+            variable=self.skip_duplicate_files,
+            bg='#e0f7fa'
+        ).pack(side=tk.TOP)
+
+        # Чекбокс для удаления повторяющихся строк (например, пересекающихся ежедневных выгрузок)
+        self.remove_duplicate_rows = tk.BooleanVar(value=False)
+        tk.Checkbutton(
+            controls_frame,
+            text="Удалять повторяющиеся строки",
+            variable=self.remove_duplicate_rows,
+            bg='#e0f7fa'
+        ).pack(side=tk.TOP)
+
+        # Чекбокс для показа отчета о времени обработки после сохранения
+        self.show_report = tk.BooleanVar(value=False)
+        tk.Checkbutton(
+            controls_frame,
+            text="Показать отчет о времени обработки",
+            variable=self.show_report,
+            bg='#e0f7fa'
+        ).pack(side=tk.TOP)
+
         # Создаем фрейм для кнопок
         buttons_frame = tk.Frame(controls_frame, bg='#e0f7fa')
         buttons_frame.pack(side=tk.BOTTOM, pady=10, fill=tk.X)
@@ -353,7 +461,7 @@ class ExcelConcatenatorApp:
         back_button = tk.Button(
             buttons_frame,
             text="Назад",
-            command=lambda: self.show_screen(self.main_screen)
+            command=self.back_to_main_screen
         )
         back_button.pack(side=tk.LEFT, padx=20)
 
@@ -365,6 +473,125 @@ class ExcelConcatenatorApp:
         )
         save_button.pack(side=tk.RIGHT, padx=20)
 
+        # Кнопка "Предпросмотр": первые строки каждого файла с текущими параметрами без полного чтения
+        self.preview_button = tk.Button(
+            buttons_frame,
+            text="Предпросмотр",
+            command=self.preview_selection
+        )
+        self.preview_button.pack(side=tk.RIGHT, padx=20)
+
+    def fill_file_list(self, start=0):
+        """
+        Заполняет список выбранных файлов в порядке self.file_order. Строки добавляются частями
+        по FILE_LIST_CHUNK между обработкой событий окна, чтобы большой список не задерживал его отрисовку.
+
+        Args:
+            start (int): Позиция в self.file_order, с которой продолжается заполнение; 0 - заполнить заново.
+        """
+        if not self.file_tree.winfo_exists():
+            return
+        if start == 0:
+            if self.file_fill_job is not None:
+                self.main_screen.after_cancel(self.file_fill_job)
+            self.file_tree.delete(*self.file_tree.get_children())
+            self.file_inserted = 0
+
+        end = min(start + FILE_LIST_CHUNK, len(self.file_order))
+        for index in self.file_order[start:end]:
+            self.file_tree.insert('', tk.END, iid=str(index), values=self.file_row_values(index))
+        self.file_inserted = end
+        self.file_fill_job = self.main_screen.after(1, self.fill_file_list, end) if end < len(self.file_order) else None
+        if start == 0:
+            self.schedule_file_details()
+
+    def file_row_values(self, index):
+        """
+        Возвращает значения столбцов строки списка для файла с номером index в self.selected_files.
+        """
+        row = self.file_rows[index]
+        unreadable = row['details'] is not None and 'error' in row['details']
+        return (row['name'],
+                '' if row['size'] is None else _format_size(row['size']),
+                '' if row['modified'] is None else datetime.fromtimestamp(row['modified']).strftime('%Y-%m-%d %H:%M'),
+                row['format'],
+                '?' if unreadable else '' if row['sheets'] is None else row['sheets'],
+                '?' if unreadable else '' if row['rows'] is None else row['rows'])
+
+    def sort_file_list(self, column):
+        """
+        Сортирует список выбранных файлов по столбцу; повторный выбор того же столбца меняет направление.
+        Файлы, значение которых еще не прочитано или недоступно, остаются в конце списка.
+        """
+        descending = self.file_sort == (column, False)
+        self.file_sort = (column, descending)
+
+        rows = self.file_rows
+        known = [index for index, row in enumerate(rows) if row[column] is not None]
+        unknown = [index for index, row in enumerate(rows) if row[column] is None]
+        if column == 'name':
+            known.sort(key=lambda index: rows[index]['name'].casefold(), reverse=descending)
+        else:
+            known.sort(key=lambda index: rows[index][column], reverse=descending)
+        self.file_order = known + unknown
+
+        for name, (title, _, _) in FILE_LIST_COLUMNS.items():
+            arrow = (' ▼' if descending else ' ▲') if name == column else ''
+            self.file_tree.heading(name, text=title + arrow)
+        self.fill_file_list()
+
+    def schedule_file_details(self):
+        """
+        Планирует запрос сведений о содержимом видимых файлов: при прокрутке запрос выполняется
+        один раз после паузы FILE_DETAILS_DELAY мс, а не при каждом сдвиге списка.
+        """
+        if self.file_details_job is None:
+            self.file_details_job = self.main_screen.after(FILE_DETAILS_DELAY, self.request_visible_details)
+
+    def request_visible_details(self):
+        """
+        Запрашивает у фонового потока количество страниц и строк файлов, видимых в списке.
+        """
+        self.file_details_job = None
+        if not self.file_tree.winfo_exists():
+            return
+        first, last = self.file_tree.yview()
+        start = int(first * self.file_inserted)
+        stop = min(self.file_inserted, int(last * self.file_inserted) + 1)
+        self.file_metadata.request_details([self.selected_files[index] for index in self.file_order[start:stop]
+                                            if self.file_rows[index]['details'] is None])
+
+    def poll_file_metadata(self, tree):
+        """
+        Переносит в список сведения о файлах, прочитанные фоновым потоком, и планирует следующую проверку.
+        После ухода с экрана подтверждения фоновое чтение останавливается.
+
+        Args:
+            tree (ttk.Treeview): Список, для которого запущена проверка. Если экран подтверждения открыт
+                заново, новый список проверяется своим циклом, а этот цикл завершается.
+        """
+        if tree is not self.file_tree:
+            return
+        if not tree.winfo_exists():
+            self.file_metadata.load_stats([])
+            self.file_metadata.request_details([])
+            return
+
+        for message in self.file_metadata.poll():
+            index = self.file_index.get(message[1])
+            if index is None:
+                continue
+            row = self.file_rows[index]
+            if message[0] == 'stat':
+                row['size'], row['modified'] = message[2], message[3]
+            else:
+                row['details'] = message[2]
+                row['sheets'], row['rows'] = message[2].get('sheets'), message[2].get('rows')
+            if self.file_tree.exists(str(index)):
+                self.file_tree.item(str(index), values=self.file_row_values(index))
+
+        self.main_screen.after(100, self.poll_file_metadata, tree)
+
     def savepath_selection_window(self):
         """
         Открывает диалоговое окно для выбора места сохранения объединенного файла.
@@ -378,6 +605,9 @@ class ExcelConcatenatorApp:
                 filetypes=[
                     ("Excel files (xlsx)", "*.xlsx"),  # Возможность выбора формата .xlsx
                     ("CSV files (csv)", "*.csv"),  # Возможность выбора формата .csv
+                    ("Parquet files (parquet)", "*.parquet"),  # Колоночные форматы для дальнейшей обработки
+                    ("Feather files (feather)", "*.feather"),
+                    ("Arrow IPC files (arrow)", "*.arrow"),
                     ("Все файлы", "*.*")  # Возможность выбора всех форматов
                 ]
             )
@@ -392,46 +622,327 @@ class ExcelConcatenatorApp:
 
     def concatenate_save(self):
         """
-        Выполняет сохранение объединенного файла в фоновом режиме.
-        """
+        Запускает объединение и сохранение файлов в фоновом потоке.
 
+        Окно остается отзывчивым: ход обработки передается из потока через очередь,
+        которую главное окно опрашивает методом after().
+        """
         save_path = self.savepath_selection_window()
-        if save_path is not None:
-            self.setup_loading_screen()
-            self.show_screen(self.loading_screen)
-            self.update_screen(self.loading_screen)
+        # Формат проверяется до запуска обработки, чтобы при ошибке сразу предложить выбрать другой путь
+        while save_path is not None and os.path.splitext(save_path)[-1].lower() not in STREAM_WRITER_EXTENSIONS:
+            messagebox.showerror(message=UNSUPPORTED_FORMAT_MESSAGE)
+            save_path = self.savepath_selection_window()  # Повторно открываем окно выбора пути сохранения файла
+        if save_path is None:
+            return
+
+        try:
+            # Значения виджетов читаются до запуска потока: tkinter нельзя использовать из других потоков
+            options = self.merge_options()
+            csv_delimiter = options['csv_delimiter']
+            options.update(skip_duplicate_files=self.skip_duplicate_files.get(),
+                           fingerprint_store=self.fingerprint_store)
+            if self.remove_duplicate_rows.get():
+                # Хеши строк сверх DEDUP_MEMORY_BYTES выгружаются во временные файлы
+                options['deduplicator'] = RowDeduplicator(memory_bytes=DEDUP_MEMORY_BYTES)
+            if self.show_report.get():
+                options['report'] = RunReport()
+        except ValueError as e:
+            messagebox.showerror("Ошибка объединения файлов", f"Некорректные параметры объединения: {str(e)}")
+            return
+
+        self.job_queue = queue.Queue()
+        self.cancel_event = threading.Event()
+        self.job_started = time.monotonic()
+        self.setup_loading_screen(files_total=len(options['files']))
+
+        worker = threading.Thread(target=self.run_job,
+                                  args=(options, save_path, csv_delimiter, self.job_queue, self.cancel_event),
+                                  daemon=True)
+        worker.start()
+        self.main_screen.after(100, self.poll_job)
+
+    def merge_options(self):
+        """
+        Возвращает параметры объединения, заданные на экране подтверждения выбора.
+
+        Returns:
+            dict: Параметры files, add_filename_column, skip_top_rows, header_rows, skip_bottom_rows,
+                csv_delimiter и sheets для concatenate_files и preview_files.
 
+        Raises:
+            ValueError: Если количество строк задано не целым числом.
+        """
+        return dict(files=list(self.selected_files),
+                    add_filename_column=self.include_filename_column.get(),
+                    skip_top_rows=int(self.skip_top_rows_entry.get()),
+                    header_rows=int(self.header_rows_entry.get()),
+                    skip_bottom_rows=int(self.skip_bottom_rows_entry.get()),
+                    csv_delimiter=str(self.csv_delimiter_entry.get()),
+                    sheets='all' if self.all_sheets.get() else None)
+
+    def preview_selection(self):
+        """
+        Запускает предварительный просмотр объединения в фоновом потоке: читаются только первые
+        PREVIEW_ROWS строк каждого файла, результат показывается в отдельном окне.
+        """
+        try:
+            options = self.merge_options()
+        except ValueError as e:
+            messagebox.showerror("Ошибка предварительного просмотра", f"Некорректные параметры объединения: {str(e)}")
+            return
+
+        if self.preview_cancel_event is not None:
+            # Результат просмотра с прежними параметрами больше не нужен
+            self.preview_cancel_event.set()
+        cancel_event = self.preview_cancel_event = threading.Event()
+        preview_queue = queue.Queue()
+        self.preview_button.config(text="Чтение файлов...", state=tk.DISABLED)
+
+        def run_preview():
             try:
-                # Объединяем файлы один раз
+                preview_queue.put(('done', *preview_files(**options, rows=PREVIEW_ROWS, workers=PREVIEW_WORKERS,
+                                                          cancel_event=cancel_event, cache=self.preview_cache)))
+            except ConcatenationCancelled:
+                preview_queue.put(('cancelled',))
+            except Exception as e:
+                preview_queue.put(('error', str(e)))
+
+        threading.Thread(target=run_preview, daemon=True).start()
+        self.main_screen.after(100, self.poll_preview, preview_queue, cancel_event, options['skip_bottom_rows'])
+
+    def back_to_main_screen(self):
+        """
+        Возвращается на главный экран, отменяя выполняющийся предварительный просмотр: его результат
+        для покинутого экрана не нужен.
+        """
+        if self.preview_cancel_event is not None:
+            self.preview_cancel_event.set()
+            self.preview_cancel_event = None
+        self.show_screen(self.main_screen)
+
+    def poll_preview(self, preview_queue, cancel_event, skip_bottom_rows):
+        """
+        Ожидает результат предварительного просмотра и показывает его, если просмотр не был заменен новым.
+        """
+        try:
+            message = preview_queue.get_nowait()
+        except queue.Empty:
+            self.main_screen.after(100, self.poll_preview, preview_queue, cancel_event, skip_bottom_rows)
+            return
+
+        if cancel_event is not self.preview_cancel_event:
+            return
+        self.preview_cancel_event = None
+        if self.preview_button.winfo_exists():
+            self.preview_button.config(text="Предпросмотр", state=tk.NORMAL)
+        if message[0] == 'done':
+            self.show_preview_window(message[1], message[2], skip_bottom_rows)
+        elif message[0] == 'error':
+            messagebox.showerror("Ошибка предварительного просмотра", message[1])
+
+    def show_preview_window(self, sample, problems, skip_bottom_rows):
+        """
+        Показывает образец объединения и список файлов, которые не удалось прочитать или заголовки
+        которых не совпадают с первым файлом.
 
-                concatenation_result = concatenate_files(files=self.selected_files,
-                                                         add_filename_column=self.include_filename_column.get(),
-                                                         skip_top_rows=int(self.skip_top_rows_entry.get()),
-                                                         header_rows=int(self.header_rows_entry.get()),
-                                                         skip_bottom_rows=int(self.skip_bottom_rows_entry.get()),
-                                                         csv_delimiter=str(self.csv_delimiter_entry.get()))
+        Args:
+            sample (pd.DataFrame): Первые строки каждого файла, объединенные с текущими параметрами.
+            problems (list): Пары (файл, описание проблемы).
+            skip_bottom_rows (int): Количество строк, пропускаемых снизу.
+        """
+        window = tk.Toplevel(self.main_screen)
+        window.title("Предварительный просмотр")
+        window.geometry("900x600")
+
+        text = (f"Первые {PREVIEW_ROWS} строк каждого файла: всего строк {len(sample)}, "
+                f"файлов с проблемами {len(problems)} из {len(self.selected_files)}.")
+        if skip_bottom_rows:
+            text += (f"\nЧтобы отбросить {skip_bottom_rows} строк снизу, читается на {skip_bottom_rows} строк больше; "
+                     f"файлы короче {PREVIEW_ROWS + skip_bottom_rows} строк данных читаются целиком.")
+        tk.Label(window, text=text, justify=tk.LEFT).pack(anchor=tk.W, padx=10, pady=(10, 5))
+
+        # Заголовки из нескольких строк показываются в одной строке через ' / '
+        columns = [" / ".join('' if pd.isna(level) else str(level) for level in column)
+                   if isinstance(column, tuple) else str(column) for column in sample.columns]
+        table_frame = tk.Frame(window)
+        table_frame.pack(fill=tk.BOTH, expand=True, padx=10)
+        table = ttk.Treeview(table_frame, columns=[str(position) for position in range(len(columns))],
+                             show='headings')
+        for position, title in enumerate(columns):
+            table.heading(str(position), text=title)
+            table.column(str(position), width=120, stretch=False)
+        for row in sample.itertuples(index=False):
+            table.insert('', tk.END, values=['' if pd.isna(value) else str(value) for value in row])
+        y_scrollbar = ttk.Scrollbar(table_frame, orient=tk.VERTICAL, command=table.yview)
+        x_scrollbar = ttk.Scrollbar(table_frame, orient=tk.HORIZONTAL, command=table.xview)
+        table.configure(yscrollcommand=y_scrollbar.set, xscrollcommand=x_scrollbar.set)
+        table.grid(row=0, column=0, sticky="nsew")
+        y_scrollbar.grid(row=0, column=1, sticky="ns")
+        x_scrollbar.grid(row=1, column=0, sticky="ew")
+        table_frame.grid_rowconfigure(0, weight=1)
+        table_frame.grid_columnconfigure(0, weight=1)
+
+        if problems:
+            tk.Label(window, text="Файлы с ошибками чтения или несовпадающими заголовками:",
+                     justify=tk.LEFT).pack(anchor=tk.W, padx=10, pady=(10, 5))
+            problems_list = ttk.Treeview(window, columns=('file', 'problem'), show='headings', height=6)
+            problems_list.heading('file', text="Файл")
+            problems_list.heading('problem', text="Проблема")
+            problems_list.column('file', width=250, stretch=False)
+            problems_list.column('problem', width=600)
+            for file, problem in problems:
+                problems_list.insert('', tk.END, values=(os.path.basename(file), problem.replace('\n', ' ')))
+            problems_list.pack(fill=tk.X, padx=10)
+
+        tk.Button(window, text="Закрыть", command=window.destroy).pack(side=tk.RIGHT, padx=20, pady=10)
+
+    @staticmethod
+    def run_job(options, save_path, csv_delimiter, job_queue, cancel_event):
+        """
+        Объединяет и сохраняет файлы. Выполняется в фоновом потоке и общается с окном только через очередь.
 
-                while True:
-                    try:
-                        # Пытаемся сохранить файл в выбранный формат
-                        save_file(data=concatenation_result, save_path=save_path, csv_delimiter=str(self.csv_delimiter_entry.get()))
-                        self.clear_screen_widgets(self.loading_screen)
-                        self.show_screen(self.main_screen)  # Возвращаемся на главный экран
-                        messagebox.showinfo("Успешное сохранение", f"Файл успешно сохранен:\n{save_path}")
-                        break  # Выходим из цикла, если сохранение прошло успешно
+        Args:
+            options (dict): Параметры для concatenate_files (включая report, если нужен отчет о выполнении,
+                и deduplicator, если нужно удалить повторяющиеся строки).
+            save_path (str): Путь для сохранения результата.
+            csv_delimiter (str): Разделитель при сохранении в формате csv.
+            job_queue (queue.Queue): Очередь сообщений для главного окна.
+            cancel_event (threading.Event): Событие отмены обработки.
+        """
 
-                    except ValueError as e:
-                        # Если ошибка связана с неподдерживаемым форматом, повторяем выбор места сохранения
-                        self.hide_screen(self.loading_screen)
-                        messagebox.showerror(message=f"{str(e)}.")
-                        save_path = self.savepath_selection_window()  # Повторно открываем окно выбора пути сохранения файла
+        def report_progress(files_done, files_total, rows_done):
+            job_queue.put(('progress', files_done, files_total, rows_done))
 
-                        if save_path is None:
-                            break
-                        self.show_screen(self.loading_screen)
+        saving = False
+        report = options.get('report')
+        deduplicator = options.get('deduplicator')
+        try:
+            concatenation_result = concatenate_files(**options, progress_callback=report_progress,
+                                                     cancel_event=cancel_event)
+            job_queue.put(('saving',))
+            saving = True
+            save_file(data=concatenation_result, save_path=save_path, csv_delimiter=csv_delimiter, report=report)
+            # Отмена во время сохранения выполняется после его завершения
+            if cancel_event.is_set():
+                raise ConcatenationCancelled("Объединение файлов отменено.")
+            if report is not None:
+                report.finish()
+            job_queue.put(('done', save_path, report, None if deduplicator is None else deduplicator.rows_dropped))
+
+        except ConcatenationCancelled:
+            # Удаляем частично или полностью записанный результат отмененной обработки
+            if saving and os.path.exists(save_path):
+                os.remove(save_path)
+            job_queue.put(('cancelled',))
 
+        except Exception as e:
+            job_queue.put(('error', str(e)))
 
+        finally:
+            if deduplicator is not None:
+                deduplicator.close()
 
-            except Exception as e:
-                self.hide_screen(self.loading_screen)
-                messagebox.showerror("Ошибка объединения файлов", f"Произошла ошибка при объединении файлов: {str(e)}")
+    def poll_job(self):
+        """
+        Обрабатывает сообщения фонового потока и планирует следующую проверку очереди.
+        """
+        try:
+            while True:
+                message = self.job_queue.get_nowait()
+                if message[0] == 'progress':
+                    self.update_progress(*message[1:])
+                elif message[0] == 'saving':
+                    self.loading_label.config(text="Сохранение файла, пожалуйста, подождите...")
+                else:
+                    self.finish_job(message)
+                    return
+        except queue.Empty:
+            pass
+
+        self.main_screen.after(100, self.poll_job)
+
+    def update_progress(self, files_done, files_total, rows_done):
+        """
+        Обновляет индикатор выполнения: количество файлов, строк и оценку оставшегося времени.
+        """
+        self.progress_bar['value'] = files_done
+        text = f"Файлов: {files_done} из {files_total}, строк: {rows_done}"
+        if 0 < files_done < files_total:
+            elapsed = time.monotonic() - self.job_started
+            remaining = int(elapsed / files_done * (files_total - files_done))
+            text += f"\nОсталось примерно: {remaining // 60:d}:{remaining % 60:02d}"
+        self.progress_label.config(text=text)
+
+    def cancel_job(self):
+        """
+        Запрашивает отмену фоновой обработки. Обработка останавливается перед чтением следующего файла.
+        """
+        if self.cancel_event is not None:
+            self.cancel_event.set()
+            self.loading_label.config(text="Отмена обработки...")
+            self.cancel_button.config(state=tk.DISABLED)
+
+    def finish_job(self, message):
+        """
+        Закрывает окно индикатора и сообщает результат фоновой обработки.
+        """
+        self.loading_screen.grab_release()
+        self.loading_screen.destroy()
+        self.loading_screen = None
+        self.cancel_event = None
+
+        if message[0] == 'done':
+            self.show_screen(self.main_screen)  # Возвращаемся на главный экран
+            text = f"Файл успешно сохранен:\n{message[1]}"
+            if message[3] is not None:
+                text += f"\nУдалено повторяющихся строк: {message[3]}"
+            messagebox.showinfo("Успешное сохранение", text)
+            if message[2] is not None:
+                self.show_report_window(message[2])
+        elif message[0] == 'cancelled':
+            messagebox.showinfo("Отмена", "Объединение файлов отменено.")
+        else:
+            messagebox.showerror("Ошибка объединения файлов", f"Произошла ошибка при объединении файлов: {message[1]}")
+
+    def show_report_window(self, report):
+        """
+        Показывает сводку отчета о выполнении с возможностью сохранить полный отчет в JSON.
+
+        Args:
+            report (RunReport): Отчет о выполнении объединения.
+        """
+        window = tk.Toplevel(self.main_screen)
+        window.title("Отчет о времени обработки")
+        window.geometry("700x400")
+
+        text_frame = tk.Frame(window)
+        text_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        scrollbar = tk.Scrollbar(text_frame)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        text = tk.Text(text_frame, wrap=tk.NONE, yscrollcommand=scrollbar.set)
+        text.insert(tk.END, report.summary())
+        text.config(state=tk.DISABLED)
+        text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.config(command=text.yview)
+
+        def save_report():
+            path = filedialog.asksaveasfilename(parent=window, title="Сохранить отчет", defaultextension=".json",
+                                                filetypes=[("JSON files (json)", "*.json")])
+            if path:
+                try:
+                    report.write_json(path)
+                except OSError as e:
+                    messagebox.showerror("Ошибка сохранения отчета", str(e), parent=window)
+
+        buttons_frame = tk.Frame(window)
+        buttons_frame.pack(fill=tk.X, pady=(0, 10))
+        tk.Button(buttons_frame, text="Сохранить JSON", command=save_report).pack(side=tk.LEFT, padx=20)
+        tk.Button(buttons_frame, text="Закрыть", command=window.destroy).pack(side=tk.RIGHT, padx=20)
+
+
+def _format_size(size):
+    """Размер файла в байтах в виде '512 Б', '12.3 КБ' или '4.5 МБ'."""
+    for unit in ("Б", "КБ", "МБ"):
+        if size < 1024 or unit == "МБ":
+            return f"{size:.0f} {unit}" if unit == "Б" else f"{size:.1f} {unit}"
+        size /= 1024
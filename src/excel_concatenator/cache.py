@@ -0,0 +1,231 @@
+import hashlib
+import json
+import os
+import tempfile
+from collections import OrderedDict
+
+import pandas as pd
+
+# Версия формата кэша: при изменении способа чтения файлов старые записи перестают совпадать по ключу
+CACHE_VERSION = 1
+
+# Расширение файлов записей кэша
+CACHE_ENTRY_EXTENSION = '.pkl'
+
+
+class ParsedFileCache:
+    """
+    Дисковый кэш прочитанных DataFrame.
+
+    Ключ записи включает путь к файлу, его размер, время изменения, при необходимости хеш содержимого,
+    а также параметры чтения. Записи хранятся в формате pickle, который восстанавливает DataFrame
+    вместе с заголовками MultiIndex без повторного разбора исходного файла. Суммарный размер
+    записей ограничен max_bytes: при превышении удаляются давно не использованные записи (LRU).
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = 2 * 1024 ** 3, use_content_hash: bool = False):
+        """
+        params:
+            cache_dir: Папка для хранения записей кэша (создается при необходимости).
+            max_bytes: Максимальный суммарный размер записей в байтах.
+            use_content_hash: Если True, в ключ добавляется SHA-256 содержимого файла.
+                Это защищает от изменений, не затронувших размер и время изменения, ценой чтения файла целиком.
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.use_content_hash = use_content_hash
+        self.hits = 0
+        self.misses = 0
+        self._content_hashes = {}  # Хеши содержимого, вычисленные в текущем запуске
+        os.makedirs(cache_dir, exist_ok=True)
+
+        # Индекс записей: имя файла записи -> (время последнего использования, размер)
+        self._entries = {}
+        with os.scandir(cache_dir) as entries:
+            for entry in entries:
+                if entry.is_file() and entry.name.endswith(CACHE_ENTRY_EXTENSION):
+                    stat = entry.stat()
+                    self._entries[entry.name] = (stat.st_mtime_ns, stat.st_size)
+        # Лимит мог быть уменьшен с прошлого запуска
+        self._evict()
+
+    def key(self, file_path: str, read_options: dict) -> str:
+        """
+        Вычисляет ключ записи для файла и параметров чтения.
+
+        params:
+            file_path: Путь к исходному файлу.
+            read_options: Параметры чтения (skip_top_rows, header_rows, skip_bottom_rows, csv_delimiter и т.д.).
+        return:
+            Шестнадцатеричная строка SHA-256.
+        """
+        stat = os.stat(file_path)
+        identity = {
+            'version': CACHE_VERSION,
+            'path': os.path.abspath(file_path),
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'content_hash': None,
+            # Словари в параметрах (например, схема типов) могут иметь ключи-кортежи, недопустимые в JSON
+            'options': {name: sorted(([key, value] for key, value in option.items()), key=str)
+                        if isinstance(option, dict) else option for name, option in read_options.items()},
+        }
+        if self.use_content_hash:
+            # Хеш вычисляется один раз за запуск для каждой версии файла (get и put используют один ключ)
+            file_identity = (identity['path'], stat.st_size, stat.st_mtime_ns)
+            if file_identity not in self._content_hashes:
+                self._content_hashes[file_identity] = file_sha256(file_path)
+            identity['content_hash'] = self._content_hashes[file_identity]
+        return hashlib.sha256(json.dumps(identity, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+    def get(self, file_path: str, read_options: dict):
+        """
+        Возвращает DataFrame из кэша или None, если записи нет или она повреждена.
+
+        params:
+            file_path: Путь к исходному файлу.
+            read_options: Параметры чтения.
+        return:
+            DataFrame или None.
+        """
+        name = self.key(file_path, read_options) + CACHE_ENTRY_EXTENSION
+        path = os.path.join(self.cache_dir, name)
+        if name in self._entries:
+            try:
+                data = pd.read_pickle(path)
+            except Exception:
+                # Поврежденная или удаленная извне запись считается промахом
+                self._remove(name)
+            else:
+                os.utime(path)
+                self._entries[name] = (os.stat(path).st_mtime_ns, self._entries[name][1])
+                self.hits += 1
+                return data
+
+        self.misses += 1
+        return None
+
+    def put(self, file_path: str, read_options: dict, data: pd.DataFrame) -> None:
+        """
+        Сохраняет DataFrame в кэш и удаляет давно не использованные записи при превышении лимита размера.
+
+        params:
+            file_path: Путь к исходному файлу.
+            read_options: Параметры чтения.
+            data: Прочитанный DataFrame.
+        """
+        name = self.key(file_path, read_options) + CACHE_ENTRY_EXTENSION
+        path = os.path.join(self.cache_dir, name)
+
+        # Запись во временный файл с последующей заменой, чтобы прерванная запись не оставила поврежденный файл
+        handle, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(handle, 'wb') as temp_file:
+                pd.to_pickle(data, temp_file)
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        stat = os.stat(path)
+        self._entries[name] = (stat.st_mtime_ns, stat.st_size)
+        self._evict()
+
+    def stats(self) -> dict:
+        """
+        Возвращает статистику кэша: количество попаданий, промахов, записей и их суммарный размер.
+        """
+        return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._entries),
+                'bytes': sum(size for _, size in self._entries.values())}
+
+    def _evict(self) -> None:
+        """Удаляет давно не использованные записи, пока суммарный размер превышает max_bytes."""
+        total = sum(size for _, size in self._entries.values())
+        for name, (_, size) in sorted(self._entries.items(), key=lambda item: item[1][0]):
+            if total <= self.max_bytes:
+                break
+            self._remove(name)
+            total -= size
+
+    def _remove(self, name: str) -> None:
+        self._entries.pop(name, None)
+        path = os.path.join(self.cache_dir, name)
+        if os.path.exists(path):
+            os.remove(path)
+
+
+class MemoryFileCache:
+    """
+    Кэш прочитанных DataFrame в памяти процесса с тем же интерфейсом, что и ParsedFileCache.
+
+    Предназначен для небольших результатов, которые читаются повторно в течение сеанса (например,
+    первых строк файлов для предварительного просмотра). Ключ записи - путь к файлу, его размер,
+    время изменения и параметры чтения; при превышении max_entries удаляются давно не использованные записи.
+    """
+
+    def __init__(self, max_entries: int = 4096):
+        """
+        params:
+            max_entries: Максимальное количество записей.
+        """
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def key(self, file_path: str, read_options: dict) -> tuple:
+        """
+        Вычисляет ключ записи для файла и параметров чтения.
+        """
+        stat = os.stat(file_path)
+        options = json.dumps({name: sorted(([key, value] for key, value in option.items()), key=str)
+                              if isinstance(option, dict) else option for name, option in read_options.items()},
+                             sort_keys=True, default=str)
+        return os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns, options
+
+    def get(self, file_path: str, read_options: dict):
+        """
+        Возвращает копию DataFrame из кэша или None, если записи нет.
+        """
+        key = self.key(file_path, read_options)
+        data = self._entries.get(key)
+        if data is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        # Вызывающий код может изменять полученный DataFrame (например, добавлять колонку 'Source')
+        return data.copy()
+
+    def put(self, file_path: str, read_options: dict, data: pd.DataFrame) -> None:
+        """
+        Сохраняет копию DataFrame в кэш и удаляет давно не использованные записи при превышении лимита.
+        """
+        self._entries[self.key(file_path, read_options)] = data.copy()
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        """
+        Возвращает статистику кэша: количество попаданий, промахов, записей и их суммарный размер.
+        """
+        return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._entries),
+                'bytes': sum(int(data.memory_usage(index=True, deep=True).sum()) for data in self._entries.values())}
+
+
+def file_sha256(file_path: str, block_size: int = 1 << 20) -> str:
+    """
+    Вычисляет SHA-256 содержимого файла, читая его блоками.
+
+    params:
+        file_path: Путь к файлу.
+        block_size: Размер блока чтения в байтах.
+    return:
+        Шестнадцатеричная строка хеша.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as handle:
+        for block in iter(lambda: handle.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
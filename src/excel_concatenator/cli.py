@@ -0,0 +1,394 @@
+import argparse
+import glob
+import os
+import re
+import sys
+from datetime import datetime
+
+from src.excel_concatenator.discovery import discover_files
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """
+    Создает парсер аргументов командной строки.
+    """
+    parser = argparse.ArgumentParser(
+        prog='python -m src.excel_concatenator',
+        description="Объединяет несколько файлов Excel и CSV в один файл без графического интерфейса.",
+    )
+    parser.add_argument('inputs', nargs='+',
+                        help="Файлы, папки или шаблоны путей (например, 'data/*.xlsx').")
+    parser.add_argument('-o', '--output', required=True,
+                        help="Путь к выходному файлу (.xlsx, .csv, .parquet, .feather или .arrow).")
+    parser.add_argument('--glob', action='append', default=None, metavar='PATTERN',
+                        help="Шаблон имени файлов при выборе папки (можно указать несколько раз). "
+                             "По умолчанию выбираются все поддерживаемые форматы.")
+    parser.add_argument('-r', '--recursive', action='store_true',
+                        help="Искать файлы и во вложенных папках.")
+    parser.add_argument('--exclude', action='append', default=None, metavar='PATTERN',
+                        help="Шаблон имени файлов или папок, которые нужно пропустить (можно указать несколько раз).")
+    parser.add_argument('--min-size', type=parse_size, metavar='SIZE',
+                        help="Минимальный размер файла в папке (байты или с суффиксом K, M, G).")
+    parser.add_argument('--max-size', type=parse_size, metavar='SIZE',
+                        help="Максимальный размер файла в папке (байты или с суффиксом K, M, G).")
+    parser.add_argument('--modified-after', type=datetime.fromisoformat, metavar='DATE',
+                        help="Отбирать в папках файлы, измененные не раньше даты (ГГГГ-ММ-ДД[ ЧЧ:ММ]).")
+    parser.add_argument('--modified-before', type=datetime.fromisoformat, metavar='DATE',
+                        help="Отбирать в папках файлы, измененные не позже даты (ГГГГ-ММ-ДД[ ЧЧ:ММ]).")
+    parser.add_argument('--skip-top-rows', type=int, default=0,
+                        help="Количество строк для пропуска сверху каждого файла.")
+    parser.add_argument('--header-rows', type=int, default=1,
+                        help="Количество строк заголовков в каждом файле.")
+    parser.add_argument('--skip-bottom-rows', type=int, default=0,
+                        help="Количество строк для пропуска снизу каждого файла.")
+    parser.add_argument('--delimiter', default=';',
+                        help="Разделитель входных и выходного CSV файлов.")
+    sheets = parser.add_mutually_exclusive_group()
+    sheets.add_argument('--all-sheets', action='store_true',
+                        help="Объединять все страницы книг Excel (по умолчанию книга должна содержать одну страницу). "
+                             "Столбец 'Source' содержит 'файл:страница'.")
+    sheets.add_argument('--sheet', action='append', default=None, metavar='NAME',
+                        help="Имя страницы книг Excel, которую нужно объединить (можно указать несколько раз).")
+    sheets.add_argument('--sheet-regex', metavar='PATTERN',
+                        help="Объединять страницы книг Excel, имя которых содержит совпадение с регулярным выражением.")
+    parser.add_argument('--source', action='store_true',
+                        help="Добавить столбец 'Source' с именем исходного файла.")
+    parser.add_argument('--provenance', action='store_true',
+                        help="Сохранить рядом с результатом манифест происхождения строк <результат>.provenance.json "
+                             "(файл, первая и последняя строка, SHA-256). Компактная замена столбцу 'Source'. "
+                             "Не поддерживается с --incremental.")
+    parser.add_argument('--workers', type=int,
+                        help="Количество процессов для параллельного чтения файлов (по умолчанию 1). "
+                             "Не поддерживается с --stream и --incremental.")
+    parser.add_argument('--memory-budget', type=parse_size, metavar='SIZE',
+                        help="Бюджет памяти (байты или с суффиксом K, M, G): файлы читаются параллельно, пока оценка "
+                             "их размера укладывается в бюджет, а прочитанные данные при приближении к бюджету "
+                             "выгружаются во временные файлы (требуется pyarrow); .xlsx записывается способом streaming. "
+                             "Не поддерживается с --stream и --incremental.")
+    parser.add_argument('--spill-dir',
+                        help="Папка для временных файлов при --memory-budget (по умолчанию - системная временная папка).")
+    parser.add_argument('--csv-engine', choices=('python', 'c', 'pyarrow'),
+                        help="Движок чтения CSV файлов (по умолчанию python). С --stream и --incremental CSV "
+                             "всегда читается движком c.")
+    parser.add_argument('--excel-engine', choices=('openpyxl', 'lxml'), default='openpyxl',
+                        help="Движок чтения .xlsx и .xlsm файлов: lxml разбирает страницу потоково без создания "
+                             "объектов ячеек и возвращает те же данные значительно быстрее.")
+    types = parser.add_mutually_exclusive_group()
+    types.add_argument('--typed', action='store_true',
+                       help="Определять типы столбцов (числа, даты, категории) по выборке вместо чтения всех "
+                            "значений строками. Снижает потребление памяти.")
+    types.add_argument('--dtype', action='append', default=None, metavar='COLUMN=TYPE',
+                       help="Тип столбца (int, float, date, category, string или тип pandas). Столбец задается "
+                            "уровнями заголовка через '_'. Можно указать несколько раз. --typed и --dtype не "
+                            "поддерживаются с --stream и --incremental.")
+    parser.add_argument('--align', choices=('strict', 'union', 'intersection'), default=None,
+                        help="Сопоставлять столбцы файлов по заголовкам: strict - тот же набор столбцов в любом порядке, "
+                             "union - все столбцы всех файлов, intersection - только общие столбцы.")
+    parser.add_argument('--skip-duplicates', action='store_true',
+                        help="Пропускать побайтно одинаковые входные файлы (объединяется только первый). "
+                             "С --cache-dir хеши файлов сохраняются между запусками.")
+    parser.add_argument('--dedup', action='store_true',
+                        help="Удалять повторяющиеся строки (остается первое вхождение) по мере объединения файлов. "
+                             "Строки сравниваются по 64-битным хешам значений; количество удаленных строк "
+                             "выводится для каждого файла.")
+    parser.add_argument('--dedup-column', action='append', default=None, metavar='COLUMN',
+                        help="Ключевой столбец для --dedup (уровни заголовка через '_'; можно указать несколько раз). "
+                             "По умолчанию строки сравниваются по всем столбцам, кроме 'Source'.")
+    parser.add_argument('--dedup-memory', type=parse_size, metavar='SIZE',
+                        help="Объем памяти под хеши строк для --dedup (байты или с суффиксом K, M, G); при превышении "
+                             "хеши выгружаются во временные файлы в --spill-dir.")
+    parser.add_argument('--preflight', action='store_true',
+                        help="Перед чтением данных проверить заголовки всех файлов и сообщить обо всех несовпадениях сразу.")
+    parser.add_argument('--stream', action='store_true',
+                        help="Записывать результат по мере чтения, не собирая его в памяти (кэш не используется).")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Дописать в результат только новые и измененные файлы по манифесту рядом с выходным "
+                             "файлом (столбец индекса не записывается).")
+    parser.add_argument('--chunk-size', type=int, default=100_000,
+                        help="Количество строк в одной части CSV файла при потоковой записи.")
+    parser.add_argument('--xlsx-writer', choices=('pandas', 'streaming'),
+                        help="Способ записи .xlsx файла (по умолчанию pandas, с --memory-budget - streaming).")
+    parser.add_argument('--compression',
+                        help="Сжатие для .parquet (snappy, zstd, gzip, none) и .feather/.arrow (lz4, zstd, none).")
+    parser.add_argument('--row-group-size', type=int,
+                        help="Максимальное количество строк в группе строк .parquet, .feather и .arrow файла.")
+    parser.add_argument('--no-index', action='store_true',
+                        help="Не записывать столбец индекса.")
+    parser.add_argument('--report', metavar='PATH',
+                        help="Сохранить отчет о выполнении (время этапов и чтения каждого файла) в JSON файл "
+                             "и вывести сводку. Не поддерживается с --stream и --incremental.")
+    parser.add_argument('--cache-dir',
+                        help="Папка дискового кэша прочитанных файлов. Неизмененные файлы не разбираются повторно. "
+                             "С --stream кэш не используется, в папке сохраняются только хеши --skip-duplicates.")
+    parser.add_argument('--cache-size-mb', type=int, default=2048,
+                        help="Максимальный размер кэша в МБ.")
+    parser.add_argument('--cache-content-hash', action='store_true',
+                        help="Учитывать в ключе кэша хеш содержимого файла.")
+    return parser
+
+
+def parse_dtypes(args: argparse.Namespace):
+    """
+    Возвращает параметр dtypes для concatenate_files: None, 'infer' или словарь {столбец: тип}.
+
+    raises:
+        ValueError: Если значение --dtype не имеет вида COLUMN=TYPE.
+    """
+    if args.typed:
+        return 'infer'
+    if not args.dtype:
+        return None
+
+    schema = {}
+    for item in args.dtype:
+        column, separator, dtype = item.rpartition('=')
+        if not separator or not column or not dtype:
+            raise ValueError(f"Тип столбца должен быть задан в виде COLUMN=TYPE: {item}")
+        schema[column] = dtype
+    return schema
+
+
+def parse_sheets(args: argparse.Namespace):
+    """
+    Возвращает параметр sheets для concatenate_files: None, 'all', список имен страниц или регулярное выражение.
+
+    raises:
+        ValueError: Если регулярное выражение --sheet-regex некорректно.
+    """
+    if args.all_sheets:
+        return 'all'
+    if args.sheet_regex is not None:
+        try:
+            return re.compile(args.sheet_regex)
+        except re.error as e:
+            raise ValueError(f"Некорректное регулярное выражение --sheet-regex: {e}")
+    return args.sheet
+
+
+def parse_size(value: str) -> int:
+    """
+    Преобразует размер вида '1500', '10K', '5M' или '1G' в байты.
+
+    raises:
+        argparse.ArgumentTypeError: Если значение не является размером.
+    """
+    multipliers = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+    value = value.strip().upper().removesuffix('B')
+    multiplier = multipliers.get(value[-1:], 1)
+    try:
+        return int(float(value[:-1] if multiplier != 1 else value) * multiplier)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Некорректный размер: {value}")
+
+
+def expand_inputs(inputs: list, patterns: list = None, **discovery_options) -> list:
+    """
+    Преобразует список файлов, папок и шаблонов путей в отсортированный список файлов.
+
+    params:
+        inputs: Пути к файлам, папкам или шаблоны путей.
+        patterns: Шаблоны имен файлов для отбора файлов в папках.
+        discovery_options: Параметры discover_files для отбора файлов в папках (recursive, exclude,
+            min_size, max_size, modified_after, modified_before).
+    return:
+        Список путей к файлам без повторов в порядке указания входных данных.
+    raises:
+        ValueError: Если путь не существует или шаблон не нашел ни одного файла.
+    """
+    files = []
+    for item in inputs:
+        if os.path.isdir(item):
+            if patterns:
+                # Явно заданные шаблоны могут выбирать файлы с любым расширением
+                discovery_options['extensions'] = ('',)
+            files.extend(discover_files(item, include=patterns, **discovery_options))
+        elif os.path.isfile(item):
+            files.append(item)
+        elif glob.has_magic(item):
+            matches = sorted(path for path in glob.glob(item) if os.path.isfile(path))
+            if not matches:
+                raise ValueError(f"Шаблон не нашел ни одного файла: {item}")
+            files.extend(matches)
+        else:
+            raise ValueError(f"Файл не найден: {item}")
+
+    return list(dict.fromkeys(files))
+
+
+def main(argv: list = None) -> int:
+    """
+    Точка входа командной строки.
+
+    params:
+        argv: Аргументы командной строки (по умолчанию sys.argv[1:]).
+    return:
+        Код завершения: 0 при успехе, 1 при ошибке.
+    """
+    args = build_parser().parse_args(argv)
+
+    deduplicator = None
+    try:
+        files = expand_inputs(args.inputs, args.glob, recursive=args.recursive, exclude=args.exclude,
+                              min_size=args.min_size, max_size=args.max_size,
+                              modified_after=args.modified_after, modified_before=args.modified_before)
+        if not files:
+            raise ValueError("Не найдено ни одного файла для объединения.")
+
+        # pandas и модули обработки загружаются только после разбора аргументов
+        from src.excel_concatenator.files_processing import concatenate_files, concatenate_to_file, save_file
+        from src.excel_concatenator.scheduler import SpilledFrame
+
+        sheets = parse_sheets(args)
+
+        if args.stream or args.incremental:
+            # Потоковый и инкрементальный режимы читают файлы по одному, а CSV - частями движком 'c'
+            if args.workers is not None:
+                raise ValueError("Параметр --workers не поддерживается с --stream и --incremental.")
+            if args.csv_engine not in (None, 'c'):
+                raise ValueError("С --stream и --incremental CSV файлы читаются только движком c.")
+
+        dtypes = parse_dtypes(args)
+        if dtypes is not None and (args.stream or args.incremental):
+            # Согласование типов между файлами требует сведений обо всех блоках до записи результата
+            raise ValueError("Параметры --typed и --dtype не поддерживаются с --stream и --incremental.")
+
+        provenance = None
+        if args.provenance:
+            if args.incremental:
+                # Инкрементальный режим дописывает результат и не обновляет манифест происхождения строк
+                raise ValueError("Параметр --provenance не поддерживается в инкрементальном режиме.")
+            from src.excel_concatenator.provenance import provenance_path
+
+            provenance = provenance_path(args.output)
+
+        fingerprint_store = None
+        if args.skip_duplicates:
+            if args.incremental:
+                raise ValueError("Параметр --skip-duplicates не поддерживается в инкрементальном режиме.")
+            from src.excel_concatenator.fingerprint import FINGERPRINTS_FILE, FingerprintStore
+
+            fingerprint_store = FingerprintStore(os.path.join(args.cache_dir, FINGERPRINTS_FILE)
+                                                 if args.cache_dir else None)
+
+        report = None
+        if args.report:
+            if args.stream or args.incremental:
+                raise ValueError("Параметр --report не поддерживается с --stream и --incremental.")
+            from src.excel_concatenator.instrumentation import RunReport
+
+            report = RunReport()
+
+        if args.memory_budget is not None and (args.stream or args.incremental):
+            raise ValueError("Параметр --memory-budget не поддерживается с --stream и --incremental.")
+
+        xlsx_writer = args.xlsx_writer or 'pandas'
+        if args.memory_budget is not None:
+            # Выгруженный на диск результат записывается в .xlsx только потоково; чтобы вид файла не зависел
+            # от того, пришлось ли выгружать блоки, потоково записывается любой результат с бюджетом памяти
+            if args.xlsx_writer == 'pandas':
+                raise ValueError("Параметр --xlsx-writer pandas не поддерживается с --memory-budget.")
+            xlsx_writer = 'streaming'
+
+        if args.dedup or args.dedup_column or args.dedup_memory is not None:
+            if args.incremental:
+                raise ValueError("Удаление повторяющихся строк не поддерживается в инкрементальном режиме.")
+            from src.excel_concatenator.dedup import RowDeduplicator
+
+            deduplicator = RowDeduplicator(args.dedup_column, memory_bytes=args.dedup_memory,
+                                           spill_dir=args.spill_dir)
+
+        cache = None
+        if args.cache_dir and (args.stream or args.incremental):
+            # Потоковый и инкрементальный режимы не читают файлы из кэша; папка нужна только хешам --skip-duplicates
+            if not args.skip_duplicates:
+                raise ValueError("Кэш прочитанных файлов (--cache-dir) не поддерживается с --stream и --incremental.")
+        elif args.cache_dir:
+            from src.excel_concatenator.cache import ParsedFileCache
+
+            cache = ParsedFileCache(args.cache_dir, max_bytes=args.cache_size_mb * 1024 ** 2,
+                                    use_content_hash=args.cache_content_hash)
+
+        duplicates = []
+        if args.skip_duplicates:
+            from src.excel_concatenator.fingerprint import find_duplicate_files
+            from src.excel_concatenator.instrumentation import stage
+
+            # Копии находятся до объединения, а не внутри него, чтобы итог сообщал, сколько файлов пропущено
+            with stage(report, 'fingerprint'):
+                files, duplicates = find_duplicate_files(files, store=fingerprint_store)
+            if report is not None:
+                for file, original in duplicates:
+                    report.record_duplicate(file, original)
+
+        if args.incremental:
+            if args.align:
+                raise ValueError("Параметр --align не поддерживается в инкрементальном режиме.")
+            if sheets is not None:
+                raise ValueError("Выбор страниц книг не поддерживается в инкрементальном режиме.")
+            from src.excel_concatenator.incremental import incremental_concatenate
+
+            summary = incremental_concatenate(files, args.output, add_filename_column=args.source,
+                                              skip_top_rows=args.skip_top_rows, header_rows=args.header_rows,
+                                              skip_bottom_rows=args.skip_bottom_rows, csv_delimiter=args.delimiter,
+                                              chunk_size=args.chunk_size, excel_engine=args.excel_engine)
+            rows = summary['rows']
+            print(f"Инкрементальный режим ({summary['mode']}): разобрано файлов {summary['parsed']}, "
+                  f"взято из прежнего результата {summary['reused']}, удалено {summary['removed']}",
+                  file=sys.stderr)
+        elif args.stream:
+            rows = concatenate_to_file(files, args.output, add_filename_column=args.source,
+                                       skip_top_rows=args.skip_top_rows, header_rows=args.header_rows,
+                                       skip_bottom_rows=args.skip_bottom_rows, csv_delimiter=args.delimiter,
+                                       chunk_size=args.chunk_size, index=not args.no_index,
+                                       preflight=args.preflight, compression=args.compression,
+                                       row_group_size=args.row_group_size, provenance_path=provenance,
+                                       align_columns=args.align, sheets=sheets,
+                                       excel_engine=args.excel_engine, deduplicator=deduplicator)
+        else:
+            result = concatenate_files(files, add_filename_column=args.source, skip_top_rows=args.skip_top_rows,
+                                       header_rows=args.header_rows, skip_bottom_rows=args.skip_bottom_rows,
+                                       csv_delimiter=args.delimiter,
+                                       workers=1 if args.workers is None else args.workers,
+                                       csv_engine=args.csv_engine or 'python', cache=cache, preflight=args.preflight,
+                                       dtypes=dtypes, provenance_path=provenance,
+                                       align_columns=args.align, report=report, sheets=sheets,
+                                       excel_engine=args.excel_engine, memory_budget=args.memory_budget,
+                                       spill_dir=args.spill_dir, deduplicator=deduplicator)
+            try:
+                save_file(result, args.output, csv_delimiter=args.delimiter, xlsx_writer=xlsx_writer,
+                          index=not args.no_index, compression=args.compression,
+                          row_group_size=args.row_group_size, report=report)
+            finally:
+                # Временные файлы выгруженных блоков удаляются сразу после записи результата
+                if isinstance(result, SpilledFrame):
+                    result.close()
+            rows = len(result)
+            if isinstance(result, SpilledFrame):
+                print(f"Блоков выгружено на диск: {result.spilled_blocks}", file=sys.stderr)
+            if report is not None:
+                report.finish()
+                report.write_json(args.report)
+
+    except Exception as e:
+        print(f"Ошибка: {e}", file=sys.stderr)
+        return 1
+    finally:
+        # Временные файлы хешей строк удаляются и при ошибке
+        if deduplicator is not None:
+            deduplicator.close()
+
+    skipped = f", пропущено одинаковых файлов: {len(duplicates)}" if args.skip_duplicates else ""
+    print(f"Объединено файлов: {len(files)}{skipped}, строк: {rows}. Результат сохранен: {args.output}",
+          file=sys.stderr)
+    if deduplicator is not None:
+        print(f"Удалено повторяющихся строк: {deduplicator.rows_dropped}", file=sys.stderr)
+        for file, dropped in deduplicator.dropped.items():
+            if dropped:
+                print(f"  {dropped:>10}  {file}", file=sys.stderr)
+    if report is not None:
+        print(report.summary(), file=sys.stderr)
+    if cache is not None:
+        stats = cache.stats()
+        print(f"Кэш: попаданий {stats['hits']}, промахов {stats['misses']}, "
+              f"записей {stats['entries']} ({stats['bytes'] / 1024 ** 2:.1f} МБ)", file=sys.stderr)
+    return 0
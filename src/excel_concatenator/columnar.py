@@ -0,0 +1,224 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+# Колоночные форматы Apache Arrow: .feather и .arrow - файловый формат Arrow IPC, .parquet - Apache Parquet
+ARROW_EXTENSIONS = ('.parquet', '.feather', '.arrow')
+
+# Ключ метаданных схемы, в котором хранятся заголовки MultiIndex
+METADATA_KEY = b'excel_concatenator'
+
+# Версия формата метаданных
+METADATA_VERSION = 1
+
+# Имя атрибута DataFrame.attrs: True, если последний столбец - колонка 'Source' из ранее объединенного файла
+SOURCE_ATTR = 'excel_concatenator_source'
+
+
+def read_arrow_file(file_path: str) -> pd.DataFrame:
+    """
+    Читает файл .parquet, .feather или .arrow целиком.
+
+    Если файл записан этим приложением, заголовки MultiIndex восстанавливаются из метаданных схемы,
+    иначе каждый столбец получает заголовок из одного уровня - имени поля.
+
+    params:
+        file_path: Путь к файлу.
+    return:
+        DataFrame с MultiIndex в заголовках.
+    """
+    return next(iter_arrow_chunks(file_path))
+
+
+def iter_arrow_chunks(file_path: str, chunk_size: int = None):
+    """
+    Читает файл .parquet, .feather или .arrow частями по chunk_size строк.
+
+    Parquet читается пакетами по chunk_size строк, файлы Arrow IPC - по записанным пакетам (record batch),
+    которые распаковываются по одному и собираются в части по chunk_size строк. Несжатые файлы Arrow IPC
+    отображаются в память без копирования; сжатый пакет (по умолчанию lz4) распаковывается целиком,
+    поэтому память ограничена размером наибольшего пакета файла.
+
+    params:
+        file_path: Путь к файлу.
+        chunk_size: Количество строк в одной части; при None файл читается одной частью.
+    return:
+        Генератор DataFrame с MultiIndex в заголовках. Всегда возвращает хотя бы одну часть.
+    """
+    import pyarrow as pa
+
+    if os.path.splitext(file_path)[1].lower() == '.parquet':
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(file_path)
+        schema = parquet_file.schema_arrow
+        if chunk_size is None:
+            batches = [parquet_file.read()]
+        else:
+            batches = (pa.Table.from_batches([batch], schema=schema)
+                       for batch in parquet_file.iter_batches(batch_size=chunk_size))
+    else:
+        reader = pa.ipc.open_file(pa.memory_map(file_path))
+        schema = reader.schema
+        batches = [reader.read_all()] if chunk_size is None else _iter_ipc_tables(reader, chunk_size)
+
+    empty = True
+    for batch in batches:
+        empty = False
+        yield _table_to_frame(batch, schema)
+    if empty:
+        yield _table_to_frame(schema.empty_table(), schema)
+
+
+def _iter_ipc_tables(reader, chunk_size: int):
+    """
+    Читает пакеты файла Arrow IPC по одному (reader.get_batch) и возвращает их строки таблицами
+    по chunk_size строк (последняя может быть короче), не распаковывая весь файл сразу.
+    """
+    import pyarrow as pa
+
+    pending, rows = [], 0
+    for index in range(reader.num_record_batches):
+        batch = reader.get_batch(index)
+        pending.append(batch)
+        rows += batch.num_rows
+        while rows >= chunk_size:
+            table = pa.Table.from_batches(pending, schema=reader.schema)
+            yield table.slice(0, chunk_size)
+            rest = table.slice(chunk_size)
+            pending, rows = rest.to_batches(), rest.num_rows
+    if rows:
+        yield pa.Table.from_batches(pending, schema=reader.schema)
+
+
+def read_arrow_headers(file_path: str) -> pd.MultiIndex:
+    """
+    Читает только схему файла .parquet, .feather или .arrow и возвращает его заголовки.
+    """
+    return _columns_from_schema(_read_schema(file_path))[0]
+
+
+def arrow_file_has_source(file_path: str) -> bool:
+    """
+    Проверяет по метаданным схемы, является ли последний столбец файла .parquet, .feather или .arrow
+    колонкой 'Source', добавленной при объединении.
+    """
+    return _columns_from_schema(_read_schema(file_path))[1]
+
+
+def _read_schema(file_path: str):
+    """Читает схему файла .parquet, .feather или .arrow без чтения данных."""
+    import pyarrow as pa
+
+    if os.path.splitext(file_path)[1].lower() == '.parquet':
+        import pyarrow.parquet as pq
+
+        return pq.read_schema(file_path)
+    return pa.ipc.open_file(pa.memory_map(file_path)).schema
+
+
+def frame_to_table(data: pd.DataFrame, schema=None, source_column: bool = False):
+    """
+    Преобразует DataFrame с MultiIndex в заголовках в таблицу pyarrow.
+
+    Имена полей составляются из уровней заголовка через '_', а сами заголовки (включая пустые уровни
+    и имена уровней) сохраняются в метаданных схемы. Столбцы object записываются как строки,
+    поэтому пустые столбцы первой части не фиксируют тип null для последующих частей.
+
+    params:
+        data: DataFrame для записи.
+        schema: Схема ранее записанных частей; если указана, таблица приводится к ней.
+        source_column: True, если последний столбец - колонка 'Source', добавленная при объединении.
+            Признак сохраняется в метаданных схемы (при указанной schema не используется).
+    return:
+        Таблица pyarrow.Table без столбца индекса.
+    """
+    import pyarrow as pa
+
+    columns = data.columns if isinstance(data.columns, pd.MultiIndex) else pd.MultiIndex.from_arrays([data.columns])
+    flat = data.set_axis(_field_names(columns), axis=1)
+    if schema is None:
+        schema = pa.Schema.from_pandas(flat, preserve_index=False)
+        for position, (name, dtype) in enumerate(flat.dtypes.items()):
+            if dtype == object:
+                schema = schema.set(position, pa.field(name, pa.string()))
+            elif isinstance(dtype, pd.CategoricalDtype):
+                # Индексы словаря int32: количество категорий может вырасти в следующих частях
+                value_type = schema.field(position).type.value_type
+                schema = schema.set(position, pa.field(name, pa.dictionary(pa.int32(), value_type)))
+        schema = schema.with_metadata({**(schema.metadata or {}), METADATA_KEY: _encode_metadata(columns, source_column)})
+    return pa.Table.from_pandas(flat, schema=schema, preserve_index=False)
+
+
+def _table_to_frame(table, schema) -> pd.DataFrame:
+    """
+    Преобразует таблицу pyarrow в DataFrame и восстанавливает заголовки из метаданных схемы.
+    """
+    df = table.to_pandas()
+    columns, has_source = _columns_from_schema(schema)
+    df.columns = columns
+    # pyarrow возвращает None для пустых строковых значений, остальные форматы - NaN
+    text_columns = [position for position, dtype in enumerate(df.dtypes) if dtype == object]
+    if text_columns:
+        text = df.iloc[:, text_columns]
+        df.isetitem(text_columns, text.where(text.notna(), np.nan))
+    df.attrs[SOURCE_ATTR] = has_source
+    return df
+
+
+def _columns_from_schema(schema) -> tuple:
+    """
+    Возвращает заголовки MultiIndex и признак колонки 'Source' по схеме таблицы.
+    """
+    metadata = (schema.metadata or {}).get(METADATA_KEY)
+    if metadata is None:
+        return pd.MultiIndex.from_arrays([[str(name) for name in schema.names]]), False
+
+    metadata = json.loads(metadata)
+    tuples = [tuple(np.nan if level is None else level for level in column) for column in metadata['columns']]
+    if tuples:
+        columns = pd.MultiIndex.from_tuples(tuples, names=metadata['names'])
+    else:
+        columns = pd.MultiIndex.from_arrays([[]] * len(metadata['names']), names=metadata['names'])
+    return columns, metadata['source']
+
+
+def _encode_metadata(columns: pd.MultiIndex, source_column: bool) -> bytes:
+    """
+    Кодирует заголовки MultiIndex и признак колонки 'Source' в JSON для метаданных схемы.
+    Пустые уровни (NaN) сохраняются как null.
+    """
+    values = [[None if pd.isna(level) else str(level) for level in column] for column in columns]
+    metadata = {
+        'version': METADATA_VERSION,
+        'columns': values,
+        'names': [None if name is None else str(name) for name in columns.names],
+        'source': bool(source_column) and len(columns) > 0,
+    }
+    return json.dumps(metadata, ensure_ascii=False).encode('utf-8')
+
+
+def column_label(column: tuple) -> str:
+    """
+    Составляет имя столбца из непустых уровней заголовка через '_' (например, ('Итого', 'Сумма') -> 'Итого_Сумма').
+    """
+    return '_'.join(str(level) for level in column if not pd.isna(level) and str(level) != '')
+
+
+def _field_names(columns: pd.MultiIndex) -> list:
+    """
+    Составляет уникальные имена полей из уровней заголовков.
+    """
+    names = []
+    used = set()
+    for position, column in enumerate(columns):
+        name = column_label(column) or f'column_{position + 1}'
+        candidate, suffix = name, 1
+        while candidate in used:
+            candidate = f'{name}.{suffix}'
+            suffix += 1
+        used.add(candidate)
+        names.append(candidate)
+    return names
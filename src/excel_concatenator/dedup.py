@@ -0,0 +1,205 @@
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from src.excel_concatenator.columnar import SOURCE_ATTR, column_label
+
+# Объем памяти под хеши просмотренных строк по умолчанию, после которого они выгружаются на диск
+DEDUP_MEMORY_BYTES = 256 * 1024 ** 2
+
+
+class RowDeduplicator:
+    """
+    Удаление повторяющихся строк по мере объединения файлов.
+
+    Каждая строка блока хешируется векторно (pd.util.hash_pandas_object: 64-битный хеш значений строки
+    по всем столбцам данных или по ключевым столбцам), и строки, хеш которых уже встречался в этом
+    или в предыдущих блоках, удаляются. Остается первое вхождение строки в порядке объединения,
+    а количество удаленных строк учитывается для каждого файла (dropped).
+
+    Хеши просмотренных строк хранятся отсортированными сериями uint64 (8 байт на уникальную строку):
+    новые хеши каждого блока образуют серию, серии близкого размера сливаются, поэтому поиск
+    выполняется np.searchsorted по небольшому числу серий. Если задан memory_bytes, серии в памяти
+    при превышении этого объема сливаются и записываются во временный файл .npy, который затем
+    читается отображением в память.
+
+    Строки сравниваются только по хешам: для n уникальных строк вероятность того, что различные строки
+    получат одинаковый хеш, около n² / 2⁶⁵ (для 10 миллионов строк - порядка 10⁻⁶).
+    """
+
+    def __init__(self, columns: list = None, memory_bytes: int = None, spill_dir: str = None):
+        """
+        params:
+            columns: Ключевые столбцы: кортежи уровней заголовка или строки из непустых уровней через '_'
+                (как в схеме типов). None - все столбцы данных без колонки 'Source'.
+            memory_bytes: Объем хешей в памяти, при превышении которого они выгружаются на диск.
+                None - хеши всегда хранятся в памяти.
+            spill_dir: Папка для временных файлов хешей (по умолчанию - системная временная папка).
+        raises:
+            ValueError: Если список ключевых столбцов пуст или объем памяти не больше нуля.
+        """
+        if columns is not None and not len(columns):
+            raise ValueError("Список ключевых столбцов для удаления повторов пуст.")
+        if memory_bytes is not None and memory_bytes <= 0:
+            raise ValueError("Объем памяти для хешей строк должен быть больше нуля.")
+        self.columns = None if columns is None else [tuple(column) if isinstance(column, (list, tuple)) else column
+                                                     for column in columns]
+        self.memory_bytes = memory_bytes
+        self.spill_dir = spill_dir
+        self.dropped = {}  # Файл -> количество удаленных повторяющихся строк
+        self._runs = []  # Отсортированные серии хешей в памяти, от больших к меньшим
+        self._spilled = []  # Серии хешей, выгруженные на диск и отображенные в память
+        self._directory = None
+
+    @property
+    def rows_dropped(self) -> int:
+        """Общее количество удаленных повторяющихся строк."""
+        return sum(self.dropped.values())
+
+    @property
+    def unique_rows(self) -> int:
+        """Количество различных строк (хешей), просмотренных на данный момент."""
+        return sum(len(run) for run in self._runs) + sum(len(run) for run in self._spilled)
+
+    def drop_duplicates(self, data: pd.DataFrame, file: str = None) -> pd.DataFrame:
+        """
+        Удаляет из блока строки, уже встречавшиеся в нем или в предыдущих блоках, и запоминает хеши новых строк.
+
+        params:
+            data: Блок данных одного файла (или часть файла).
+            file: Путь к файлу, к которому относится блок, для подсчета удаленных строк.
+        return:
+            Блок без повторяющихся строк (тот же объект, если повторов нет). Количество строк страниц
+            в атрибуте attrs со списком страниц книги пересчитывается.
+        raises:
+            ValueError: Если ключевой столбец не найден в блоке.
+        """
+        return take_rows(data, self.new_rows(data, file))
+
+    def new_rows(self, data: pd.DataFrame, file: str = None) -> np.ndarray:
+        """
+        Возвращает позиции строк блока, не встречавшихся в нем или в предыдущих блоках (по возрастанию),
+        и запоминает хеши новых строк (см. drop_duplicates).
+
+        raises:
+            ValueError: Если ключевой столбец не найден в блоке.
+        """
+        hashes = self.hash_rows(data)
+        unique, first = np.unique(hashes, return_index=True)
+        new = ~self._contains(unique)
+        self._add_run(unique[new])
+
+        kept = np.sort(first[new])
+        self.dropped[file] = self.dropped.get(file, 0) + len(data) - len(kept)
+        return kept
+
+    def hash_rows(self, data: pd.DataFrame) -> np.ndarray:
+        """
+        Возвращает 64-битные хеши строк блока по ключевым столбцам.
+
+        raises:
+            ValueError: Если ключевой столбец не найден в блоке.
+        """
+        return pd.util.hash_pandas_object(data.iloc[:, self._key_positions(data)], index=False).to_numpy()
+
+    def close(self) -> None:
+        """Освобождает хеши в памяти и удаляет временные файлы."""
+        self._runs = []
+        self._spilled = []
+        if self._directory is not None:
+            self._directory.cleanup()
+            self._directory = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _key_positions(self, data: pd.DataFrame) -> list:
+        """
+        Возвращает позиции ключевых столбцов блока. Колонка 'Source' ранее объединенного файла не учитывается.
+        """
+        width = data.shape[1] - 1 if data.attrs.get(SOURCE_ATTR) else data.shape[1]
+        if self.columns is None:
+            return list(range(width))
+
+        positions = {}
+        for position, column in enumerate(data.columns[:width]):
+            column = column if isinstance(column, tuple) else (column,)
+            for key in (column, column_label(column)):
+                positions.setdefault(key, position)
+        missing = [str(column) for column in self.columns if column not in positions]
+        if missing:
+            raise ValueError(f"Ключевые столбцы для удаления повторов не найдены: {', '.join(missing)}.")
+        return [positions[column] for column in self.columns]
+
+    def _contains(self, hashes: np.ndarray) -> np.ndarray:
+        """
+        Проверяет для каждого хеша, встречался ли он ранее.
+        """
+        seen = np.zeros(len(hashes), dtype=bool)
+        for run in self._runs + self._spilled:
+            if not len(run):
+                continue
+            positions = np.minimum(np.searchsorted(run, hashes), len(run) - 1)
+            seen |= run[positions] == hashes
+        return seen
+
+    def _add_run(self, run: np.ndarray) -> None:
+        """
+        Добавляет отсортированную серию новых хешей. Последние серии сливаются, пока предыдущая серия
+        не станет больше вдвое, а при превышении memory_bytes серии в памяти выгружаются на диск.
+        """
+        if not len(run):
+            return
+        self._runs.append(run)
+        while len(self._runs) > 1 and len(self._runs[-2]) <= 2 * len(self._runs[-1]):
+            last = self._runs.pop()
+            self._runs[-1] = _merge_runs(self._runs[-1], last)
+
+        if self.memory_bytes is not None and sum(run.nbytes for run in self._runs) > self.memory_bytes:
+            merged = self._runs[0]
+            for run in self._runs[1:]:
+                merged = _merge_runs(merged, run)
+            self._runs = []
+            if self._directory is None:
+                self._directory = tempfile.TemporaryDirectory(prefix='excel_concatenator_', dir=self.spill_dir,
+                                                              ignore_cleanup_errors=True)
+            path = os.path.join(self._directory.name, f'hashes_{len(self._spilled):06d}.npy')
+            np.save(path, merged)
+            self._spilled.append(np.load(path, mmap_mode='r'))
+
+
+
+def take_rows(data: pd.DataFrame, kept: np.ndarray) -> pd.DataFrame:
+    """
+    Возвращает строки блока с позициями kept (тот же объект, если оставлены все строки), пересчитывая
+    количество строк страниц в атрибуте attrs со списком страниц книги.
+    """
+    if len(kept) == len(data):
+        return data
+
+    # Импорт внутри функции: files_processing использует этот модуль
+    from src.excel_concatenator.files_processing import SHEETS_ATTR
+
+    result = data.take(kept).reset_index(drop=True)
+    sheets = data.attrs.get(SHEETS_ATTR)
+    if sheets is not None:
+        # Строки страниц идут подряд: новые границы страниц - количество оставшихся строк до старых границ
+        bounds = np.searchsorted(kept, np.cumsum([rows for _, rows in sheets]))
+        result.attrs[SHEETS_ATTR] = [[sheet, int(rows)] for (sheet, _), rows
+                                      in zip(sheets, np.diff(bounds, prepend=0))]
+    return result
+
+
+def _merge_runs(first: np.ndarray, second: np.ndarray) -> np.ndarray:
+    """
+    Сливает две отсортированные серии хешей без общих значений в одну отсортированную серию.
+    """
+    merged = np.concatenate([first, second])
+    # Устойчивая сортировка (timsort) сливает две упорядоченные серии за линейное время
+    merged.sort(kind='stable')
+    return merged
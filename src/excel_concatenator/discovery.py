@@ -0,0 +1,144 @@
+import fnmatch
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from src.excel_concatenator.utils import SUPPORTED_EXTENSIONS
+
+# Префикс файлов блокировки, которые Office создает рядом с открытым документом (~$отчет.xlsx)
+LOCK_FILE_PREFIX = '~$'
+
+# Количество потоков для чтения папок и метаданных файлов: на сетевых дисках эти вызовы ждут ответа сервера
+DISCOVERY_WORKERS = 16
+
+
+def discover_files(paths, recursive: bool = False, include: list = None, exclude: list = None,
+                   min_size: int = None, max_size: int = None, modified_after=None, modified_before=None,
+                   extensions: tuple = SUPPORTED_EXTENSIONS, workers: int = DISCOVERY_WORKERS) -> list:
+    """
+    Находит входные файлы в папках.
+
+    Папки читаются os.scandir по уровням вложенности: все папки одного уровня и метаданные файлов
+    (для фильтров по размеру и дате изменения) читаются параллельно в пуле потоков. Файлы блокировки
+    Office (~$*.xlsx) и файлы неподдерживаемых форматов пропускаются, а не считаются ошибкой.
+    Папки, которые не удалось прочитать (например, из-за прав доступа), пропускаются.
+
+    params:
+        paths: Путь к папке или файлу либо список таких путей. Явно указанные файлы проверяются
+            только по формату, шаблонам и фильтрам.
+        recursive: Если True, просматриваются и вложенные папки.
+        include: Шаблоны имен файлов (например, '*.xlsx', 'отчет_*'); шаблон с '/' сравнивается с путем
+            относительно папки. По умолчанию отбираются все файлы с расширениями extensions.
+        exclude: Шаблоны имен (или относительных путей) файлов и папок, которые нужно пропустить.
+        min_size: Минимальный размер файла в байтах.
+        max_size: Максимальный размер файла в байтах.
+        modified_after: Файл должен быть изменен не раньше этого момента (datetime или timestamp).
+        modified_before: Файл должен быть изменен не позже этого момента (datetime или timestamp).
+        extensions: Допустимые расширения файлов.
+        workers: Количество потоков для чтения папок и метаданных файлов.
+    return:
+        Отсортированный список путей к файлам без повторов.
+    raises:
+        FileNotFoundError: Если путь не существует.
+    """
+    if isinstance(paths, (str, os.PathLike)):
+        paths = [paths]
+    extensions = tuple(extension.lower() for extension in extensions)
+    modified_after, modified_before = _timestamp(modified_after), _timestamp(modified_before)
+
+    def accepted(name: str, relative: str) -> bool:
+        if name.startswith(LOCK_FILE_PREFIX) or not name.lower().endswith(extensions):
+            return False
+        if include and not _matches(name, relative, include):
+            return False
+        return not (exclude and _matches(name, relative, exclude))
+
+    # Кандидаты: пары (путь, DirEntry или None для явно указанных файлов)
+    candidates = []
+    directories = []
+    for path in paths:
+        path = os.fspath(path)
+        if os.path.isdir(path):
+            directories.append((path, ''))
+        elif os.path.isfile(path):
+            if accepted(os.path.basename(path), os.path.basename(path)):
+                candidates.append((path, None))
+        else:
+            raise FileNotFoundError(f"Путь не найден: {path}")
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        while directories:
+            subdirectories = []
+            for entries in executor.map(_scan_directory, directories):
+                for entry, relative in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        if recursive and not (exclude and _matches(entry.name, relative, exclude)):
+                            subdirectories.append((entry.path, relative))
+                    elif entry.is_file() and accepted(entry.name, relative):
+                        candidates.append((entry.path, entry))
+            directories = subdirectories
+
+        if any(value is not None for value in (min_size, max_size, modified_after, modified_before)):
+            # Метаданные файлов на сетевых дисках читаются отдельным запросом к серверу для каждого файла
+            stats = executor.map(_stat, candidates)
+            candidates = [candidate for candidate, stat in zip(candidates, stats)
+                          if stat is not None and _in_range(stat.st_size, min_size, max_size)
+                          and _in_range(stat.st_mtime, modified_after, modified_before)]
+
+    files = dict.fromkeys(path for path, _ in candidates)
+    return sorted(files, key=_sort_key)
+
+
+def is_supported_file(path: str, extensions: tuple = SUPPORTED_EXTENSIONS) -> bool:
+    """
+    Проверяет, что файл имеет поддерживаемое расширение и не является файлом блокировки Office.
+    """
+    name = os.path.basename(path)
+    return not name.startswith(LOCK_FILE_PREFIX) and name.lower().endswith(tuple(extensions))
+
+
+def _scan_directory(directory: tuple) -> list:
+    """
+    Возвращает элементы папки с путями относительно корневой папки поиска: [(DirEntry, относительный путь)].
+    """
+    path, relative = directory
+    try:
+        with os.scandir(path) as iterator:
+            return [(entry, f'{relative}/{entry.name}' if relative else entry.name) for entry in iterator]
+    except OSError:
+        return []
+
+
+def _stat(candidate: tuple):
+    """
+    Возвращает os.stat_result файла или None, если файл недоступен.
+    """
+    path, entry = candidate
+    try:
+        # В Windows DirEntry.stat() не обращается к диску: метаданные получены вместе со списком файлов
+        return entry.stat() if entry is not None else os.stat(path)
+    except OSError:
+        return None
+
+
+def _matches(name: str, relative: str, patterns: list) -> bool:
+    """
+    Проверяет имя (или относительный путь для шаблонов с '/') на соответствие хотя бы одному шаблону.
+    """
+    return any(fnmatch.fnmatch(relative if '/' in pattern else name, pattern) for pattern in patterns)
+
+
+def _in_range(value: float, low, high) -> bool:
+    return (low is None or value >= low) and (high is None or value <= high)
+
+
+def _timestamp(value):
+    """Преобразует datetime в timestamp; числа и None возвращаются без изменений."""
+    return value.timestamp() if isinstance(value, datetime) else value
+
+
+def _sort_key(path: str) -> tuple:
+    """
+    Ключ сортировки по частям пути: файлы папки идут подряд и порядок не зависит от порядка обхода.
+    """
+    return tuple(os.path.normpath(path).split(os.sep))
@@ -0,0 +1,281 @@
+import importlib.util
+from functools import partial
+
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from src.excel_concatenator.columnar import column_label
+
+# Количество строк каждого файла, по которым определяются типы столбцов
+SAMPLE_ROWS = 10_000
+
+# Текстовый столбец хранится как category, если доля уникальных значений в выборке не больше этого порога
+CATEGORY_MAX_RATIO = 0.5
+
+# Целое число без ведущих нулей: такие значения однозначно восстанавливаются из числа в текст
+INTEGER_PATTERN = r'[+-]?(?:0|[1-9]\d*)'
+
+# Число с ведущими нулями (коды, индексы), которое должно остаться текстом
+LEADING_ZERO_PATTERN = r'[+-]?0\d.*'
+
+# Короткие названия типов, принимаемые в пользовательской схеме
+DTYPE_ALIASES = {
+    'int': 'Int64',
+    'integer': 'Int64',
+    'float': 'float64',
+    'number': 'float64',
+    'date': 'datetime64[ns]',
+    'datetime': 'datetime64[ns]',
+    'category': 'category',
+    'string': 'string',
+    'text': 'string',
+    'str': 'object',
+}
+
+
+def string_dtype():
+    """
+    Тип текстовых столбцов: строки Arrow, если установлен pyarrow, иначе строки pandas.
+    """
+    if importlib.util.find_spec('pyarrow') is not None:
+        return pd.StringDtype('pyarrow')
+    return pd.StringDtype('python')
+
+
+def convert_dtypes(data: pd.DataFrame, dtypes, sample_rows: int = SAMPLE_ROWS) -> pd.DataFrame:
+    """
+    Преобразует столбцы DataFrame, прочитанного как строки, в типизированные столбцы.
+
+    В режиме 'infer' тип каждого столбца определяется по первым sample_rows строкам:
+        - целые числа без ведущих нулей - Int64 (пустые значения - pd.NA);
+        - остальные числа (кроме значений с ведущими нулями, например кодов '007') - float64;
+        - даты и время в формате ISO 8601 (так читаются ячейки дат Excel) - datetime64[ns];
+        - текст с небольшим числом различных значений - category, остальной текст - строки Arrow.
+    Если значение за пределами выборки не соответствует определенному типу, столбец остается текстовым,
+    поэтому значения не теряются.
+
+    params:
+        data: DataFrame со строковыми значениями (как возвращает read_file_excel_formats).
+        dtypes: 'infer' или словарь {столбец: тип}. Столбец задается кортежем уровней заголовка или строкой
+            из непустых уровней через '_'; тип - названием типа pandas или коротким названием
+            ('int', 'float', 'date', 'category', 'string', 'str'). Столбцы, не указанные в словаре,
+            остаются строками.
+        sample_rows: Количество строк для определения типов в режиме 'infer'.
+    return:
+        DataFrame с преобразованными столбцами.
+    raises:
+        ValueError: Если значение не соответствует типу, явно указанному в словаре, или тип неизвестен.
+    """
+    if isinstance(dtypes, str):
+        if dtypes != 'infer':
+            raise ValueError(f"Неподдерживаемый режим типов: {dtypes}")
+        targets = {position: infer_dtype(data.iloc[:sample_rows, position]) for position in range(data.shape[1])}
+        strict = False
+    else:
+        targets = _resolve_schema(data.columns, dtypes)
+        strict = True
+
+    converted = {}
+    for position, dtype in targets.items():
+        column = data.iloc[:, position]
+        if dtype == 'object' or column.dtype != object:
+            continue
+        try:
+            converted[position] = _convert_column(column, dtype)
+        except ValueError as e:
+            if strict:
+                raise ValueError(f"Столбец {_format_column(data.columns[position])}: {e}")
+            converted[position] = column.astype(string_dtype())
+
+    if not converted:
+        return data
+    data = data.copy(deep=False)
+    for position, column in converted.items():
+        data.isetitem(position, column)
+    return data
+
+
+def infer_dtype(sample: pd.Series) -> str:
+    """
+    Определяет тип столбца по выборке строковых значений.
+
+    params:
+        sample: Выборка значений столбца.
+    return:
+        Название типа: 'Int64', 'float64', 'datetime64[ns]', 'category' или 'string'.
+    """
+    values = sample.dropna()
+    if values.empty:
+        return 'string'
+    values = values.astype(str).str.strip()
+
+    numbers = pd.to_numeric(values, errors='coerce')
+    if numbers.notna().all():
+        if values.str.fullmatch(INTEGER_PATTERN).all():
+            return 'Int64'
+        if not values.str.fullmatch(LEADING_ZERO_PATTERN).any():
+            return 'float64'
+
+    elif pd.to_datetime(values, format='ISO8601', errors='coerce').notna().all():
+        return 'datetime64[ns]'
+
+    if len(values) > 1 and values.nunique() <= CATEGORY_MAX_RATIO * len(values):
+        return 'category'
+    return 'string'
+
+
+def reconcile_dtypes(blocks: list, read_text=None) -> list:
+    """
+    Приводит одноименные столбцы всех блоков к общему типу перед объединением.
+
+    - category с разными наборами категорий получают объединенный набор (union_categoricals),
+      чтобы результат остался category;
+    - Int64 и float64 приводятся к float64;
+    - при любом другом расхождении столбец во всех блоках становится текстовым.
+
+    Числа и даты, преобразованные из текста, не хранят исходную запись значений ('1.10' становится 1.1),
+    поэтому при переходе такого столбца в текст его значения берутся из блока, прочитанного без
+    преобразования типов функцией read_text.
+
+    params:
+        blocks: Список DataFrame с типизированными столбцами.
+        read_text: Функция read_text(position), возвращающая блок с номером position в том же виде,
+            но со значениями-строками. None - текст получается из преобразованных значений.
+    return:
+        Список DataFrame с согласованными типами столбцов.
+    """
+    targets = reconcile_targets(blocks)
+    if not targets:
+        return blocks
+    return [cast_block(block, targets, None if read_text is None else partial(read_text, position))
+            for position, block in enumerate(blocks)]
+
+
+def reconcile_targets(blocks: list) -> dict:
+    """
+    Определяет общие типы столбцов, различающихся между блоками (см. reconcile_dtypes).
+
+    Используются только типы столбцов, поэтому вместо блоков можно передать их пустые срезы
+    (block.iloc[:0]): категории хранятся в типе category, а не в значениях.
+
+    params:
+        blocks: Список DataFrame с типизированными столбцами.
+    return:
+        Словарь {столбец: общий тип} для столбцов, которые нужно привести.
+    """
+    if len(blocks) < 2:
+        return {}
+
+    dtypes_by_column = {}
+    for block in blocks:
+        for column, dtype in block.dtypes.items():
+            dtypes_by_column.setdefault(column, []).append(dtype)
+
+    targets = {}
+    for column, dtypes in dtypes_by_column.items():
+        if all(isinstance(dtype, pd.CategoricalDtype) for dtype in dtypes):
+            categories = union_categoricals([block[column] for block in blocks if column in block.columns],
+                                            ignore_order=True).categories
+            if not all(dtype.categories.equals(categories) for dtype in dtypes):
+                targets[column] = pd.CategoricalDtype(categories)
+        elif len({str(dtype) for dtype in dtypes}) > 1:
+            if all(str(dtype) in ('Int64', 'float64') for dtype in dtypes):
+                targets[column] = 'float64'
+            else:
+                targets[column] = string_dtype()
+    return targets
+
+
+def cast_block(block: pd.DataFrame, targets: dict, read_text=None) -> pd.DataFrame:
+    """
+    Приводит столбцы блока к общим типам, определенным reconcile_targets.
+
+    Если столбец чисел или дат становится текстовым, а задана функция read_text(), возвращающая блок
+    со значениями-строками, значения столбца берутся из него (см. reconcile_dtypes).
+    """
+    parsed = [column for column, dtype in targets.items()
+              if column in block.columns and isinstance(dtype, pd.StringDtype) and _is_parsed(block[column].dtype)]
+    text = read_text() if parsed and read_text is not None else None
+    changes = {block.columns.get_loc(column): _cast(text[column] if text is not None and column in parsed
+                                                    else block[column], dtype)
+               for column, dtype in targets.items() if column in block.columns}
+    if not changes:
+        return block
+    block = block.copy(deep=False)
+    for position, column in changes.items():
+        block.isetitem(position, column)
+    return block
+
+
+def _convert_column(column: pd.Series, dtype: str) -> pd.Series:
+    """
+    Преобразует строковый столбец в указанный тип.
+
+    raises:
+        ValueError: Если хотя бы одно непустое значение не удалось преобразовать.
+    """
+    filled = column.notna()
+    if dtype in ('Int64', 'float64') or dtype.startswith('datetime64'):
+        # Строковые операции над строками Arrow выполняются векторно, а не для каждого объекта str
+        text = column.astype(string_dtype()).str.strip()
+    if dtype == 'Int64':
+        # numpy_nullable сразу дает Int64 без промежуточного float64, который теряет точность больших чисел
+        result = pd.to_numeric(text, errors='coerce', dtype_backend='numpy_nullable')
+        failed = filled & (result.isna() | ~text.str.fullmatch(INTEGER_PATTERN, na=False))
+        if not failed.any() and str(result.dtype) != 'Int64':
+            raise ValueError(f"значения выходят за пределы типа {dtype}.")
+    elif dtype == 'float64':
+        result = pd.to_numeric(text, errors='coerce').astype('float64')
+        failed = filled & (result.isna() | text.str.fullmatch(LEADING_ZERO_PATTERN, na=False))
+    elif dtype.startswith('datetime64'):
+        result = pd.to_datetime(text, format='ISO8601', errors='coerce')
+        failed = filled & result.isna()
+    else:
+        return column.astype(string_dtype() if dtype == 'string' else dtype)
+
+    if failed.any():
+        raise ValueError(f"значение '{column[failed].iloc[0]}' не соответствует типу {dtype}.")
+    return result
+
+
+def _is_parsed(dtype) -> bool:
+    """Проверяет, является ли тип столбца числовым или датой, в которые convert_dtypes преобразует текст."""
+    return str(dtype) in ('Int64', 'float64') or str(dtype).startswith('datetime64')
+
+
+def _cast(column: pd.Series, dtype) -> pd.Series:
+    """
+    Приводит столбец к общему типу при согласовании блоков.
+    """
+    if isinstance(dtype, pd.CategoricalDtype):
+        return column.cat.set_categories(dtype.categories)
+    if isinstance(dtype, pd.StringDtype) and isinstance(column.dtype, pd.CategoricalDtype):
+        # Категории приводятся к тексту до разворачивания, чтобы не переводить в текст каждую строку отдельно
+        column = column.cat.rename_categories(column.cat.categories.astype(str))
+    return column.astype(dtype)
+
+
+def _resolve_schema(columns: pd.MultiIndex, schema: dict) -> dict:
+    """
+    Сопоставляет ключи пользовательской схемы с позициями столбцов.
+
+    raises:
+        ValueError: Если тип неизвестен.
+    """
+    positions = {}
+    for position, column in enumerate(columns):
+        for key in (tuple(column), column_label(column)):
+            if key in schema:
+                dtype = schema[key]
+                dtype = DTYPE_ALIASES.get(str(dtype).lower(), dtype)
+                try:
+                    pd.api.types.pandas_dtype(dtype)
+                except TypeError:
+                    raise ValueError(f"Неизвестный тип столбца: {schema[key]}")
+                positions[position] = str(dtype)
+                break
+    return positions
+
+
+def _format_column(column: tuple) -> str:
+    return "'" + (column_label(column) or str(column)) + "'"
@@ -0,0 +1,197 @@
+import os
+import queue
+import threading
+from collections import OrderedDict, deque
+
+# Количество файлов, метаданные которых хранятся в кэше FileMetadataLoader
+METADATA_CACHE_SIZE = 1024
+
+# Размер блока при подсчете строк CSV файла
+COUNT_BLOCK_SIZE = 1 << 20
+
+# Количество файлов, размер и дата изменения которых читаются за один проход фонового потока
+STAT_BATCH_SIZE = 256
+
+
+def read_file_details(file_path: str) -> dict:
+    """
+    Читает сведения о содержимом файла без разбора данных: количество страниц и строк.
+
+    Для книг Excel количество строк - сумма номеров последних строк всех страниц по их размерам,
+    записанным в книге; для CSV - количество строк текста; для .parquet, .feather и .arrow -
+    количество записей по метаданным файла.
+
+    params:
+        file_path: Путь к файлу.
+    return:
+        Словарь {'sheets': количество страниц или None, 'rows': количество строк или None}.
+    raises:
+        ValueError: Если формат файла не поддерживается.
+    """
+    file_extension = os.path.splitext(file_path)[1].lower()
+    if file_extension in ('.xlsx', '.xlsm', '.xltx', '.xltm'):
+        from src.excel_concatenator.xlsx_reader import XlsxReader
+
+        with XlsxReader(file_path) as reader:
+            sheet_names = reader.sheet_names
+            return {'sheets': len(sheet_names), 'rows': sum(reader.sheet_row_count(name) for name in sheet_names)}
+    if file_extension in ('.xls', '.xlt'):
+        import xlrd
+
+        book = xlrd.open_workbook(file_path, on_demand=True)
+        try:
+            return {'sheets': book.nsheets, 'rows': sum(book.sheet_by_index(i).nrows for i in range(book.nsheets))}
+        finally:
+            book.release_resources()
+    if file_extension == '.xlsb':
+        from pyxlsb import open_workbook
+
+        with open_workbook(file_path) as workbook:
+            rows = 0
+            for name in workbook.sheets:
+                with workbook.get_sheet(name) as sheet:
+                    dimension = getattr(sheet, 'dimension', None)
+                    rows += dimension.r + dimension.h if dimension is not None else sum(1 for _ in sheet.rows())
+            return {'sheets': len(workbook.sheets), 'rows': rows}
+    if file_extension == '.csv':
+        return {'sheets': None, 'rows': count_lines(file_path)}
+    if file_extension == '.parquet':
+        import pyarrow.parquet as pq
+
+        return {'sheets': None, 'rows': pq.ParquetFile(file_path).metadata.num_rows}
+    if file_extension in ('.feather', '.arrow'):
+        import pyarrow as pa
+
+        reader = pa.ipc.open_file(pa.memory_map(file_path))
+        return {'sheets': None, 'rows': sum(reader.get_batch(i).num_rows for i in range(reader.num_record_batches))}
+    raise ValueError(f"Неподдерживаемый формат файла: {file_extension}")
+
+
+def count_lines(file_path: str, block_size: int = COUNT_BLOCK_SIZE) -> int:
+    """
+    Подсчитывает строки текстового файла по символам перевода строки, читая файл блоками.
+    Последняя строка без перевода строки тоже учитывается.
+    """
+    count = 0
+    last = b'\n'
+    with open(file_path, 'rb') as handle:
+        while block := handle.read(block_size):
+            count += block.count(b'\n')
+            last = block[-1:]
+    return count + (last != b'\n')
+
+
+class FileMetadataLoader:
+    """
+    Фоновая загрузка метаданных выбранных файлов для списка в окне подтверждения выбора.
+
+    Размер и дата изменения читаются для всех файлов, а количество страниц и строк (read_file_details) -
+    только для файлов, запрошенных request_details (например, видимых в списке строк): каждый новый запрос
+    заменяет предыдущий, поэтому при прокрутке списка не накапливается очередь из уже невидимых файлов.
+    Сведения о содержимом хранятся в кэше на cache_size файлов (ключ - путь, размер и время изменения),
+    поэтому повторное открытие списка не читает файлы заново.
+
+    Все чтения выполняются в одном фоновом потоке; результаты забираются методом poll в потоке окна.
+    """
+
+    def __init__(self, cache_size: int = METADATA_CACHE_SIZE):
+        """
+        params:
+            cache_size: Максимальное количество файлов в кэше сведений о содержимом.
+        """
+        self.cache_size = cache_size
+        self._cache = OrderedDict()  # (путь, размер, время изменения) -> сведения о содержимом
+        self._stats = deque()  # Файлы, размер и дата изменения которых еще не прочитаны
+        self._details = deque()  # Файлы, сведения о содержимом которых запрошены последними
+        self._results = queue.Queue()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._thread = None
+
+    def load_stats(self, paths: list) -> None:
+        """
+        Заменяет очередь чтения размера и даты изменения файлами paths.
+        """
+        with self._lock:
+            self._stats = deque(paths)
+        self._start()
+
+    def request_details(self, paths: list) -> None:
+        """
+        Заменяет очередь чтения количества страниц и строк файлами paths.
+        """
+        with self._lock:
+            self._details = deque(paths)
+        self._start()
+
+    def poll(self) -> list:
+        """
+        Возвращает готовые результаты без ожидания:
+            ('stat', путь, размер, время изменения) - размер и время изменения файла (None, если файл недоступен);
+            ('details', путь, сведения) - словарь read_file_details или {'error': текст ошибки}.
+        """
+        results = []
+        while True:
+            try:
+                results.append(self._results.get_nowait())
+            except queue.Empty:
+                return results
+
+    def close(self) -> None:
+        """Останавливает фоновый поток."""
+        self._closed = True
+        self._wakeup.set()
+
+    def _start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        self._wakeup.set()
+
+    def _run(self) -> None:
+        while not self._closed:
+            with self._lock:
+                details = self._details.popleft() if self._details else None
+                stats = [self._stats.popleft() for _ in range(min(STAT_BATCH_SIZE, len(self._stats)))]
+                if details is None and not stats:
+                    self._wakeup.clear()
+            # Запрошенные сведения о содержимом важнее: они нужны для строк, видимых в списке
+            if details is not None:
+                self._results.put(('details', details, self._load_details(details)))
+            for path in stats:
+                stat = _stat(path)
+                self._results.put(('stat', path, *(stat if stat is not None else (None, None))))
+            if details is None and not stats:
+                self._wakeup.wait()
+
+    def _load_details(self, path: str) -> dict:
+        """
+        Возвращает сведения о содержимом файла из кэша или читает их и сохраняет в кэш.
+        """
+        try:
+            stat = os.stat(path)
+        except OSError as e:
+            return {'error': str(e)}
+        key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+
+        try:
+            details = read_file_details(path)
+        except Exception as e:
+            return {'error': str(e)}
+        self._cache[key] = details
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return details
+
+
+def _stat(path: str):
+    """Возвращает пару (размер, время изменения) файла или None, если файл недоступен."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime
@@ -1,21 +1,99 @@
+import io
 import os
+import re
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from functools import partial
+from xml.etree import ElementTree
 
+import numpy as np
 import pandas as pd
+from pandas._libs.parsers import STR_NA_VALUES
+from pandas.api.types import union_categoricals
+
+from src.excel_concatenator.alignment import ColumnAligner
+from src.excel_concatenator.columnar import (ARROW_EXTENSIONS, SOURCE_ATTR, arrow_file_has_source,
+                                             iter_arrow_chunks, read_arrow_file, read_arrow_headers)
+from src.excel_concatenator.dedup import take_rows
+from src.excel_concatenator.dtypes import cast_block, convert_dtypes, reconcile_dtypes, reconcile_targets
+from src.excel_concatenator.fingerprint import find_duplicate_files
+from src.excel_concatenator.instrumentation import RunReport, peak_memory_bytes, stage
+from src.excel_concatenator.provenance import build_provenance, write_provenance
+from src.excel_concatenator.scheduler import MemoryScheduler, SpilledFrame
+from src.excel_concatenator.writers import (STREAM_WRITER_EXTENSIONS, UNSUPPORTED_FORMAT_MESSAGE, ArrowStreamWriter,
+                                            XlsxStreamWriter, open_stream_writer)
+from src.excel_concatenator.xlsx_reader import SPREADSHEETML_NAMESPACE, XlsxReader, find_workbook_part
+
+# Форматы Office Open XML, в которых список страниц хранится в отдельной части архива
+OOXML_EXTENSIONS = ('.xlsx', '.xlsm', '.xltx', '.xltm')
+
+# Форматы Excel, поддерживаемые read_file_excel_formats
+EXCEL_EXTENSIONS = ('.xlsx', '.xls', '.xlsm', '.xlt', '.xltm', '.xltx', '.xlsb')
+
+# Способы записи .xlsx в save_file
+XLSX_WRITERS = ('pandas', 'streaming')
+
+# Движки чтения CSV: 'python' поддерживает skipfooter напрямую, 'c' и 'pyarrow' значительно быстрее
+CSV_ENGINES = ('python', 'c', 'pyarrow')
+
+# Размер блоков, на которые делится CSV при чтении частями движком 'c': примерное количество байт на строку
+# и границы размера блока в байтах
+CSV_ROW_BYTES = 128
+CSV_MIN_BLOCK_BYTES = 1 << 16
+CSV_MAX_BLOCK_BYTES = 1 << 24
+
+# Движки чтения .xlsx и .xlsm: 'lxml' (XlsxReader) разбирает XML страницы потоково без создания объектов ячеек
+# и возвращает те же данные, что и 'openpyxl'. Остальные форматы Excel читаются движком по расширению файла
+EXCEL_ENGINES = ('openpyxl', 'lxml')
+
+# Имя атрибута DataFrame.attrs со списком [страница, количество строк] для данных нескольких страниц книги
+SHEETS_ATTR = 'excel_concatenator_sheets'
+
+# Количество первых строк данных каждого файла в предварительном просмотре объединения
+PREVIEW_ROWS = 20
+
+
+class ConcatenationCancelled(Exception):
+    """
+    Исключение, возникающее при отмене объединения файлов через cancel_event.
+    """
 
 
 def read_file_excel_formats(file_path: str, skip_top_rows: int = 0, header_rows: int = 1, skip_bottom_rows: int = 0,
-                            csv_delimiter: str = ',') -> pd.DataFrame:
+                            csv_delimiter: str = ',', csv_engine: str = 'python', columns: pd.MultiIndex = None,
+                            dtypes=None, report=None, sheets=None, excel_engine: str = 'openpyxl',
+                            nrows: int = None) -> pd.DataFrame:
     """
     Читает файл по указанному пути в зависимости от его формата и возвращает DataFrame.
-    Поддерживаемые форматы: .xlsx, .xls, .xlsm, .xlsb, .xlt, .xltm, .xltx, .csv
+    Поддерживаемые форматы: .xlsx, .xls, .xlsm, .xlsb, .xlt, .xltm, .xltx, .csv, .parquet, .feather, .arrow
     Формат .xml и другие форматы (ods, txt, prn, dif, slik, xps) пока не реализованы.
 
+    Для форматов .parquet, .feather и .arrow заголовки берутся из схемы файла (заголовки MultiIndex
+    восстанавливаются из метаданных, если файл записан этим приложением), а параметры skip_top_rows,
+    header_rows и skip_bottom_rows не применяются.
+
     params:
         file_path: Путь к файлу.
         skip_top_rows: Количество строк для пропуска сверху.
         header_rows: Количество строк, которые рассматриваются как заголовки.
         skip_bottom_rows: Количество строк для пропуска снизу.
         csv_delimiter: Разделитель для CSV файлов.
+        csv_engine: Движок чтения CSV файлов: 'python', 'c' или 'pyarrow'.
+        columns: Заголовки файла, уже прочитанные read_file_headers. Движки 'c' и 'pyarrow' используют их
+            вместо повторного чтения строк заголовков.
+        dtypes: Типизированное чтение: None - все значения читаются как строки, 'infer' - типы столбцов
+            определяются по выборке, словарь {столбец: тип} - типы задаются явно (см. convert_dtypes).
+        report: Объект RunReport, в который записываются время этапов и параметры чтения файла.
+        sheets: Страницы книги Excel: None - книга должна содержать одну страницу, 'all' - все страницы,
+            список имен или регулярное выражение (re.Pattern, ищется в имени страницы). Все страницы
+            читаются из одного открытия книги с одинаковыми skip_top_rows, header_rows и skip_bottom_rows
+            и объединяются; список [страница, количество строк] сохраняется в атрибуте attrs[SHEETS_ATTR].
+            Для остальных форматов параметр не применяется.
+        excel_engine: Движок чтения файлов .xlsx и .xlsm: 'openpyxl' или 'lxml' (см. XlsxReader).
+        nrows: Количество первых строк данных, которые нужно прочитать (для каждой страницы книги); остальные
+            строки не разбираются. Чтобы не искать конец файла, строки снизу учитываются упреждающим чтением
+            nrows + skip_bottom_rows строк: если файл короче, он перечитывается целиком.
     return:
         DataFrame, содержащий данные из файла.
     raises:
@@ -30,61 +108,71 @@ def read_file_excel_formats(file_path: str, skip_top_rows: int = 0, header_rows:
     # Определение расширения файла
     file_extension = os.path.splitext(file_path)[1].lower()
 
+    if report is not None:
+        started, memory_before = time.perf_counter(), peak_memory_bytes()
+
     try:
-        if file_extension in ['.xlsx', '.xls', '.xlsm', '.xlt', '.xltm', '.xltx', '.xlsb']:
-            # Определение движка для чтения файлов
-            if file_extension in ['.xls', '.xlt']:
-                engine = 'xlrd'
-            elif file_extension == '.xlsb':
-                engine = 'pyxlsb'
-            else:
-                engine = 'openpyxl'
+        if file_extension in EXCEL_EXTENSIONS:
+            with stage(report, 'open'):
+                # Для форматов Office Open XML количество страниц определяется по метаданным книги,
+                # без загрузки данных ячеек
+                sheet_count = None
+                if sheets is None and file_extension in OOXML_EXTENSIONS:
+                    sheet_count = count_workbook_sheets(file_path)
 
-            # Создание объекта ExcelFile для работы с файлами
-            excel_file = pd.ExcelFile(file_path, engine=engine)
+                # Проверка, что в файле только одна страница
+                if sheet_count is not None and sheet_count > 1:
+                    raise ValueError("Файл содержит более одной страницы.")
 
-            # Проверка, что в файле только одна страница
-            if len(excel_file.sheet_names) > 1:
-                raise ValueError("Файл содержит более одной страницы.")
+                # Книга открывается один раз: один и тот же объект используется для проверки и чтения данных
+                excel_file = _open_workbook(file_path, file_extension, excel_engine)
 
-            df = pd.read_excel(
-                file_path,
-                sheet_name=0,
-                skiprows=skip_top_rows,  # Пропуск указанных строк сверху
-                header=list(range(header_rows)),  # Установка заголовков из указанного количества строк
-                skipfooter=skip_bottom_rows,  # Пропуск строк снизу
-                engine=engine,  # Использование указанного движка для чтения
-                dtype=str,  # Принудительное чтение всех данных как строк
-            )
-            # Преобразование всех уровней MultiIndex в строки
-
-            df.columns = pd.MultiIndex.from_tuples([
-                tuple([str(level) for level in column]) if isinstance(column, tuple) else (str(column),)
-                for column in df.columns])
-            # Обеспечиваем уникальность колонок
-            df.columns = pd.MultiIndex.from_tuples(pd.io.common.dedup_names(df.columns, is_potential_multiindex=True))
+            with excel_file:
+                if sheets is not None:
+                    df = _parse_sheets(excel_file, select_sheets(excel_file.sheet_names, sheets), skip_top_rows,
+                                       header_rows, skip_bottom_rows, report, nrows=nrows)
+                else:
+                    if sheet_count is None and len(excel_file.sheet_names) > 1:
+                        raise ValueError("Файл содержит более одной страницы.")
+                    df = _parse_sheet(excel_file, 0, skip_top_rows, header_rows, skip_bottom_rows, report,
+                                      nrows=nrows)
+
+        elif file_extension in ARROW_EXTENSIONS:
+            with stage(report, 'parse'):
+                df = read_arrow_file(file_path) if nrows is None else _head_chunks(
+                    iter_arrow_chunks(file_path, chunk_size=nrows), nrows)
+
+        elif file_extension == '.csv' and csv_engine != 'python':
+            with stage(report, 'parse'):
+                df = _read_csv_fast(file_path, skip_top_rows, header_rows, skip_bottom_rows, csv_delimiter,
+                                    csv_engine, columns=columns, nrows=nrows)
 
         elif file_extension == '.csv':
-            # Чтение CSV файла без заголовков
-            df = pd.read_csv(
-                file_path,
-                skiprows=skip_top_rows,
-                skipfooter=skip_bottom_rows,
-                engine='python',
-                header=None,
-                delimiter=csv_delimiter,
-                dtype=str
-            )
-            # Создание MultiIndex для заголовков
-            headers = [list(df.iloc[i]) for i in range(header_rows)]
-            multi_index = pd.MultiIndex.from_arrays(headers, names=[f'Level_{i + 1}' for i in range(header_rows)])
-            # Назначение MultiIndex в качестве заголовков
-            df.columns = multi_index
-            # Склеивает заголовки
-            # df.columns = ['_'.join(map(str, col)) for col in df.columns]
-            df = df.iloc[header_rows:]
-            # Обеспечиваем уникальность колонок
-            df.columns = pd.MultiIndex.from_tuples(pd.io.common.dedup_names(df.columns, is_potential_multiindex=True))
+            with stage(report, 'parse'):
+                # Чтение CSV файла без заголовков
+                csv_options = dict(skiprows=skip_top_rows, engine='python', header=None, delimiter=csv_delimiter,
+                                   dtype=str)
+                if nrows is None:
+                    df = pd.read_csv(file_path, skipfooter=skip_bottom_rows, **csv_options)
+                else:
+                    # Строки заголовков входят в прочитанные строки
+                    df = _read_window(lambda limit: pd.read_csv(file_path, nrows=limit, **csv_options)
+                                      if limit is not None else
+                                      pd.read_csv(file_path, skipfooter=skip_bottom_rows, **csv_options),
+                                      header_rows + nrows + skip_bottom_rows)
+            with stage(report, 'headers'):
+                # Создание MultiIndex для заголовков
+                headers = [list(df.iloc[i]) for i in range(header_rows)]
+                multi_index = pd.MultiIndex.from_arrays(headers,
+                                                        names=[f'Level_{i + 1}' for i in range(header_rows)])
+                # Назначение MultiIndex в качестве заголовков
+                df.columns = multi_index
+                # Склеивает заголовки
+                # df.columns = ['_'.join(map(str, col)) for col in df.columns]
+                df = df.iloc[header_rows:]
+                # Обеспечиваем уникальность колонок
+                df.columns = pd.MultiIndex.from_tuples(pd.io.common.dedup_names(df.columns,
+                                                                                is_potential_multiindex=True))
 
         # # Чтение XML файлов
         # elif file_extension == '.xml':
@@ -94,15 +182,627 @@ def read_file_excel_formats(file_path: str, skip_top_rows: int = 0, header_rows:
         else:
             raise ValueError(f"Не поддерживаемый формат файла: {file_extension}")
 
+        if dtypes is not None:
+            with stage(report, 'dtypes'):
+                df = convert_dtypes(df, dtypes)
+
     except Exception as e:
         raise RuntimeError(f"Ошибка при чтении файла: {e}")
 
+    if nrows is not None and SHEETS_ATTR not in df.attrs:
+        # Страницы книги уже ограничены nrows строками каждая
+        df = df.iloc[:nrows]
+    df = df.reset_index(drop=True)
+    if report is not None:
+        memory_after = peak_memory_bytes()
+        report.record_file(file_path, time.perf_counter() - started, rows=len(df), columns=df.shape[1],
+                           input_bytes=os.path.getsize(file_path),
+                           engine=_read_engine(file_extension, csv_engine, excel_engine),
+                           memory_delta=None if memory_before is None else memory_after - memory_before)
+
     # Возвращаем DataFrame с прочитанными данными
-    return df.reset_index(drop=True)
+    return df
+
+
+def _parse_sheet(excel_file: pd.ExcelFile, sheet, skip_top_rows: int, header_rows: int, skip_bottom_rows: int,
+                 report=None, nrows: int = None) -> pd.DataFrame:
+    """
+    Читает одну страницу открытой книги и возвращает DataFrame с нормализованными заголовками.
+
+    При заданном nrows страница разбирается только до первых nrows + skip_bottom_rows строк данных
+    (см. _read_window), поэтому строки снизу не попадают в первые nrows строк. Количество столбцов
+    при этом определяют только прочитанные строки, поэтому если по размерам страницы (см. _sheet_width)
+    она шире прочитанного, страница читается целиком, чтобы столбцы совпадали с полным чтением.
+    """
+    parse_options = dict(
+        sheet_name=sheet,
+        skiprows=skip_top_rows,  # Пропуск указанных строк сверху
+        header=list(range(header_rows)),  # Установка заголовков из указанного количества строк
+        dtype=str,  # Принудительное чтение всех данных как строк
+    )
+    with stage(report, 'parse'):
+        if nrows is None:
+            df = excel_file.parse(skipfooter=skip_bottom_rows, **parse_options)  # Пропуск строк снизу
+        else:
+            # Размеры страницы openpyxl сбрасывает при разборе, поэтому они читаются до него
+            width = _sheet_width(excel_file, sheet)
+            df = _read_window(lambda limit: excel_file.parse(nrows=limit, **parse_options) if limit is not None else
+                              excel_file.parse(skipfooter=skip_bottom_rows, **parse_options),
+                              nrows + skip_bottom_rows)
+            if width is not None and df.shape[1] < width:
+                # Строки за пределами прочитанных шире их: лишние столбцы и их заголовки дает только полное чтение
+                df = excel_file.parse(skipfooter=skip_bottom_rows, **parse_options)
+            df = df.iloc[:nrows]
+    with stage(report, 'headers'):
+        df.columns = _normalize_excel_columns(df.columns)
+    return df
+
+
+def _read_window(read, rows: int) -> pd.DataFrame:
+    """
+    Читает начало файла функцией read(limit), разбирающей не более limit строк, так чтобы результат содержал
+    не меньше rows строк, или читает файл целиком вызовом read(None).
+
+    Пустые строки занимают место в окне чтения, но не попадают в результат, поэтому окно увеличивается,
+    пока в нем не окажется rows строк. Если при увеличении окна строк не прибавилось, файл закончился
+    (или дальше следуют только пустые строки), и он читается целиком: строки снизу находятся среди прочитанных.
+    """
+    window, previous = rows, None
+    while True:
+        df = read(window)
+        if len(df) >= rows:
+            return df
+        if len(df) == previous:
+            return read(None)
+        previous, window = len(df), window * 4
+
+
+def _sheet_width(excel_file, sheet):
+    """
+    Возвращает количество столбцов страницы открытой книги по ее размерам, записанным в книге,
+    не читая ячейки, или None, если размеры неизвестны.
+
+    Размеры включают все ячейки страницы (в том числе строки сверху и снизу), поэтому могут быть больше
+    количества столбцов при полном чтении, но не меньше него.
+    """
+    name = excel_file.sheet_names[sheet] if isinstance(sheet, int) else sheet
+    if isinstance(excel_file, XlsxReader):
+        return excel_file.sheet_column_count(name)
+    if excel_file.engine == 'xlrd':
+        return excel_file.book.sheet_by_name(name).ncols
+    if excel_file.engine == 'pyxlsb':
+        with excel_file.book.get_sheet(name) as worksheet:
+            dimension = getattr(worksheet, 'dimension', None)
+            return None if dimension is None else dimension.c + dimension.w
+    if excel_file.engine == 'openpyxl':
+        return excel_file.book[name].max_column
+    return None
+
+
+def _parse_sheets(excel_file: pd.ExcelFile, sheet_names: list, skip_top_rows: int, header_rows: int,
+                  skip_bottom_rows: int, report=None, nrows: int = None) -> pd.DataFrame:
+    """
+    Читает выбранные страницы открытой книги и объединяет их в один DataFrame.
+
+    raises:
+        ValueError: Если заголовки страницы не совпадают с заголовками первой выбранной страницы.
+    """
+    # Движки Excel читают страницы через общий объект книги, который нельзя использовать из нескольких
+    # потоков, поэтому страницы одной книги разбираются последовательно без повторного открытия файла
+    blocks = []
+    for sheet in sheet_names:
+        df = _parse_sheet(excel_file, sheet, skip_top_rows, header_rows, skip_bottom_rows, report, nrows=nrows)
+        if blocks and not df.columns.equals(blocks[0].columns):
+            raise ValueError(f"Заголовки страницы '{sheet}' не совпадают с заголовками страницы '{sheet_names[0]}'.")
+        blocks.append(df)
+
+    with stage(report, 'concat'):
+        df = _combine_blocks(blocks)
+    df.attrs[SHEETS_ATTR] = [[sheet, len(block)] for sheet, block in zip(sheet_names, blocks)]
+    return df
+
+
+def select_sheets(sheet_names: list, sheets) -> list:
+    """
+    Отбирает страницы книги.
+
+    params:
+        sheet_names: Имена страниц книги по порядку.
+        sheets: 'all', список имен или регулярное выражение (re.Pattern), которое ищется в имени страницы.
+    return:
+        Имена выбранных страниц в порядке книги.
+    raises:
+        ValueError: Если указанных страниц нет в книге или ни одна страница не подходит.
+    """
+    if isinstance(sheets, str) and sheets == 'all':
+        selected = list(sheet_names)
+    elif isinstance(sheets, re.Pattern):
+        selected = [name for name in sheet_names if sheets.search(name)]
+    else:
+        missing = [name for name in sheets if name not in sheet_names]
+        if missing:
+            raise ValueError(f"Страницы не найдены: {', '.join(missing)}.")
+        selected = [name for name in sheet_names if name in set(sheets)]
+    if not selected:
+        raise ValueError("В книге нет страниц, подходящих под условие выбора.")
+    return selected
+
+
+def _read_engine(file_extension: str, csv_engine: str, excel_engine: str = 'openpyxl') -> str:
+    """Определяет название движка, которым читается файл, для отчета о выполнении."""
+    if file_extension in EXCEL_EXTENSIONS:
+        return excel_engine if file_extension in OOXML_EXTENSIONS else _excel_engine(file_extension)
+    if file_extension in ARROW_EXTENSIONS:
+        return 'pyarrow'
+    return csv_engine
+
+
+def read_file_headers(file_path: str, skip_top_rows: int = 0, header_rows: int = 1,
+                      csv_delimiter: str = ',', sheets=None) -> pd.MultiIndex:
+    """
+    Читает только строки заголовков файла, не разбирая строки данных.
+
+    Заголовки совпадают с заголовками DataFrame, возвращаемого read_file_excel_formats с теми же параметрами.
+    Для Excel файлов также проверяется, что в файле только одна страница.
+
+    params:
+        file_path: Путь к файлу.
+        skip_top_rows: Количество строк для пропуска сверху.
+        header_rows: Количество строк, которые рассматриваются как заголовки.
+        csv_delimiter: Разделитель для CSV файлов.
+        sheets: Страницы книги Excel (см. read_file_excel_formats); возвращаются заголовки первой выбранной страницы.
+    return:
+        MultiIndex с уникальными заголовками.
+    raises:
+        FileNotFoundError: Если файл не найден.
+        RuntimeError: Если файл имеет неподдерживаемый формат, более одной страницы или произошла ошибка при чтении.
+    """
+    if not os.path.isfile(file_path):
+        raise FileNotFoundError(f"Файл не найден: {file_path}")
+
+    file_extension = os.path.splitext(file_path)[1].lower()
+
+    try:
+        if file_extension in EXCEL_EXTENSIONS:
+            if sheets is None and file_extension in OOXML_EXTENSIONS and count_workbook_sheets(file_path) > 1:
+                raise ValueError("Файл содержит более одной страницы.")
+
+            with pd.ExcelFile(file_path, engine=_excel_engine(file_extension)) as excel_file:
+                sheet = 0
+                if sheets is not None:
+                    sheet = select_sheets(excel_file.sheet_names, sheets)[0]
+                elif file_extension not in OOXML_EXTENSIONS and len(excel_file.sheet_names) > 1:
+                    raise ValueError("Файл содержит более одной страницы.")
+
+                # nrows=0: openpyxl перестает читать строки страницы сразу после заголовков
+                df = excel_file.parse(sheet_name=sheet, skiprows=skip_top_rows, header=list(range(header_rows)),
+                                      nrows=0, dtype=str)
+            return _normalize_excel_columns(df.columns)
+
+        if file_extension == '.csv':
+            return _read_csv_header(file_path, skip_top_rows, header_rows, csv_delimiter)
+
+        if file_extension in ARROW_EXTENSIONS:
+            return read_arrow_headers(file_path)
+
+        raise ValueError(f"Не поддерживаемый формат файла: {file_extension}")
+
+    except Exception as e:
+        raise RuntimeError(f"Ошибка при чтении файла: {e}")
+
+
+def _open_workbook(file_path: str, file_extension: str, excel_engine: str = 'openpyxl'):
+    """
+    Открывает книгу Excel выбранным движком: pd.ExcelFile или XlsxReader с тем же интерфейсом чтения страниц.
+
+    raises:
+        ValueError: Если движок не поддерживается.
+    """
+    if excel_engine not in EXCEL_ENGINES:
+        raise ValueError(f"Неподдерживаемый движок чтения Excel: {excel_engine}")
+    if excel_engine == 'lxml' and file_extension in OOXML_EXTENSIONS:
+        return XlsxReader(file_path)
+    return pd.ExcelFile(file_path, engine=_excel_engine(file_extension))
+
+
+def _excel_engine(file_extension: str) -> str:
+    """Определяет движок pandas для чтения Excel файла по его расширению."""
+    if file_extension in ['.xls', '.xlt']:
+        return 'xlrd'
+    if file_extension == '.xlsb':
+        return 'pyxlsb'
+    return 'openpyxl'
+
+
+def _normalize_excel_columns(columns: pd.Index) -> pd.MultiIndex:
+    """
+    Преобразует заголовки, прочитанные из Excel, в MultiIndex строк с уникальными колонками.
+    """
+    # Преобразование всех уровней MultiIndex в строки
+    columns = pd.MultiIndex.from_tuples([
+        tuple([str(level) for level in column]) if isinstance(column, tuple) else (str(column),)
+        for column in columns])
+    # Обеспечиваем уникальность колонок
+    return pd.MultiIndex.from_tuples(pd.io.common.dedup_names(columns, is_potential_multiindex=True))
+
+
+def _read_csv_fast(file_path: str, skip_top_rows: int, header_rows: int, skip_bottom_rows: int, csv_delimiter: str,
+                   engine: str, columns: pd.MultiIndex = None, nrows: int = None) -> pd.DataFrame:
+    """
+    Читает CSV файл движком 'c' или 'pyarrow', которые не поддерживают skipfooter.
+
+    Заголовки читаются отдельным коротким чтением nrows=header_rows, а строки снизу отсекаются
+    ограничением читаемой части файла: позиция начала нижних строк находится просмотром файла с конца.
+    Результат совпадает с чтением движком 'python', за исключением файлов, в которых значения
+    в кавычках содержат переводы строк внутри пропускаемых нижних строк.
+
+    params:
+        file_path: Путь к CSV файлу.
+        skip_top_rows: Количество строк для пропуска сверху.
+        header_rows: Количество строк заголовков.
+        skip_bottom_rows: Количество строк для пропуска снизу.
+        csv_delimiter: Разделитель CSV.
+        engine: Движок чтения: 'c' или 'pyarrow'.
+        columns: Ранее прочитанные заголовки файла или None.
+        nrows: Количество первых строк данных; файл читается одной частью этого размера движком 'c'.
+    return:
+        DataFrame с MultiIndex в заголовках.
+    raises:
+        ValueError: Если указан неподдерживаемый движок или строки данных шире заголовков.
+    """
+    if engine not in CSV_ENGINES:
+        raise ValueError(f"Неподдерживаемый движок чтения CSV: {engine}")
+
+    return _head_chunks(iter_csv_chunks(file_path, skip_top_rows, header_rows, skip_bottom_rows, csv_delimiter,
+                                        chunk_size=nrows, engine=engine, columns=columns), nrows)
+
+
+def _head_chunks(chunks, nrows: int = None) -> pd.DataFrame:
+    """
+    Собирает из генератора частей файла первые nrows строк (при nrows=None - первую часть)
+    и закрывает генератор вместе с открытым им файлом.
+    """
+    try:
+        blocks = [next(chunks)]
+        while nrows is not None and sum(len(block) for block in blocks) < nrows:
+            blocks.append(next(chunks))
+    except StopIteration:
+        pass
+    finally:
+        chunks.close()
+    return blocks[0] if len(blocks) == 1 else _combine_blocks(blocks).iloc[:nrows]
+
+
+def iter_csv_chunks(file_path: str, skip_top_rows: int = 0, header_rows: int = 1, skip_bottom_rows: int = 0,
+                    csv_delimiter: str = ',', chunk_size: int = None, engine: str = 'c',
+                    columns: pd.MultiIndex = None):
+    """
+    Читает CSV файл частями по chunk_size строк без движка 'python'.
+
+    Каждая часть получает одинаковые заголовки MultiIndex, как при чтении read_file_excel_formats.
+    При chunk_size=None файл читается одной частью.
+
+    params:
+        file_path: Путь к CSV файлу.
+        skip_top_rows: Количество строк для пропуска сверху.
+        header_rows: Количество строк заголовков.
+        skip_bottom_rows: Количество строк для пропуска снизу.
+        csv_delimiter: Разделитель CSV.
+        chunk_size: Количество строк в одной части.
+        engine: Движок чтения: 'c' или 'pyarrow' (pyarrow используется только для чтения одной частью).
+        columns: Ранее прочитанные заголовки файла; если None, они читаются из файла.
+    return:
+        Генератор DataFrame с MultiIndex в заголовках. Всегда возвращает хотя бы одну часть.
+    raises:
+        ValueError: Если строки данных шире заголовков.
+    """
+    if columns is None:
+        columns = _read_csv_header(file_path, skip_top_rows, header_rows, csv_delimiter)
+    data_end = _footer_offset(file_path, skip_bottom_rows) if skip_bottom_rows else None
+    skip_rows = _header_end_line(file_path, skip_top_rows, header_rows)
+
+    def open_source(handle):
+        handle.seek(0)
+        return io.BufferedReader(_BoundedReader(handle, data_end)) if data_end is not None else handle
+
+    with open(file_path, 'rb') as handle:
+        if engine == 'pyarrow' and chunk_size is None:
+            try:
+                df = _set_csv_columns(_read_csv_pyarrow(open_source(handle), skip_rows, csv_delimiter, len(columns)),
+                                      columns)
+            except Exception:
+                # pyarrow не читает файлы без строк данных и строки разной длины - такие файлы читаются движком 'c',
+                # который сообщает о строках шире заголовков так же, как движок 'python'
+                df = None
+            if df is not None:
+                yield df
+                return
+
+        if chunk_size is None:
+            yield _set_csv_columns(_parse_csv_block(open_source(handle), skip_rows, csv_delimiter, len(columns)),
+                                   columns)
+            return
+
+        # Части читаются не итератором pandas (chunksize): он не проверяет ширину первой строки каждой части
+        # и молча отбрасывает ее лишние поля. Вместо этого файл делится на блоки целых строк, каждый блок
+        # разбирается целиком, а строки блоков собираются в части по chunk_size строк
+        source = open_source(handle)
+        for _ in range(skip_rows):
+            source.readline()
+        block_size = min(max(chunk_size * CSV_ROW_BYTES, CSV_MIN_BLOCK_BYTES), CSV_MAX_BLOCK_BYTES)
+        buffered = []
+        rows = 0
+        empty = True
+        line = skip_rows
+        for block in _iter_csv_blocks(source, block_size):
+            data = _parse_csv_block(io.BytesIO(block), 0, csv_delimiter, len(columns), line)
+            line += block.count(b'\n')
+            if len(data):
+                buffered.append(data)
+                rows += len(data)
+            while rows >= chunk_size:
+                data = _combine_blocks(buffered) if len(buffered) > 1 else buffered[0]
+                empty = False
+                yield _set_csv_columns(data.iloc[:chunk_size].reset_index(drop=True), columns)
+                data = data.iloc[chunk_size:]
+                buffered = [data] if len(data) else []
+                rows = len(data)
+        if rows or empty:
+            data = _combine_blocks(buffered) if buffered else pd.DataFrame(columns=range(len(columns)), dtype=object)
+            yield _set_csv_columns(data.reset_index(drop=True), columns)
+
+
+def _read_csv_header(file_path: str, skip_top_rows: int, header_rows: int, csv_delimiter: str) -> pd.MultiIndex:
+    """
+    Читает только строки заголовков CSV файла и возвращает их в виде MultiIndex с уникальными колонками.
+    """
+    # Предварительное чтение только строк заголовков (pyarrow не поддерживает nrows, поэтому используется 'c')
+    headers = pd.read_csv(file_path, skiprows=skip_top_rows, nrows=header_rows, header=None,
+                          delimiter=csv_delimiter, dtype=str, engine='c')
+    multi_index = pd.MultiIndex.from_arrays([list(headers.iloc[i]) for i in range(len(headers))],
+                                            names=[f'Level_{i + 1}' for i in range(len(headers))])
+    # Обеспечиваем уникальность колонок
+    return pd.MultiIndex.from_tuples(pd.io.common.dedup_names(multi_index, is_potential_multiindex=True))
+
+
+def _iter_csv_blocks(source, block_size: int):
+    """
+    Читает поток CSV блоками примерно по block_size байт, каждый из которых состоит из целых строк:
+    блок заканчивается переводом строки вне кавычек или концом потока.
+    """
+    rest = b''
+    while data := source.read(block_size):
+        data = rest + data
+        end = _last_row_end(data)
+        rest = data[end:]
+        if end:
+            yield data[:end]
+    if rest:
+        yield rest
+
+
+def _last_row_end(data: bytes) -> int:
+    """
+    Возвращает позицию после последнего перевода строки вне кавычек (0, если такого нет).
+
+    Блок начинается с начала строки, поэтому перевод строки находится вне кавычек, если перед ним
+    четное количество кавычек (удвоенная кавычка внутри значения четность не меняет).
+    """
+    quotes = data.count(b'"')
+    end = len(data)
+    position = data.rfind(b'\n')
+    while position >= 0:
+        quotes -= data.count(b'"', position, end)
+        if quotes % 2 == 0:
+            return position + 1
+        end = position
+        position = data.rfind(b'\n', 0, position)
+    return 0
+
+
+def _parse_csv_block(source, skip_rows: int, csv_delimiter: str, column_count: int, line: int = 0) -> pd.DataFrame:
+    """
+    Разбирает строки данных CSV движком 'c' одним вызовом read_csv со столбцами 0..column_count-1.
+
+    Строки уже заголовков дополняются пустыми значениями, а о строках шире заголовков сообщается,
+    как при чтении движком 'python', в том числе о пустых лишних полях (разделителе в конце строки).
+    Движок 'c' проверяет ширину всех строк, кроме первой: лишние поля первой строки он превращает
+    в индекс, поэтому индекс, отличный от RangeIndex, означает слишком широкую первую строку.
+
+    params:
+        source: Двоичный поток с содержимым CSV.
+        skip_rows: Количество строк для пропуска сверху.
+        csv_delimiter: Разделитель CSV.
+        column_count: Количество столбцов в заголовках.
+        line: Количество строк файла перед началом потока (для номеров строк в сообщениях об ошибках).
+    return:
+        DataFrame со столбцами 0..column_count-1 и значениями типа str.
+    raises:
+        ValueError: Если строка данных шире заголовков.
+    """
+    try:
+        df = pd.read_csv(source, skiprows=skip_rows, header=None, names=range(column_count), delimiter=csv_delimiter,
+                         dtype=str, engine='c')
+    except pd.errors.EmptyDataError:
+        return pd.DataFrame(columns=range(column_count), dtype=object)
+    except pd.errors.ParserError as e:
+        match = re.search(r'Expected \d+ fields in line (\d+), saw (\d+)', str(e))
+        if match is None:
+            raise
+        raise ValueError(f"Ожидалось {column_count} полей в строке {line + int(match[1])}, "
+                         f"найдено {match[2]}.") from None
+    if not isinstance(df.index, pd.RangeIndex):
+        raise ValueError(f"Ожидалось {column_count} полей, найдено больше в строке {line + skip_rows + 1} "
+                         f"или следующей за ней непустой строке.")
+    return df
+
+
+def _set_csv_columns(df: pd.DataFrame, columns: pd.MultiIndex) -> pd.DataFrame:
+    """
+    Назначает заголовки прочитанной части CSV, дополняя недостающие справа столбцы пустыми значениями.
+    """
+    if len(df.columns) > len(columns):
+        raise ValueError(f"Ожидалось {len(columns)} полей, найдено {len(df.columns)}.")
+    for position in range(len(df.columns), len(columns)):
+        df[position] = pd.Series(np.nan, index=df.index, dtype=object)
+    df.columns = columns
+    return df
+
+
+def _read_csv_pyarrow(source, skip_rows: int, csv_delimiter: str, column_count: int) -> pd.DataFrame:
+    """
+    Читает CSV движком pyarrow, сохраняя значения как строки.
+
+    pandas с engine='pyarrow' сначала определяет типы столбцов и лишь затем приводит их к str
+    (например, '51' превращается в '51.0'), поэтому типы столбцов задаются в pyarrow напрямую.
+
+    params:
+        source: Двоичный поток с содержимым CSV.
+        skip_rows: Количество строк для пропуска сверху.
+        csv_delimiter: Разделитель CSV.
+        column_count: Количество столбцов в заголовках.
+    return:
+        DataFrame со столбцами 0..N-1 и значениями типа str, пустые значения заменены на NaN.
+    """
+    import pyarrow as pa
+    from pyarrow import csv as pa_csv
+
+    table = pa_csv.read_csv(
+        source,
+        read_options=pa_csv.ReadOptions(skip_rows=skip_rows, autogenerate_column_names=True),
+        parse_options=pa_csv.ParseOptions(delimiter=csv_delimiter),
+        convert_options=pa_csv.ConvertOptions(
+            column_types={f'f{i}': pa.string() for i in range(column_count)},
+            null_values=sorted(STR_NA_VALUES),
+            strings_can_be_null=True,
+        ),
+    )
+    df = table.to_pandas()
+    df.columns = range(len(df.columns))
+    # pyarrow возвращает None для пустых значений, остальные движки - NaN
+    return df.where(df.notna(), np.nan)
+
+
+def _header_end_line(file_path: str, skip_top_rows: int, header_rows: int) -> int:
+    """
+    Возвращает номер физической строки файла, следующей за строками заголовков.
+
+    Пустые строки внутри заголовков не считаются строками заголовков, но учитываются
+    при пропуске строк перед данными.
+
+    params:
+        file_path: Путь к файлу.
+        skip_top_rows: Количество строк для пропуска сверху.
+        header_rows: Количество строк заголовков.
+    return:
+        Количество физических строк, которые нужно пропустить перед чтением данных.
+    """
+    line_number = skip_top_rows
+    remaining = header_rows
+    with open(file_path, 'rb') as handle:
+        for index, line in enumerate(handle):
+            if not remaining:
+                break
+            if index < skip_top_rows:
+                continue
+            line_number = index + 1
+            if line.strip():
+                remaining -= 1
+    return line_number
+
+
+def _footer_offset(file_path: str, footer_lines: int, block_size: int = 1 << 16) -> int:
+    """
+    Находит байтовую позицию начала последних footer_lines строк файла, просматривая его с конца.
+
+    Завершающий перевод строки в конце файла не образует отдельной строки, пустые строки
+    учитываются так же, как в skipfooter движка 'python'.
+
+    params:
+        file_path: Путь к файлу.
+        footer_lines: Количество строк снизу.
+        block_size: Размер блока, читаемого за один раз.
+    return:
+        Позиция в байтах, до которой следует читать файл.
+    """
+    with open(file_path, 'rb') as handle:
+        position = handle.seek(0, os.SEEK_END)
+        if position == 0:
+            return 0
+
+        # Завершающий перевод строки относится к последней строке
+        handle.seek(position - 1)
+        if handle.read(1) == b'\n':
+            position -= 1
+
+        remaining = footer_lines
+        while position > 0:
+            start = max(0, position - block_size)
+            handle.seek(start)
+            block = handle.read(position - start)
+            index = len(block)
+            while remaining:
+                index = block.rfind(b'\n', 0, index)
+                if index < 0:
+                    break
+                remaining -= 1
+            if not remaining:
+                return start + index + 1
+            position = start
+    return 0
+
+
+class _BoundedReader(io.RawIOBase):
+    """
+    Поток только для чтения, ограничивающий двоичный файл первыми limit байтами.
+    """
+
+    def __init__(self, handle, limit: int):
+        self.handle = handle
+        self.remaining = limit
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        size = min(len(buffer), self.remaining)
+        if size <= 0:
+            return 0
+        count = self.handle.readinto(memoryview(buffer)[:size])
+        self.remaining -= count
+        return count
+
+
+def count_workbook_sheets(file_path: str) -> int:
+    """
+    Возвращает количество страниц в книге формата Office Open XML (.xlsx, .xlsm, .xltx, .xltm).
+
+    Читается только часть архива workbook.xml со списком страниц, данные ячеек не загружаются.
+
+    params:
+        file_path: Путь к файлу книги.
+    return:
+        Количество страниц в книге.
+    raises:
+        ValueError: Если файл не является корректным архивом Office Open XML.
+    """
+    try:
+        with zipfile.ZipFile(file_path) as archive:
+            workbook_part = find_workbook_part(archive)
+            with archive.open(workbook_part) as workbook:
+                return sum(1 for _, element in ElementTree.iterparse(workbook)
+                           if element.tag == f'{{{SPREADSHEETML_NAMESPACE}}}sheet')
+    except (zipfile.BadZipFile, KeyError, ElementTree.ParseError) as e:
+        raise ValueError(f"Не удалось прочитать структуру книги: {e}")
 
 
 def concatenate_files(files: list, add_filename_column: bool = False, skip_top_rows: int = 0, header_rows: int = 1,
-                      skip_bottom_rows: int = 0, csv_delimiter: str = ';') -> pd.DataFrame:
+                      skip_bottom_rows: int = 0, csv_delimiter: str = ';', workers: int = 1,
+                      csv_engine: str = 'python', progress_callback=None, cancel_event=None,
+                      cache=None, preflight: bool = False, dtypes=None, provenance_path: str = None,
+                      align_columns: str = None, report=None, skip_duplicate_files: bool = False,
+                      fingerprint_store=None, sheets=None, excel_engine: str = 'openpyxl',
+                      memory_budget: int = None, spill_dir: str = None, deduplicator=None) -> pd.DataFrame:
     """
     Объединяет несколько файлов в один DataFrame.
 
@@ -111,60 +811,904 @@ def concatenate_files(files: list, add_filename_column: bool = False, skip_top_r
 
     params:
         files: Список путей к файлам для объединения.
-        add_filename_column: Если True, добавляет колонку 'Source' с именем файла.
+        add_filename_column: Если True, добавляет колонку 'Source' с именем файла. Колонка имеет тип category:
+            имя каждого файла хранится один раз, а строки содержат только его код.
         skip_top_rows: Количество строк для пропуска сверху каждого файла.
         header_rows: Количество строк, рассматриваемых как заголовки в каждом файле.
         skip_bottom_rows: Количество строк для пропуска снизу каждого файла.
         csv_delimiter: Разделитель для CSV файлов (по умолчанию ';').
+        workers: Количество процессов для параллельного чтения файлов. При значении 1 файлы читаются
+            последовательно в текущем процессе.
+        csv_engine: Движок чтения CSV файлов: 'python', 'c' или 'pyarrow'.
+        progress_callback: Функция progress_callback(files_done, files_total, rows_done), вызываемая
+            после обработки каждого файла.
+        cancel_event: Объект threading.Event; если он установлен, объединение прерывается перед чтением
+            следующего файла.
+        cache: Объект ParsedFileCache для повторного использования ранее прочитанных файлов.
+        preflight: Если True, перед чтением данных заголовки всех файлов читаются и сверяются функцией
+            check_headers, а прочитанные заголовки повторно используются при чтении данных.
+        dtypes: Типизированное чтение: None - все значения читаются как строки, 'infer' - типы столбцов
+            определяются по выборке каждого файла, словарь {столбец: тип} - типы задаются явно.
+            Типы одноименных столбцов разных файлов согласуются перед объединением (см. reconcile_dtypes);
+            если столбец чисел или дат становится текстовым, файлы, в которых он был преобразован, читаются
+            повторно без преобразования типов, чтобы сохранить исходную запись значений.
+        provenance_path: Путь к JSON манифесту происхождения строк (файл, первая и последняя строка, SHA-256),
+            который записывается после объединения. Может использоваться вместо колонки 'Source'.
+        align_columns: Сопоставление столбцов по заголовкам: None - столбцы объединяются как есть,
+            'strict' - состав столбцов должен совпадать с первым файлом, но порядок может отличаться,
+            'union' - все столбцы всех файлов, 'intersection' - только общие столбцы (см. ColumnAligner).
+        report: Объект RunReport, в который записываются время и параметры чтения каждого файла
+            и суммарное время этапов объединения.
+        skip_duplicate_files: Если True, побайтно одинаковые файлы находятся до разбора (см. find_duplicate_files)
+            и объединяется только первый из них; пропущенные файлы записываются в report.
+        fingerprint_store: Объект FingerprintStore для повторного использования хешей файлов между запусками.
+        sheets: Страницы книг Excel: None - каждая книга должна содержать одну страницу, 'all' - все страницы,
+            список имен или регулярное выражение (см. read_file_excel_formats). Колонка 'Source' строк
+            таких книг содержит 'файл:страница'.
+        excel_engine: Движок чтения файлов .xlsx и .xlsm: 'openpyxl' или 'lxml'.
+        memory_budget: Бюджет памяти в байтах (см. MemoryScheduler, требуется pyarrow). Файлы читаются
+            параллельно, только пока оценка их размера в памяти укладывается в бюджет, а при приближении
+            накопленных блоков к бюджету они выгружаются во временные файлы. Выгруженный результат записывается
+            в .xlsx только способом 'streaming', поэтому, чтобы вид .xlsx файла не зависел от выгрузки, результат
+            с бюджетом памяти следует сохранять с xlsx_writer='streaming'. None - без ограничения.
+        spill_dir: Папка для временных файлов выгруженных блоков (по умолчанию - системная временная папка).
+        deduplicator: Объект RowDeduplicator: повторяющиеся строки удаляются из каждого блока сразу после чтения
+            файла, а количество удаленных строк каждого файла сохраняется в deduplicator.dropped. При
+            сопоставлении столбцов блоки приводятся к общим заголовкам до удаления повторов, поэтому заголовки
+            всех файлов читаются заранее. При типизированном чтении значения сравниваются с типами,
+            определенными для каждого файла до согласования типов.
     return:
-        DataFrame, содержащий объединённые данные из всех файлов.
+        DataFrame, содержащий объединённые данные из всех файлов. Если при memory_budget часть блоков была
+        выгружена на диск, возвращается SpilledFrame, который записывается функцией save_file потоково.
+        Атрибут attrs результата отмечает добавленную колонку 'Source' (см. SOURCE_ATTR).
     raises:
-        ValueError: Если произошла ошибка при обработке одного из файлов.
+        ValueError: Если произошла ошибка при обработке одного из файлов или заголовки файлов не совпадают.
+        ConcatenationCancelled: Если объединение отменено через cancel_event.
     """
 
-    # Инициализация пустого DataFrame для хранения результатов
-    concatenation_result = pd.DataFrame()
+    if skip_duplicate_files:
+        files = _skip_duplicates(files, fingerprint_store, report)
+
+    # Прочитанные блоки накапливаются в списке и объединяются один раз в конце,
+    # чтобы не копировать уже накопленные строки при добавлении каждого нового файла
+    headers = None
+    if preflight:
+        # При сопоставлении столбцов заголовки сверяются ColumnAligner, а не на полное совпадение
+        with stage(report, 'preflight'):
+            headers = check_headers(files, skip_top_rows=skip_top_rows, header_rows=header_rows,
+                                    csv_delimiter=csv_delimiter, workers=workers, cancel_event=cancel_event,
+                                    compare=align_columns is None, sheets=sheets)
+
+    early_aligner = None
+    if deduplicator is not None and align_columns is not None:
+        # Хеши строк зависят от порядка столбцов, поэтому блоки сопоставляются до удаления повторов
+        with stage(report, 'preflight'):
+            if headers is None:
+                headers = check_headers(files, skip_top_rows=skip_top_rows, header_rows=header_rows,
+                                        csv_delimiter=csv_delimiter, workers=workers, cancel_event=cancel_event,
+                                        compare=False, sheets=sheets)
+            early_aligner = ColumnAligner(align_columns, [_header_data_columns(file, columns)
+                                                          for file, columns in zip(files, headers)], names=files)
+        # Блоки уже приведены к общим заголовкам, после чтения они не сопоставляются повторно
+        align_columns = None
+
+    scheduler = MemoryScheduler(memory_budget) if memory_budget is not None else None
+    spilled = None
+    prototypes = []  # Пустые срезы всех блоков: заголовки и типы столбцов выгруженных блоков
+    blocks = []
+    row_counts = []
+    sources = []  # Значения колонки 'Source' каждого блока
+    kept_rows = {}  # Номер блока -> позиции строк, оставшихся после удаления повторов (при типизированном чтении)
     expected_columns = None
-    for file in files:
+    rows_done = 0
+    for file, data in _read_files(files, workers=workers, cancel_event=cancel_event, cache=cache, headers=headers,
+                                  report=report, scheduler=scheduler, skip_top_rows=skip_top_rows,
+                                  header_rows=header_rows,
+                                  skip_bottom_rows=skip_bottom_rows, csv_delimiter=csv_delimiter,
+                                  csv_engine=csv_engine, dtypes=dtypes, sheets=sheets,
+                                  excel_engine=excel_engine):
         try:
-            # Чтение файла с использованием функции read_file_excel_formats
-            data = read_file_excel_formats(
-                file_path=file,
-                skip_top_rows=skip_top_rows,
-                header_rows=header_rows,
-                skip_bottom_rows=skip_bottom_rows,
-                csv_delimiter=csv_delimiter
-            )
-
             if expected_columns is None:
-                expected_columns = len(data.columns[0])
+                expected_columns = data.columns.nlevels
             else:
-                if len(data.columns[0]) != expected_columns:
+                if data.columns.nlevels != expected_columns:
                     raise ValueError(
-                        f"Несоответствие столбцов в заголовках ({len(data.columns[0])}) не соответствует предыдущим ({expected_columns}).")
+                        f"Несоответствие столбцов в заголовках ({data.columns.nlevels}) не соответствует предыдущим ({expected_columns}).")
+
+            if early_aligner is not None:
+                with stage(report, 'align'):
+                    data = _align_block(early_aligner, data)
+            if deduplicator is not None:
+                with stage(report, 'dedup'):
+                    kept = deduplicator.new_rows(data, file)
+                    if dtypes is not None and len(kept) < len(data):
+                        # Те же строки берутся из текста файла, если столбец станет текстовым (см. _read_text_block)
+                        kept_rows[len(row_counts)] = kept
+                    data = take_rows(data, kept)
+                if report is not None:
+                    report.record_dropped_rows(file, deduplicator.dropped[file])
 
-            # Если необходимо, добавляем колонку с именем файла
+            # Колонка с именем файла добавляется после объединения блоков, здесь сохраняются только ее значения
             if add_filename_column:
-                data['Source'] = os.path.basename(file)
+                data, source = _split_source(data, file)
+                sources.append(source)
 
-            # Объединяем текущий DataFrame с результатом
-            concatenation_result = pd.concat([concatenation_result.reset_index(drop=True), data.reset_index(drop=True)],
-                                             ignore_index=True)
+            blocks.append(data)
+            row_counts.append(len(data))
 
         except Exception as e:
             raise ValueError(f"Ошибка при обработке файла {file}: {e}")
 
-    return concatenation_result.reset_index(drop=True)
+        rows_done += len(data)
+        if progress_callback is not None:
+            progress_callback(len(row_counts), len(files), rows_done)
+
+        if scheduler is not None:
+            # Копия, чтобы пустой срез не удерживал в памяти массивы выгружаемого блока
+            prototypes.append(data.iloc[:0].copy())
+            if scheduler.should_spill():
+                with stage(report, 'spill'):
+                    spilled = _spill_blocks(spilled, blocks, scheduler, spill_dir)
+                blocks = []
+
+    # Текст файла читается повторно, только если столбец, преобразованный в числа или даты, становится текстовым
+    text_block = partial(_read_text_block, files, headers, kept_rows, early_aligner, add_filename_column,
+                         dict(skip_top_rows=skip_top_rows, header_rows=header_rows, skip_bottom_rows=skip_bottom_rows,
+                              csv_delimiter=csv_delimiter, csv_engine=csv_engine, sheets=sheets,
+                              excel_engine=excel_engine))
+    if spilled is not None:
+        spilled.extend(blocks)
+        spilled.transform = _spilled_transform(prototypes, sources, files, align_columns, dtypes, text_block)
+        spilled.source_column = bool(sources)
+        if provenance_path is not None:
+            with stage(report, 'provenance'):
+                write_provenance(provenance_path, build_provenance(files, row_counts))
+        return spilled
+
+    aligner = None
+    if align_columns is not None:
+        with stage(report, 'align'):
+            aligner = ColumnAligner(align_columns, [_data_columns(block) for block in blocks], names=files)
+            for position, block in enumerate(blocks):
+                blocks[position] = _align_block(aligner, block)
+    if dtypes is not None:
+        with stage(report, 'reconcile'):
+            blocks = reconcile_dtypes(blocks, partial(text_block, aligner))
+    with stage(report, 'concat'):
+        result = _combine_blocks(blocks)
+
+    if sources:
+        with stage(report, 'source'):
+            # Категории объединяются один раз для всего результата: строки хранят коды, а не копии имен файлов
+            result['Source'] = union_categoricals(sources)
+    # Признак добавленной колонки 'Source' сохраняется save_file в метаданных колоночных форматов
+    result.attrs[SOURCE_ATTR] = bool(sources)
+    if provenance_path is not None:
+        with stage(report, 'provenance'):
+            write_provenance(provenance_path, build_provenance(files, row_counts))
+    return result
+
+
+def _spill_blocks(spilled, blocks: list, scheduler: MemoryScheduler, spill_dir: str) -> SpilledFrame:
+    """
+    Выгружает накопленные блоки во временные файлы и освобождает их размер в планировщике.
+
+    raises:
+        ValueError: Если блоки не удалось записать на диск.
+    """
+    if spilled is None:
+        spilled = SpilledFrame(spill_dir)
+    try:
+        spilled.spill(blocks)
+    except Exception as e:
+        spilled.close()
+        raise ValueError(f"Не удалось выгрузить прочитанные данные на диск: {e}")
+    scheduler.release(scheduler.held_bytes)
+    return spilled
+
 
+def _spilled_transform(prototypes: list, sources: list, files: list, align_columns: str, dtypes, text_block):
+    """
+    Возвращает функцию transform(position, block) для SpilledFrame: сопоставление столбцов, согласование типов
+    и колонка 'Source' применяются к каждому блоку при записи так же, как к блокам в памяти в concatenate_files.
+    Сведения обо всех блоках берутся из их пустых срезов, а текст столбцов, ставших текстовыми, -
+    из функции text_block(aligner, position) (см. _read_text_block).
+    """
+    aligner = None
+    if align_columns is not None:
+        aligner = ColumnAligner(align_columns, [_data_columns(block) for block in prototypes], names=files)
+        prototypes = [_align_block(aligner, block) for block in prototypes]
+    targets = reconcile_targets(prototypes) if dtypes is not None else {}
+    # Столбцы и типы результата: при объединении в памяти блоки с разными столбцами дополняются пустыми
+    result = _combine_blocks([cast_block(block, targets) for block in prototypes])
+    categories = union_categoricals(sources).categories if sources else None
+    return partial(_finalize_block, aligner, targets, result, sources, categories, partial(text_block, aligner))
+
+
+def _finalize_block(aligner, targets: dict, result: pd.DataFrame, sources: list, categories, read_text,
+                    position: int, block: pd.DataFrame) -> pd.DataFrame:
+    """
+    Приводит выгруженный блок к виду соответствующей части результата concatenate_files.
+    """
+    if aligner is not None:
+        block = _align_block(aligner, block)
+    block = cast_block(block, targets, partial(read_text, position))
+    if not block.columns.equals(result.columns):
+        missing = ~result.columns.isin(block.columns)
+        block = block.reindex(columns=result.columns)
+        for column in np.flatnonzero(missing):
+            block.isetitem(column, block.iloc[:, column].astype(result.dtypes.iloc[column]))
+    if sources:
+        block = block.copy(deep=False)
+        block['Source'] = sources[position].set_categories(categories)
+    return block
 
-def save_file(data: pd.DataFrame, save_path: str, csv_delimiter: str = ';') -> None:
+
+def _read_text_block(files: list, headers: list, kept_rows: dict, early_aligner, add_filename_column: bool,
+                     read_options: dict, aligner, position: int) -> pd.DataFrame:
+    """
+    Перечитывает файл блока position без преобразования типов и приводит его к виду блока в concatenate_files:
+    те же сопоставление столбцов, строки, оставшиеся после удаления повторов, и отделение колонки 'Source'.
+    """
+    data = read_file_excel_formats(files[position], columns=None if headers is None else headers[position],
+                                   **read_options)
+    if early_aligner is not None:
+        data = _align_block(early_aligner, data)
+    if position in kept_rows:
+        data = take_rows(data, kept_rows[position])
+    if add_filename_column:
+        data = _split_source(data, files[position])[0]
+    if aligner is not None:
+        data = _align_block(aligner, data)
+    return data
+
+
+def add_source_column(data: pd.DataFrame, file: str, categories: list = None) -> None:
+    """
+    Добавляет колонку 'Source' с именем файла типа category.
+
+    Файлы .parquet, .feather и .arrow, полученные ранее объединением с колонкой 'Source', уже содержат
+    ее последним столбцом; в них сохраняются исходные имена файлов.
+
+    params:
+        data: DataFrame, в который добавляется колонка.
+        file: Путь к файлу.
+        categories: Имена всех объединяемых файлов. Общий набор категорий для всех частей позволяет
+            записывать колонку в колоночные форматы единым словарем. Значения 'файл:страница' для книг,
+            прочитанных с несколькими страницами, добавляются в этот список.
+    """
+    if data.attrs.get(SOURCE_ATTR):
+        return
+    names, counts = _source_names(data, file)
+    categories = categories if categories is not None else []
+    categories.extend(name for name in names if name not in categories)
+    codes = np.array([categories.index(name) for name in names], dtype=np.int32)
+    data['Source'] = pd.Categorical.from_codes(np.repeat(codes, counts), categories=categories)
+
+
+def _source_names(data: pd.DataFrame, file: str) -> tuple:
+    """
+    Возвращает значения колонки 'Source' блока и количество строк каждого значения:
+    имя файла или 'файл:страница' для каждой страницы книги.
+    """
+    name = os.path.basename(file)
+    sheets = data.attrs.get(SHEETS_ATTR)
+    if sheets is None:
+        return [name], [len(data)]
+    return [f'{name}:{sheet}' for sheet, _ in sheets], [rows for _, rows in sheets]
+
+
+def _split_source(data: pd.DataFrame, file: str) -> tuple:
+    """
+    Возвращает блок без колонки 'Source' и значения этой колонки для блока в виде Categorical.
+    """
+    if data.attrs.get(SOURCE_ATTR):
+        # Колонка 'Source' ранее объединенного файла - последний столбец; у оставшихся столбцов ее нет
+        source = pd.Categorical(data.iloc[:, -1])
+        data = data.iloc[:, :-1]
+        data.attrs[SOURCE_ATTR] = False
+        return data, source
+    names, counts = _source_names(data, file)
+    codes = np.repeat(np.arange(len(names), dtype=np.int32), counts)
+    return data, pd.Categorical.from_codes(codes, categories=list(dict.fromkeys(names)))
+
+
+def _skip_duplicates(files: list, fingerprint_store, report) -> list:
+    """
+    Возвращает файлы без побайтных копий и записывает пропущенные копии в отчет.
+    """
+    with stage(report, 'fingerprint'):
+        files, duplicates = find_duplicate_files(files, store=fingerprint_store)
+    if report is not None:
+        for file, original in duplicates:
+            report.record_duplicate(file, original)
+    return files
+
+
+def _data_columns(data: pd.DataFrame) -> pd.Index:
+    """
+    Возвращает заголовки столбцов данных без колонки 'Source' ранее объединенного файла.
     """
-    Сохраняет DataFrame в файл формата .xlsx или .csv, в зависимости от расширения указанного пути.
+    return data.columns[:-1] if data.attrs.get(SOURCE_ATTR) else data.columns
+
+
+def _align_block(aligner: ColumnAligner, data: pd.DataFrame) -> pd.DataFrame:
+    """
+    Приводит столбцы данных к общим заголовкам; колонка 'Source' ранее объединенного файла остается последней.
+    """
+    if not data.attrs.get(SOURCE_ATTR):
+        return aligner.align(data)
+    aligned = aligner.align(data.iloc[:, :-1])
+    aligned.insert(len(aligned.columns), data.columns[-1], data.iloc[:, -1])
+    aligned.attrs[SOURCE_ATTR] = True
+    return aligned
+
+
+def _read_files(files: list, workers: int = 1, cancel_event=None, cache=None, headers: list = None, report=None,
+                scheduler=None, **read_options):
+    """
+    Читает файлы функцией read_file_excel_formats и возвращает результаты в исходном порядке.
+
+    При workers > 1 файлы читаются в пуле процессов. Ошибка любого из процессов прерывает
+    чтение сразу, не дожидаясь обработки предшествующих файлов, а оставшиеся задачи отменяются.
+
+    params:
+        files: Список путей к файлам.
+        workers: Количество процессов для чтения.
+        cancel_event: Объект threading.Event для отмены чтения.
+        cache: Объект ParsedFileCache; файлы, найденные в кэше, не разбираются повторно.
+        headers: Список ранее прочитанных заголовков файлов (в порядке files) или None.
+        report: Объект RunReport; при параллельном чтении каждый процесс собирает свой отчет,
+            который добавляется к общему.
+        scheduler: Объект MemoryScheduler; при параллельном чтении очередной файл ставится в пул,
+            только пока оценка его размера укладывается в бюджет памяти. Размер каждого прочитанного
+            файла учитывается в планировщике до его выдачи.
+        read_options: Параметры, передаваемые в read_file_excel_formats.
+    return:
+        Генератор пар (путь к файлу, DataFrame).
+    raises:
+        ValueError: Если произошла ошибка при чтении одного из файлов.
+        ConcatenationCancelled: Если чтение отменено через cancel_event.
+    """
+    # Заголовки не входят в ключ кэша: они однозначно определяются файлом и параметрами чтения
+    if headers is None:
+        headers = [None] * len(files)
+
+    if workers is None or workers <= 1 or len(files) <= 1:
+        for file, columns in zip(files, headers):
+            _check_cancelled(cancel_event)
+            try:
+                data = _cache_get(cache, file, read_options, report)
+                if data is None:
+                    data = read_file_excel_formats(file, columns=columns, report=report, **read_options)
+                    _cache_put(cache, file, read_options, data)
+            except Exception as e:
+                raise ValueError(f"Ошибка при обработке файла {file}: {e}")
+            if scheduler is not None:
+                scheduler.record(file, data)
+            yield file, data
+        return
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(files))) as executor:
+        futures = []
+        cached = []
+        reserved = []  # Оценка размера каждого поставленного файла, зарезервированная в scheduler
+
+        def submit(file, columns):
+            reserved.append(scheduler.reserve(file) if scheduler is not None else 0)
+            data = _cache_get(cache, file, read_options, report)
+            cached.append(data is not None)
+            if data is None and report is not None:
+                futures.append(executor.submit(_read_file_reported, file, columns=columns, **read_options))
+            elif data is None:
+                futures.append(executor.submit(read_file_excel_formats, file, columns=columns, **read_options))
+            else:
+                # Результат из кэша оформляется как завершенная задача, чтобы сохранить общий порядок выдачи
+                futures.append(Future())
+                futures[-1].set_result(data)
+
+        try:
+            for index in range(len(files)):
+                # Файлы ставятся в пул заранее, пока их оценка укладывается в бюджет памяти;
+                # текущий файл ставится всегда, если он еще не поставлен
+                while len(futures) < len(files) and (len(futures) <= index or scheduler is None
+                                                     or scheduler.can_admit(files[len(futures)])):
+                    submit(files[len(futures)], headers[len(futures)])
+                future = futures[index]
+                _check_cancelled(cancel_event)
+                while True:
+                    # Проверяем ошибки во всех оставшихся задачах, а не только в текущей
+                    failed = next((i for i in range(index, len(futures))
+                                   if futures[i].done() and futures[i].exception() is not None), None)
+                    if failed is not None:
+                        raise ValueError(f"Ошибка при обработке файла {files[failed]}: {futures[failed].exception()}")
+                    if future.done():
+                        break
+                    _check_cancelled(cancel_event)
+                    # При возможной отмене ожидание периодически прерывается для проверки cancel_event
+                    wait(futures[index:], timeout=None if cancel_event is None else 0.2,
+                         return_when=FIRST_COMPLETED)
+
+                data = future.result()
+                if not cached[index] and report is not None:
+                    data, file_report = data
+                    report.merge(file_report)
+                if not cached[index]:
+                    _cache_put(cache, files[index], read_options, data)
+                if scheduler is not None:
+                    scheduler.record(files[index], data, reserved=reserved[index])
+                # Выданный результат больше не удерживается списком задач
+                futures[index] = None
+                yield files[index], data
+        finally:
+            # Отменяем еще не начатые задачи при ошибке или досрочном завершении
+            for future in futures:
+                if future is not None:
+                    future.cancel()
+
+
+def _read_file_reported(file_path: str, **read_options) -> tuple:
+    """
+    Читает файл в процессе пула и возвращает пару (DataFrame, RunReport чтения этого файла).
+    """
+    file_report = RunReport()
+    return read_file_excel_formats(file_path, report=file_report, **read_options), file_report
+
+
+def check_headers(files: list, skip_top_rows: int = 0, header_rows: int = 1, csv_delimiter: str = ';',
+                  workers: int = 1, cancel_event=None, compare: bool = True, sheets=None) -> list:
+    """
+    Предварительная проверка: читает только заголовки всех файлов и сверяет их с заголовками первого файла.
+
+    Сравниваются заголовки целиком (количество строк заголовков, количество и названия столбцов),
+    а ошибки всех файлов собираются в одно сообщение, чтобы исправить их до долгого чтения данных.
+
+    params:
+        files: Список путей к файлам.
+        skip_top_rows: Количество строк для пропуска сверху каждого файла.
+        header_rows: Количество строк, рассматриваемых как заголовки в каждом файле.
+        csv_delimiter: Разделитель для CSV файлов.
+        workers: Количество процессов для параллельного чтения заголовков.
+        cancel_event: Объект threading.Event для отмены проверки.
+        compare: Если False, заголовки только читаются, а сверку выполняет вызывающий код
+            (например, ColumnAligner при сопоставлении столбцов).
+        sheets: Страницы книг Excel (см. read_file_excel_formats); сверяются заголовки первой выбранной страницы.
+    return:
+        Список заголовков (MultiIndex) в порядке files для повторного использования при чтении данных.
+    raises:
+        ValueError: Если заголовки хотя бы одного файла не удалось прочитать или они не совпадают.
+        ConcatenationCancelled: Если проверка отменена через cancel_event.
+    """
+    read_headers = partial(_read_headers_safe, skip_top_rows=skip_top_rows, header_rows=header_rows,
+                           csv_delimiter=csv_delimiter, sheets=sheets)
+    results = []
+    if workers is None or workers <= 1 or len(files) <= 1:
+        for file in files:
+            _check_cancelled(cancel_event)
+            results.append(read_headers(file))
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(files))) as executor:
+            # Чтение заголовков занимает мало времени, поэтому файлы передаются процессам пачками
+            chunksize = max(1, len(files) // (workers * 4))
+            for result in executor.map(read_headers, files, chunksize=chunksize):
+                _check_cancelled(cancel_event)
+                results.append(result)
+
+    reference_file, reference = next(((file, columns) for file, (columns, _) in zip(files, results)
+                                      if columns is not None), (None, None))
+    problems = []
+    for file, (columns, error) in zip(files, results):
+        if error is not None:
+            problems.append(f"{file}: {error}")
+        elif compare and not columns.equals(reference):
+            problems.append(f"{file}: {_describe_header_mismatch(columns, reference)}")
+
+    if problems:
+        raise ValueError(f"Проверка заголовков не пройдена для файлов: {len(problems)} из {len(files)} "
+                         f"(заголовки сверяются с файлом {reference_file}).\n" + "\n".join(problems))
+    return [columns for columns, _ in results]
+
+
+def _read_headers_safe(file_path: str, **options) -> tuple:
+    """
+    Читает заголовки файла и возвращает пару (заголовки, None) или (None, сообщение об ошибке).
+    """
+    try:
+        return read_file_headers(file_path, **options), None
+    except Exception as e:
+        return None, str(e)
+
+
+def _describe_header_mismatch(columns: pd.MultiIndex, reference: pd.MultiIndex) -> str:
+    """
+    Описывает первое отличие заголовков файла от образца.
+    """
+    if columns.nlevels != reference.nlevels:
+        return f"строк заголовков {columns.nlevels}, ожидалось {reference.nlevels}."
+    if len(columns) != len(reference):
+        return f"столбцов {len(columns)}, ожидалось {len(reference)}."
+    for position, (column, expected) in enumerate(zip(columns, reference)):
+        if not pd.MultiIndex.from_tuples([column]).equals(pd.MultiIndex.from_tuples([expected])):
+            return (f"столбец {position + 1} называется {_format_column(column)}, "
+                    f"ожидалось {_format_column(expected)}.")
+    return "заголовки не совпадают."
+
+
+def _format_column(column: tuple) -> str:
+    return "'" + " / ".join('' if pd.isna(level) else str(level) for level in column) + "'"
+
+
+def preview_files(files: list, rows: int = PREVIEW_ROWS, add_filename_column: bool = False, skip_top_rows: int = 0,
+                  header_rows: int = 1, skip_bottom_rows: int = 0, csv_delimiter: str = ';', workers: int = 1,
+                  cancel_event=None, cache=None, align_columns: str = None, sheets=None,
+                  excel_engine: str = 'openpyxl') -> tuple:
+    """
+    Предварительный просмотр объединения: читает только первые rows строк данных каждого файла
+    (read_file_excel_formats с nrows) и объединяет их так же, как concatenate_files.
+
+    Позволяет проверить пропуск строк и количество строк заголовков до полного чтения файлов. Заголовки
+    каждого файла сверяются с заголовками первого прочитанного файла, а все ошибки чтения и несовпадения
+    заголовков собираются в список. Файлы, которые объединение с теми же параметрами не приняло бы
+    (ошибка чтения, другое количество строк заголовков, несовпадение при сопоставлении столбцов),
+    в образец не включаются; файлы с другими заголовками без align_columns включаются, как при объединении.
+    Проблемы, которые проявляются только в непрочитанных строках (например, строка CSV шире заголовков
+    дальше первых rows строк), образец не обнаруживает: отсутствие проблем в списке предварительное.
+
+    params:
+        files: Список путей к файлам.
+        rows: Количество первых строк данных каждого файла (каждой выбранной страницы книги).
+        add_filename_column: Если True, образец содержит колонку 'Source' с именем файла.
+        skip_top_rows: Количество строк для пропуска сверху каждого файла.
+        header_rows: Количество строк, рассматриваемых как заголовки в каждом файле.
+        skip_bottom_rows: Количество строк для пропуска снизу каждого файла.
+        csv_delimiter: Разделитель для CSV файлов.
+        workers: Количество процессов для параллельного чтения файлов.
+        cancel_event: Объект threading.Event для отмены просмотра.
+        cache: Объект MemoryFileCache или ParsedFileCache; количество строк rows входит в ключ записи,
+            поэтому повторный просмотр с теми же параметрами не читает файлы.
+        align_columns: Сопоставление столбцов по заголовкам (см. concatenate_files).
+        sheets: Страницы книг Excel (см. concatenate_files).
+        excel_engine: Движок чтения файлов .xlsx и .xlsm: 'openpyxl' или 'lxml'.
+    return:
+        Кортеж (DataFrame образца объединения, список пар (файл, описание проблемы) в порядке files).
+    raises:
+        ValueError: Если rows меньше 1.
+        ConcatenationCancelled: Если просмотр отменен через cancel_event.
+    """
+    if rows < 1:
+        raise ValueError("Количество строк предварительного просмотра должно быть больше нуля.")
+
+    read_options = dict(skip_top_rows=skip_top_rows, header_rows=header_rows, skip_bottom_rows=skip_bottom_rows,
+                        csv_delimiter=csv_delimiter, sheets=sheets, excel_engine=excel_engine, nrows=rows)
+    results = {}
+    for file in files:
+        _check_cancelled(cancel_event)
+        data = _cache_get(cache, file, read_options)
+        if data is not None:
+            results[file] = data, None
+    remaining = [file for file in dict.fromkeys(files) if file not in results]
+
+    read_preview = partial(_read_preview_safe, **read_options)
+    if workers is None or workers <= 1 or len(remaining) <= 1:
+        for file in remaining:
+            _check_cancelled(cancel_event)
+            results[file] = read_preview(file)
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(remaining))) as executor:
+            chunksize = max(1, len(remaining) // (workers * 4))
+            for file, result in zip(remaining, executor.map(read_preview, remaining, chunksize=chunksize)):
+                _check_cancelled(cancel_event)
+                results[file] = result
+    for file in remaining:
+        if results[file][0] is not None:
+            _cache_put(cache, file, read_options, results[file][0])
+
+    problems = []
+    accepted = []
+    reference = None
+    for file in files:
+        data, error = results[file]
+        if error is not None:
+            problems.append((file, error))
+            continue
+        columns = _data_columns(data)
+        if reference is None:
+            reference = columns
+        elif align_columns is not None:
+            try:
+                # Сопоставление с первым файлом повторяет проверки ColumnAligner для всего набора файлов
+                ColumnAligner(align_columns, [reference, columns])
+            except ValueError as e:
+                problems.append((file, str(e).rpartition('\n')[2].removeprefix('№2: ')))
+                continue
+        elif not columns.equals(reference):
+            problems.append((file, _describe_header_mismatch(columns, reference)))
+            if columns.nlevels != reference.nlevels:
+                continue
+        accepted.append((file, data))
+
+    blocks = []
+    sources = []
+    for file, data in accepted:
+        if add_filename_column:
+            data, source = _split_source(data, file)
+            sources.append(source)
+        blocks.append(data)
+    if align_columns is not None and blocks:
+        aligner = ColumnAligner(align_columns, [_data_columns(block) for block in blocks])
+        blocks = [_align_block(aligner, block) for block in blocks]
+    result = _combine_blocks(blocks)
+    if sources:
+        result['Source'] = union_categoricals(sources)
+    return result, problems
+
+
+def _read_preview_safe(file_path: str, **read_options) -> tuple:
+    """
+    Читает первые строки файла и возвращает пару (DataFrame, None) или (None, сообщение об ошибке).
+    """
+    try:
+        return read_file_excel_formats(file_path, **read_options), None
+    except Exception as e:
+        return None, str(e)
+
+
+def _cache_get(cache, file: str, read_options: dict, report=None):
+    """
+    Возвращает DataFrame из кэша или None. Ошибки доступа к исходному файлу оставляются для чтения файла.
+    """
+    if cache is None:
+        return None
+    started = time.perf_counter()
+    try:
+        data = cache.get(file, read_options)
+    except OSError:
+        data = None
+    if report is not None:
+        seconds = time.perf_counter() - started
+        report.add_stage('cache', seconds)
+        if data is not None:
+            report.record_file(file, seconds, rows=len(data), columns=data.shape[1],
+                               input_bytes=os.path.getsize(file), engine='cache')
+    return data
+
+
+def _cache_put(cache, file: str, read_options: dict, data: pd.DataFrame) -> None:
+    """
+    Сохраняет прочитанный DataFrame в кэш, если кэш используется.
+    """
+    if cache is not None:
+        cache.put(file, read_options, data)
+
+
+def _check_cancelled(cancel_event) -> None:
+    """
+    Прерывает обработку, если установлен cancel_event.
+
+    raises:
+        ConcatenationCancelled: Если объединение отменено.
+    """
+    if cancel_event is not None and cancel_event.is_set():
+        raise ConcatenationCancelled("Объединение файлов отменено.")
+
+
+def concatenate_to_file(files: list, save_path: str, add_filename_column: bool = False, skip_top_rows: int = 0,
+                        header_rows: int = 1, skip_bottom_rows: int = 0, csv_delimiter: str = ';',
+                        chunk_size: int = 100_000, index: bool = True, progress_callback=None,
+                        cancel_event=None, preflight: bool = False, compression: str = None,
+                        row_group_size: int = None, provenance_path: str = None, align_columns: str = None,
+                        skip_duplicate_files: bool = False, fingerprint_store=None, sheets=None,
+                        excel_engine: str = 'openpyxl', deduplicator=None) -> int:
+    """
+    Объединяет несколько файлов и записывает результат сразу в выходной файл, не собирая его в памяти.
+
+    Каждый файл (а CSV файлы - частями по chunk_size строк) читается, сверяется с заголовками первого
+    файла, получает колонку 'Source' и дописывается в выходной файл до чтения следующей части.
+    Пиковое потребление памяти ограничено размером наибольшей части, а не всего набора данных.
+    CSV файлы читаются движком 'c'. При ошибке частично записанный выходной файл удаляется.
+
+    params:
+        files: Список путей к файлам для объединения.
+        save_path: Путь к выходному файлу с расширением .xlsx, .csv, .parquet, .feather или .arrow.
+        add_filename_column: Если True, добавляет колонку 'Source' с именем файла.
+        skip_top_rows: Количество строк для пропуска сверху каждого файла.
+        header_rows: Количество строк, рассматриваемых как заголовки в каждом файле.
+        skip_bottom_rows: Количество строк для пропуска снизу каждого файла.
+        csv_delimiter: Разделитель для входных и выходного CSV файлов.
+        chunk_size: Количество строк в одной части при чтении CSV файлов.
+        index: Если False, столбец индекса не записывается.
+        progress_callback: Функция progress_callback(files_done, files_total, rows_done), вызываемая
+            после записи каждой части.
+        cancel_event: Объект threading.Event; если он установлен, объединение прерывается перед чтением
+            следующей части, а частично записанный файл удаляется.
+        preflight: Если True, до создания выходного файла заголовки всех файлов сверяются функцией check_headers.
+        compression: Сжатие для форматов .parquet, .feather и .arrow.
+        row_group_size: Максимальное количество строк в группе строк для форматов .parquet, .feather и .arrow.
+        provenance_path: Путь к JSON манифесту происхождения строк (файл, первая и последняя строка, SHA-256).
+        align_columns: Сопоставление столбцов по заголовкам: 'strict', 'union' или 'intersection'
+            (см. concatenate_files). Общие заголовки определяются до создания выходного файла по заголовкам
+            всех файлов, поэтому включает предварительное чтение заголовков.
+        skip_duplicate_files: Если True, из побайтно одинаковых файлов записывается только первый.
+        fingerprint_store: Объект FingerprintStore для повторного использования хешей файлов между запусками.
+        sheets: Страницы книг Excel (см. concatenate_files). Все выбранные страницы книги читаются
+            за одно открытие файла и записываются одной частью.
+        excel_engine: Движок чтения файлов .xlsx и .xlsm: 'openpyxl' или 'lxml'.
+        deduplicator: Объект RowDeduplicator: повторяющиеся строки удаляются из каждой части перед записью
+            (см. concatenate_files).
+    return:
+        Количество записанных строк данных.
+    raises:
+        ValueError: Если формат выходного файла не поддерживается, произошла ошибка при обработке файла
+            или заголовки файлов не совпадают.
+        ConcatenationCancelled: Если объединение отменено через cancel_event.
+    """
+    if skip_duplicate_files:
+        files = _skip_duplicates(files, fingerprint_store, None)
+
+    headers = [None] * len(files)
+    aligner = None
+    if preflight or align_columns is not None:
+        headers = check_headers(files, skip_top_rows=skip_top_rows, header_rows=header_rows,
+                                csv_delimiter=csv_delimiter, cancel_event=cancel_event,
+                                compare=align_columns is None, sheets=sheets)
+    if align_columns is not None:
+        aligner = ColumnAligner(align_columns, [_header_data_columns(file, columns)
+                                                for file, columns in zip(files, headers)], names=files)
+
+    writer = open_stream_writer(save_path, csv_delimiter=csv_delimiter, index=index, compression=compression,
+                                row_group_size=row_group_size, source_column=add_filename_column)
+    # Общий набор категорий колонки 'Source' для всех частей; значения 'файл:страница' добавляются по мере чтения книг
+    source_categories = [] if sheets is not None else list(dict.fromkeys(os.path.basename(file) for file in files))
+    row_counts = []
+    try:
+        with writer:
+            expected_columns = None
+            for files_done, (file, columns) in enumerate(zip(files, headers)):
+                _check_cancelled(cancel_event)
+                rows_before = writer.rows_written
+                try:
+                    for data in iter_file_chunks(file, skip_top_rows=skip_top_rows, header_rows=header_rows,
+                                                 skip_bottom_rows=skip_bottom_rows, csv_delimiter=csv_delimiter,
+                                                 chunk_size=chunk_size, columns=columns, sheets=sheets,
+                                                 excel_engine=excel_engine):
+                        _check_cancelled(cancel_event)
+                        if aligner is not None:
+                            data = _align_block(aligner, data)
+                        # Колонка 'Source' ранее объединенного файла не участвует в сверке заголовков
+                        data_columns = _data_columns(data)
+                        if expected_columns is None:
+                            expected_columns = data_columns
+                        elif not data_columns.equals(expected_columns):
+                            raise ValueError("Заголовки файла не совпадают с заголовками первого файла.")
+
+                        if deduplicator is not None:
+                            data = deduplicator.drop_duplicates(data, file)
+                        if add_filename_column:
+                            add_source_column(data, file, categories=source_categories)
+
+                        writer.write(data)
+                        if progress_callback is not None:
+                            progress_callback(files_done, len(files), writer.rows_written)
+
+                except ConcatenationCancelled:
+                    raise
+                except Exception as e:
+                    raise ValueError(f"Ошибка при обработке файла {file}: {e}")
+
+                row_counts.append(writer.rows_written - rows_before)
+                if progress_callback is not None:
+                    progress_callback(files_done + 1, len(files), writer.rows_written)
+    except BaseException:
+        # Частично записанный файл не является корректным результатом
+        if os.path.exists(save_path):
+            os.remove(save_path)
+        raise
+
+    if provenance_path is not None:
+        write_provenance(provenance_path, build_provenance(files, row_counts))
+    return writer.rows_written
+
+
+def _header_data_columns(file_path: str, columns: pd.MultiIndex) -> pd.MultiIndex:
+    """
+    Возвращает заголовки файла, прочитанные read_file_headers, без колонки 'Source' ранее объединенного файла.
+    """
+    # Признак колонки 'Source' сохраняется только в метаданных колоночных форматов
+    if os.path.splitext(file_path)[1].lower() in ARROW_EXTENSIONS and len(columns) and arrow_file_has_source(file_path):
+        return columns[:-1]
+    return columns
+
+
+def iter_file_chunks(file_path: str, skip_top_rows: int = 0, header_rows: int = 1, skip_bottom_rows: int = 0,
+                     csv_delimiter: str = ',', chunk_size: int = None, columns: pd.MultiIndex = None, sheets=None,
+                     excel_engine: str = 'openpyxl'):
+    """
+    Читает файл частями: CSV, .parquet, .feather и .arrow файлы - по chunk_size строк, остальные форматы - целиком.
+    CSV файлы всегда читаются движком 'c' (iter_csv_chunks); строки шире заголовков, в том числе в начале
+    очередной части, приводят к ошибке, как и при чтении движком 'python'.
+
+    params:
+        file_path: Путь к файлу.
+        skip_top_rows: Количество строк для пропуска сверху.
+        header_rows: Количество строк заголовков.
+        skip_bottom_rows: Количество строк для пропуска снизу.
+        csv_delimiter: Разделитель для CSV файлов.
+        chunk_size: Количество строк в одной части CSV файла.
+        columns: Заголовки файла, уже прочитанные read_file_headers (используются для CSV файлов).
+        sheets: Страницы книги Excel (см. read_file_excel_formats).
+        excel_engine: Движок чтения файлов .xlsx и .xlsm: 'openpyxl' или 'lxml'.
+    return:
+        Генератор DataFrame с MultiIndex в заголовках.
+    raises:
+        FileNotFoundError: Если файл не найден.
+        RuntimeError: Если произошла ошибка при чтении файла.
+    """
+    file_extension = os.path.splitext(file_path)[1].lower()
+    if file_extension != '.csv' and file_extension not in ARROW_EXTENSIONS:
+        yield read_file_excel_formats(file_path, skip_top_rows=skip_top_rows, header_rows=header_rows,
+                                      skip_bottom_rows=skip_bottom_rows, csv_delimiter=csv_delimiter, sheets=sheets,
+                                      excel_engine=excel_engine)
+        return
+
+    if not os.path.isfile(file_path):
+        raise FileNotFoundError(f"Файл не найден: {file_path}")
+
+    if file_extension in ARROW_EXTENSIONS:
+        chunks = iter_arrow_chunks(file_path, chunk_size=chunk_size)
+    else:
+        chunks = iter_csv_chunks(file_path, skip_top_rows=skip_top_rows, header_rows=header_rows,
+                                 skip_bottom_rows=skip_bottom_rows, csv_delimiter=csv_delimiter,
+                                 chunk_size=chunk_size, columns=columns)
+    while True:
+        try:
+            data = next(chunks)
+        except StopIteration:
+            return
+        except Exception as e:
+            raise RuntimeError(f"Ошибка при чтении файла: {e}")
+        yield data
+
+
+def _combine_blocks(blocks: list) -> pd.DataFrame:
+    """
+    Объединяет накопленные блоки в один DataFrame за одну операцию.
+
+    Каждая строка копируется ровно один раз, поэтому стоимость объединения линейна
+    по суммарному количеству строк, а не квадратична по количеству файлов.
+
+    params:
+        blocks: Список DataFrame в порядке следования файлов.
+    return:
+        DataFrame с непрерывным индексом, начиная с 0.
+    """
+    if not blocks:
+        return pd.DataFrame()
+
+    return pd.concat(blocks, ignore_index=True, copy=False)
+
+
+def save_file(data: pd.DataFrame, save_path: str, csv_delimiter: str = ';', xlsx_writer: str = 'pandas',
+              index: bool = True, compression: str = None, row_group_size: int = None, report=None) -> None:
+    """
+    Сохраняет DataFrame в файл формата .xlsx, .csv, .parquet, .feather или .arrow,
+    в зависимости от расширения указанного пути.
 
     param:
-        data: DataFrame, содержащий данные для сохранения.
-        save_path: Строка с полным путем и именем файла, включая расширение (.xlsx или .csv).
+        data: DataFrame, содержащий данные для сохранения, или SpilledFrame, полученный от concatenate_files
+            с бюджетом памяти. SpilledFrame записывается потоково по одному блоку, .xlsx - всегда способом 'streaming'
+            (без пустой строки под заголовками, которую записывает способ 'pandas'). Признак колонки 'Source',
+            добавленной concatenate_files (attrs результата), сохраняется в метаданных колоночных форматов.
+        save_path: Строка с полным путем и именем файла, включая расширение
+            (.xlsx, .csv, .parquet, .feather или .arrow).
         csv_delimiter: Явно указывает разделитель, при сохранении в формате csv.
+        xlsx_writer: Способ записи .xlsx: 'pandas' (DataFrame.to_excel) или 'streaming' - потоковая запись
+            с постоянным потреблением памяти и переходом на новую страницу при превышении лимита строк Excel.
+        index: Если False, столбец индекса не записывается. Для форматов .parquet, .feather и .arrow
+            столбец индекса не записывается никогда.
+        compression: Сжатие для форматов .parquet ('snappy' по умолчанию, 'zstd', 'gzip', 'none' и др.),
+            .feather и .arrow ('lz4' по умолчанию, 'zstd', 'none').
+        row_group_size: Максимальное количество строк в группе строк для форматов .parquet, .feather и .arrow.
+        report: Объект RunReport, в который записываются время записи и размер выходного файла.
     raises:
         ValueError: Если расширение файла не поддерживается или произошла ошибка при сохранении.
     """
@@ -173,19 +1717,44 @@ def save_file(data: pd.DataFrame, save_path: str, csv_delimiter: str = ';') -> N
     file_extension = os.path.splitext(save_path)[-1].lower()
 
     # Проверка поддерживаемого формата файла
-    if file_extension not in ['.xlsx', '.csv']:
-        raise ValueError("Неподдерживаемый формат файла. Пожалуйста, выберите .xlsx или .csv.")
+    if file_extension not in STREAM_WRITER_EXTENSIONS:
+        raise ValueError(UNSUPPORTED_FORMAT_MESSAGE)
+    if xlsx_writer not in XLSX_WRITERS:
+        raise ValueError(f"Неподдерживаемый способ записи .xlsx: {xlsx_writer}")
+
+    # Колонка 'Source', добавленная concatenate_files, отмечается в метаданных колоночных форматов
+    source_column = data.source_column if isinstance(data, SpilledFrame) else bool(data.attrs.get(SOURCE_ATTR))
 
+    started = time.perf_counter()
     try:
-        if file_extension == '.xlsx':
+        if isinstance(data, SpilledFrame):
+            # Блоки читаются с диска и записываются по одному, не собираясь в один DataFrame
+            with open_stream_writer(save_path, csv_delimiter=csv_delimiter, index=index, compression=compression,
+                                    row_group_size=row_group_size, source_column=source_column) as writer:
+                for block in data.iter_blocks():
+                    writer.write(block)
+        elif file_extension == '.xlsx' and xlsx_writer == 'streaming':
+            # Потоковая запись строк без построения объектной модели книги в памяти
+            with XlsxStreamWriter(save_path, index=index) as writer:
+                writer.write(data)
+        elif file_extension == '.xlsx':
             # Сохраняем в формате Excel (.xlsx)
-            data.to_excel(save_path)
+            data.to_excel(save_path, index=index)
+        elif file_extension in ARROW_EXTENSIONS:
+            # Колоночные форматы записываются группами строк, заголовки MultiIndex сохраняются в метаданных
+            with ArrowStreamWriter(save_path, compression=compression, row_group_size=row_group_size,
+                                   source_column=source_column) as writer:
+                writer.write(data)
         elif file_extension == '.csv':
             # Сохраняем в формате CSV (.csv) с кодировкой UTF-8 и разделителем запятая
-            data.to_csv(save_path, encoding='utf-8', sep=csv_delimiter)
+            data.to_csv(save_path, encoding='utf-8', sep=csv_delimiter, index=index)
 
     except Exception as e:
         # Обработка ошибок при сохранении файла
         raise RuntimeError(f"Произошла ошибка при сохранении файла: {str(e)}")
 
+    if report is not None:
+        seconds = time.perf_counter() - started
+        report.add_stage('save', seconds)
+        report.record_output(save_path, seconds, rows=len(data), output_bytes=os.path.getsize(save_path))
     return True
@@ -0,0 +1,198 @@
+import hashlib
+import json
+import mmap
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+# Версия формата файла отпечатков
+FINGERPRINT_VERSION = 1
+
+# Имя файла отпечатков в папке кэша
+FINGERPRINTS_FILE = 'fingerprints.json'
+
+# Количество байт в начале и в конце файла, по которым вычисляется частичный хеш
+PARTIAL_BYTES = 64 * 1024
+
+# Размер блока при вычислении полного хеша по отображенному в память файлу
+HASH_BLOCK_SIZE = 8 * 1024 * 1024
+
+# Количество потоков для вычисления хешей: hashlib освобождает GIL при хешировании больших блоков
+FINGERPRINT_WORKERS = 4
+
+
+class FingerprintStore:
+    """
+    Хранилище отпечатков файлов (частичного и полного хеша) в JSON файле.
+
+    Отпечаток действителен, пока не изменились размер и время изменения файла, поэтому при повторных
+    запусках на тех же файлах хеши не вычисляются заново. Если путь не указан, отпечатки хранятся
+    только в памяти объекта.
+    """
+
+    def __init__(self, path: str = None):
+        """
+        params:
+            path: Путь к JSON файлу отпечатков или None. Поврежденный файл или файл другой версии
+                игнорируется и перезаписывается при сохранении.
+        """
+        self.path = path
+        self._entries = {}  # Абсолютный путь -> {size, mtime_ns, partial, full}
+        self._changed = False
+        if path is not None and os.path.exists(path):
+            try:
+                with open(path, encoding='utf-8') as handle:
+                    data = json.load(handle)
+                if data.get('version') == FINGERPRINT_VERSION:
+                    self._entries = data['files']
+            except (OSError, ValueError, KeyError):
+                pass
+
+    def get(self, file_path: str, stat: os.stat_result, kind: str):
+        """
+        Возвращает сохраненный хеш kind ('partial' или 'full') или None, если файл изменился.
+        """
+        entry = self._entries.get(os.path.abspath(file_path))
+        if entry is None or entry['size'] != stat.st_size or entry['mtime_ns'] != stat.st_mtime_ns:
+            return None
+        return entry.get(kind)
+
+    def put(self, file_path: str, stat: os.stat_result, kind: str, value: str) -> None:
+        """
+        Сохраняет хеш kind файла; отпечатки прежней версии файла удаляются.
+        """
+        key = os.path.abspath(file_path)
+        entry = self._entries.get(key)
+        if entry is None or entry['size'] != stat.st_size or entry['mtime_ns'] != stat.st_mtime_ns:
+            entry = self._entries[key] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+        entry[kind] = value
+        self._changed = True
+
+    def save(self) -> None:
+        """
+        Записывает отпечатки в файл, если они изменились. Запись выполняется через временный файл.
+        """
+        if self.path is None or not self._changed:
+            return
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        handle, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(handle, 'w', encoding='utf-8') as temp_file:
+                json.dump({'version': FINGERPRINT_VERSION, 'files': self._entries}, temp_file, ensure_ascii=False)
+            os.replace(temp_path, self.path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        self._changed = False
+
+
+def find_duplicate_files(files: list, store: FingerprintStore = None, workers: int = FINGERPRINT_WORKERS) -> tuple:
+    """
+    Находит побайтно одинаковые файлы, не разбирая их содержимое.
+
+    Проверка выполняется в три этапа, каждый из которых применяется только к файлам, совпавшим на предыдущем:
+        1. размер файла;
+        2. частичный хеш - SHA-256 первых и последних PARTIAL_BYTES байт;
+        3. полный SHA-256 содержимого, прочитанного через отображение файла в память (mmap).
+    Файлы с уникальным размером не читаются вообще.
+
+    params:
+        files: Список путей к файлам.
+        store: Хранилище отпечатков для повторного использования хешей между запусками.
+            Изменения сохраняются в файл хранилища по завершении проверки.
+        workers: Количество потоков для вычисления хешей.
+    return:
+        Пара (уникальные файлы в исходном порядке, список пар (дубликат, первый такой же файл)).
+        Повторно указанный путь считается дубликатом самого себя.
+    """
+    store = store if store is not None else FingerprintStore()
+    stats = {}
+    for file in dict.fromkeys(files):
+        try:
+            stats[file] = os.stat(file)
+        except OSError:
+            # Недоступный файл не сравнивается: ошибку сообщит чтение файла
+            pass
+
+    candidates = _same_groups(stats, lambda file: stats[file].st_size)
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        for kind, function in (('partial', _partial_hash), ('full', _full_hash)):
+            hashes = dict(zip(candidates, executor.map(
+                lambda file: _stored_hash(store, file, stats[file], kind, function), candidates)))
+            candidates = _same_groups(candidates, lambda file: (stats[file].st_size, hashes[file]))
+    store.save()
+    candidates = set(candidates)
+
+    # Среди одинаковых файлов остается первый в порядке объединения
+    original_by_hash = {}
+    unique, duplicates = [], []
+    seen = set()
+    for file in files:
+        if file in seen:
+            duplicates.append((file, file))
+            continue
+        seen.add(file)
+        if file in candidates:
+            key = (stats[file].st_size, hashes[file])
+            if key in original_by_hash:
+                duplicates.append((file, original_by_hash[key]))
+                continue
+            original_by_hash[key] = file
+        unique.append(file)
+    return unique, duplicates
+
+
+def _same_groups(files: list, key) -> list:
+    """
+    Оставляет только файлы, значение key которых совпадает хотя бы с одним другим файлом.
+    """
+    groups = {}
+    for file in dict.fromkeys(files):
+        groups.setdefault(key(file), []).append(file)
+    return [file for group in groups.values() if len(group) > 1 for file in group]
+
+
+def _stored_hash(store: FingerprintStore, file_path: str, stat: os.stat_result, kind: str, function) -> str:
+    """
+    Возвращает хеш из хранилища или вычисляет и сохраняет его.
+    """
+    value = store.get(file_path, stat, kind)
+    if value is None:
+        value = function(file_path, stat.st_size)
+        store.put(file_path, stat, kind, value)
+    return value
+
+
+def _partial_hash(file_path: str, size: int) -> str:
+    """
+    SHA-256 первых и последних PARTIAL_BYTES байт файла (для небольших файлов - всего содержимого).
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as handle:
+        digest.update(handle.read(PARTIAL_BYTES))
+        if size > 2 * PARTIAL_BYTES:
+            handle.seek(-PARTIAL_BYTES, os.SEEK_END)
+            digest.update(handle.read(PARTIAL_BYTES))
+        elif size > PARTIAL_BYTES:
+            digest.update(handle.read())
+    return digest.hexdigest()
+
+
+def _full_hash(file_path: str, size: int) -> str:
+    """
+    SHA-256 всего содержимого файла, отображенного в память: данные не копируются в буферы Python.
+    """
+    digest = hashlib.sha256()
+    if size == 0:
+        # Пустой файл нельзя отобразить в память
+        return digest.hexdigest()
+    with open(file_path, 'rb') as handle, mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        view = memoryview(mapped)
+        try:
+            for start in range(0, len(mapped), HASH_BLOCK_SIZE):
+                digest.update(view[start:start + HASH_BLOCK_SIZE])
+        finally:
+            view.release()
+    return digest.hexdigest()
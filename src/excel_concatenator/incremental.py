@@ -0,0 +1,367 @@
+import json
+import os
+import tempfile
+
+import pandas as pd
+
+from src.excel_concatenator.files_processing import add_source_column, iter_file_chunks
+from src.excel_concatenator.writers import XlsxStreamWriter
+
+# Версия формата манифеста
+MANIFEST_VERSION = 1
+
+# Суффикс файла манифеста, который хранится рядом с выходным файлом
+MANIFEST_SUFFIX = '.manifest.json'
+
+
+def manifest_path(save_path: str) -> str:
+    """Возвращает путь к манифесту для выходного файла."""
+    return save_path + MANIFEST_SUFFIX
+
+
+def incremental_concatenate(files: list, save_path: str, add_filename_column: bool = False, skip_top_rows: int = 0,
+                            header_rows: int = 1, skip_bottom_rows: int = 0, csv_delimiter: str = ';',
+                            chunk_size: int = 100_000, excel_engine: str = 'openpyxl') -> dict:
+    """
+    Пополняет ранее созданный результат объединения только новыми и измененными файлами.
+
+    Рядом с выходным файлом хранится манифест со списком объединенных файлов, их размером, временем
+    изменения и диапазонами строк в результате. При следующем запуске:
+        - если добавились только новые файлы, их строки дописываются в конец CSV файла без перезаписи;
+        - если файл изменен или удален, неизмененные файлы перед ним сохраняются как есть, а строки
+          неизмененных файлов после него копируются из прежнего результата без повторного разбора исходников;
+        - если изменились параметры чтения, выходной файл или манифест, результат строится заново.
+
+    Строки результата сдвигаются при перестроении, поэтому столбец индекса не записывается.
+    Файл .xlsx не допускает дописывания на месте (строки страниц ссылаются на общую таблицу строк книги),
+    поэтому при его обновлении книга записывается заново, но строки неизмененных файлов берутся
+    из прежнего результата, а разбираются только новые и измененные файлы.
+
+    params:
+        files: Список путей к файлам в порядке объединения.
+        save_path: Путь к выходному файлу (.csv или .xlsx).
+        add_filename_column: Если True, добавляет колонку 'Source' с именем файла.
+        skip_top_rows: Количество строк для пропуска сверху каждого файла.
+        header_rows: Количество строк, рассматриваемых как заголовки в каждом файле.
+        skip_bottom_rows: Количество строк для пропуска снизу каждого файла.
+        csv_delimiter: Разделитель для входных и выходного CSV файлов.
+        chunk_size: Количество строк в одной части при чтении и копировании.
+        excel_engine: Движок чтения файлов .xlsx и .xlsm: 'openpyxl' или 'lxml'. Движки возвращают одинаковые
+            данные, поэтому смена движка не приводит к перестроению результата.
+    return:
+        Словарь со сводкой: mode ('full', 'append', 'rebuild' или 'unchanged'), reused - количество
+        файлов, строки которых взяты из прежнего результата, parsed - количество разобранных файлов,
+        removed - количество файлов, удаленных из результата, rows - количество строк в результате.
+    raises:
+        ValueError: Если формат выходного файла не поддерживается или произошла ошибка при обработке файла.
+    """
+    file_extension = os.path.splitext(save_path)[-1].lower()
+    if file_extension not in ('.csv', '.xlsx'):
+        raise ValueError("Неподдерживаемый формат файла. Пожалуйста, выберите .xlsx или .csv.")
+
+    options = {'add_filename_column': add_filename_column, 'skip_top_rows': skip_top_rows,
+               'header_rows': header_rows, 'skip_bottom_rows': skip_bottom_rows, 'csv_delimiter': csv_delimiter}
+    states = [_file_state(file) for file in files]
+    manifest = _load_manifest(save_path, options)
+    old_entries = manifest['files'] if manifest else []
+    old_by_path = {entry['path']: entry for entry in old_entries}
+
+    # Неизмененное начало: эти файлы остаются в результате на своих местах
+    prefix = 0
+    while prefix < min(len(states), len(old_entries)) and _same_file(states[prefix], old_entries[prefix]):
+        prefix += 1
+
+    # Остальные файлы либо копируются из прежнего результата, либо разбираются заново.
+    # Копирование возможно только с сохранением прежнего порядка строк.
+    segments = []
+    next_old_row = old_entries[prefix - 1]['last_row'] + 1 if prefix else 0
+    for state in states[prefix:]:
+        old = old_by_path.get(state['path'])
+        if old is not None and _same_file(state, old) and old['first_row'] >= next_old_row:
+            segments.append((state, old))
+            next_old_row = old['last_row'] + 1
+        else:
+            segments.append((state, None))
+
+    context = _Context(save_path, manifest, options, chunk_size, excel_engine)
+    if manifest is None:
+        mode = 'full'
+    elif not segments and prefix == len(old_entries):
+        mode = 'unchanged'
+    elif prefix == len(old_entries) and all(old is None for _, old in segments):
+        mode = 'append'
+    else:
+        mode = 'rebuild'
+
+    if mode != 'unchanged':
+        if file_extension == '.csv':
+            entries = _update_csv(context, old_entries[:prefix], segments, append=mode == 'append')
+        else:
+            entries = _update_xlsx(context, old_entries[:prefix], segments)
+        _save_manifest(save_path, options, context, entries)
+    else:
+        entries = old_entries
+
+    parsed = sum(1 for _, old in segments if old is None)
+    removed = len(set(old_by_path) - {state['path'] for state in states})
+    return {'mode': mode, 'reused': len(states) - parsed, 'parsed': parsed, 'removed': removed,
+            'rows': entries[-1]['last_row'] + 1 if entries else 0}
+
+
+class _Context:
+    """Общие данные одного запуска инкрементального объединения."""
+
+    def __init__(self, save_path: str, manifest: dict, options: dict, chunk_size: int,
+                 excel_engine: str = 'openpyxl'):
+        self.save_path = save_path
+        self.options = options
+        self.chunk_size = chunk_size
+        self.excel_engine = excel_engine
+        self.columns = _columns_from_manifest(manifest) if manifest else None
+        # Конец строк заголовков в CSV результате (в байтах)
+        self.header_end = manifest.get('header_end') if manifest else None
+
+    def read_file(self, state: dict):
+        """
+        Читает исходный файл частями, сверяет заголовки с результатом и добавляет колонку 'Source'.
+        """
+        options = self.options
+        try:
+            for data in iter_file_chunks(state['path'], skip_top_rows=options['skip_top_rows'],
+                                         header_rows=options['header_rows'],
+                                         skip_bottom_rows=options['skip_bottom_rows'],
+                                         csv_delimiter=options['csv_delimiter'], chunk_size=self.chunk_size,
+                                         excel_engine=self.excel_engine):
+                if self.columns is None:
+                    self.columns = data.columns
+                elif not data.columns.equals(self.columns):
+                    raise ValueError("Заголовки файла не совпадают с заголовками объединенного результата.")
+                if options['add_filename_column']:
+                    add_source_column(data, state['path'])
+                yield data
+        except Exception as e:
+            raise ValueError(f"Ошибка при обработке файла {state['path']}: {e}")
+
+
+def _update_csv(context: _Context, kept: list, segments: list, append: bool) -> list:
+    """
+    Обновляет CSV результат: дописывает строки на месте или перестраивает файл после неизмененного начала.
+    """
+    delimiter = context.options['csv_delimiter']
+    entries = [dict(entry) for entry in kept]
+    cut = kept[-1]['byte_end'] if kept else None
+    next_row = kept[-1]['last_row'] + 1 if kept else 0
+
+    needs_copy = any(old is not None for _, old in segments)
+    if kept and (append or not needs_copy):
+        # Строки неизмененного начала остаются на месте, файл обрезается после них и дописывается
+        target_path, mode = context.save_path, 'r+'
+    else:
+        target_path, mode = _temp_path(context.save_path), 'w'
+
+    try:
+        with open(target_path, mode, encoding='utf-8', newline='') as handle:
+            if mode == 'r+':
+                handle.seek(cut)
+                handle.truncate()
+            elif context.header_end is not None and (kept or needs_copy):
+                # Строки заголовков и неизмененное начало копируются из прежнего результата
+                with open(context.save_path, 'rb') as source:
+                    _copy_bytes(source, handle, 0, cut if kept else context.header_end)
+
+            for state, old in segments:
+                byte_start = handle.tell()
+                if old is not None:
+                    with open(context.save_path, 'rb') as source:
+                        _copy_bytes(source, handle, old['byte_start'], old['byte_end'])
+                    rows = old['last_row'] - old['first_row'] + 1
+                else:
+                    rows = 0
+                    for data in context.read_file(state):
+                        if handle.tell() == 0:
+                            data.iloc[:0].to_csv(handle, sep=delimiter, header=True, index=False)
+                            byte_start = context.header_end = handle.tell()
+                        data.to_csv(handle, sep=delimiter, header=False, index=False)
+                        rows += len(data)
+                entries.append(_entry(state, next_row, rows, byte_start, handle.tell()))
+                next_row += rows
+
+        if target_path != context.save_path:
+            os.replace(target_path, context.save_path)
+    except BaseException:
+        if target_path != context.save_path and os.path.exists(target_path):
+            os.remove(target_path)
+        raise
+
+    return entries
+
+
+def _update_xlsx(context: _Context, kept: list, segments: list) -> list:
+    """
+    Записывает .xlsx результат заново: строки неизмененных файлов копируются из прежней книги,
+    разбираются только новые и измененные файлы.
+    """
+    copy_ranges = [(entry['first_row'], entry['last_row']) for entry in kept]
+    copy_ranges += [(old['first_row'], old['last_row']) for _, old in segments if old is not None]
+    old_rows = (_iter_xlsx_rows(context.save_path, context.columns.nlevels, len(_output_columns(context)))
+                if copy_ranges else iter(()))
+
+    entries = []
+    next_row = 0
+    old_position = 0
+    target_path = _temp_path(context.save_path)
+    try:
+        with XlsxStreamWriter(target_path, index=False) as writer:
+            def copy_rows(first_row, last_row):
+                nonlocal old_position
+                # Пропускаем строки прежнего результата до начала диапазона
+                for _ in range(first_row - old_position):
+                    next(old_rows)
+                count = last_row - first_row + 1
+                while count > 0:
+                    batch = [next(old_rows) for _ in range(min(count, context.chunk_size))]
+                    writer.write(pd.DataFrame.from_records(batch, columns=_output_columns(context)))
+                    count -= len(batch)
+                old_position = last_row + 1
+
+            for entry in kept:
+                copy_rows(entry['first_row'], entry['last_row'])
+                entries.append(dict(entry, first_row=next_row, last_row=next_row + entry['last_row'] - entry['first_row']))
+                next_row = entries[-1]['last_row'] + 1
+
+            for state, old in segments:
+                if old is not None:
+                    copy_rows(old['first_row'], old['last_row'])
+                    rows = old['last_row'] - old['first_row'] + 1
+                else:
+                    rows = 0
+                    for data in context.read_file(state):
+                        writer.write(data)
+                        rows += len(data)
+                entries.append(_entry(state, next_row, rows))
+                next_row += rows
+
+            if writer.columns is None and context.columns is not None:
+                # Пустой результат все равно содержит строки заголовков
+                writer.write(pd.DataFrame(columns=_output_columns(context)))
+
+        os.replace(target_path, context.save_path)
+    except BaseException:
+        if os.path.exists(target_path):
+            os.remove(target_path)
+        raise
+
+    return entries
+
+
+def _iter_xlsx_rows(save_path: str, header_rows: int, width: int):
+    """
+    Последовательно возвращает строки данных прежнего .xlsx результата со всех страниц,
+    пропуская строки заголовков, повторяющиеся на каждой странице.
+    Строки дополняются пустыми значениями до width: в режиме read_only пустые ячейки в конце строки опускаются.
+    """
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(save_path, read_only=True)
+    try:
+        for sheet in workbook.worksheets:
+            for row in sheet.iter_rows(min_row=header_rows + 1, values_only=True):
+                yield row + (None,) * (width - len(row))
+    finally:
+        workbook.close()
+
+
+def _output_columns(context: _Context) -> pd.MultiIndex:
+    """Заголовки результата с учетом колонки 'Source'."""
+    columns = list(context.columns)
+    if context.options['add_filename_column']:
+        columns.append(('Source',) + ('',) * (context.columns.nlevels - 1))
+    return pd.MultiIndex.from_tuples(columns)
+
+
+def _file_state(file_path: str) -> dict:
+    """Возвращает абсолютный путь, размер и время изменения файла."""
+    if not os.path.isfile(file_path):
+        raise ValueError(f"Ошибка при обработке файла {file_path}: Файл не найден: {file_path}")
+    stat = os.stat(file_path)
+    return {'path': os.path.abspath(file_path), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def _same_file(state: dict, entry: dict) -> bool:
+    """Проверяет, что файл не изменился с момента записи в манифест."""
+    return (state['path'] == entry['path'] and state['size'] == entry['size']
+            and state['mtime_ns'] == entry['mtime_ns'])
+
+
+def _entry(state: dict, first_row: int, rows: int, byte_start: int = None, byte_end: int = None) -> dict:
+    """Формирует запись манифеста для файла."""
+    entry = dict(state, first_row=first_row, last_row=first_row + rows - 1)
+    if byte_start is not None:
+        entry.update(byte_start=byte_start, byte_end=byte_end)
+    return entry
+
+
+def _load_manifest(save_path: str, options: dict):
+    """
+    Загружает манифест, если он соответствует выходному файлу и параметрам чтения, иначе возвращает None.
+    """
+    path = manifest_path(save_path)
+    if not (os.path.isfile(path) and os.path.isfile(save_path)):
+        return None
+    try:
+        with open(path, encoding='utf-8') as handle:
+            manifest = json.load(handle)
+    except (OSError, ValueError):
+        return None
+
+    # Выходной файл, измененный после записи манифеста, считается недостоверным
+    stat = os.stat(save_path)
+    if (manifest.get('version') != MANIFEST_VERSION or manifest.get('options') != options
+            or manifest.get('output_size') != stat.st_size or manifest.get('output_mtime_ns') != stat.st_mtime_ns
+            or not manifest.get('columns')):
+        return None
+    return manifest
+
+
+def _save_manifest(save_path: str, options: dict, context: _Context, entries: list) -> None:
+    """Записывает манифест рядом с выходным файлом."""
+    stat = os.stat(save_path)
+    manifest = {
+        'version': MANIFEST_VERSION,
+        'options': options,
+        'columns': [list(column) for column in context.columns] if context.columns is not None else [],
+        'header_end': context.header_end,
+        'output_size': stat.st_size,
+        'output_mtime_ns': stat.st_mtime_ns,
+        'files': entries,
+    }
+    temp_path = _temp_path(manifest_path(save_path))
+    with open(temp_path, 'w', encoding='utf-8') as handle:
+        json.dump(manifest, handle, ensure_ascii=False, indent=1)
+    os.replace(temp_path, manifest_path(save_path))
+
+
+def _columns_from_manifest(manifest: dict) -> pd.MultiIndex:
+    return pd.MultiIndex.from_tuples([tuple(column) for column in manifest['columns']])
+
+
+def _temp_path(path: str) -> str:
+    """Создает временный файл рядом с path, чтобы замена файла была атомарной."""
+    directory, name = os.path.split(os.path.abspath(path))
+    handle, temp_path = tempfile.mkstemp(dir=directory, prefix=f'.{name}.', suffix='.tmp')
+    os.close(handle)
+    return temp_path
+
+
+def _copy_bytes(source, target, start: int, end: int, block_size: int = 1 << 20) -> None:
+    """Копирует байты [start, end) из двоичного файла source в текстовый файл target без декодирования строк."""
+    target.flush()
+    source.seek(start)
+    remaining = end - start
+    while remaining > 0:
+        block = source.read(min(block_size, remaining))
+        if not block:
+            break
+        target.buffer.write(block)
+        remaining -= len(block)
+    target.buffer.flush()
@@ -0,0 +1,209 @@
+import json
+import sys
+import time
+from contextlib import contextmanager, nullcontext
+
+# Контекст-заглушка для этапов, когда отчет не собирается: один объект на все вызовы
+_NO_STAGE = nullcontext()
+
+# Порядок этапов в сводке; этапы, не указанные здесь, выводятся после них
+STAGE_ORDER = ('fingerprint', 'preflight', 'cache', 'open', 'parse', 'headers', 'dtypes', 'dedup', 'spill', 'align',
+               'reconcile', 'concat', 'source', 'provenance', 'save')
+
+
+def peak_memory_bytes():
+    """
+    Возвращает пиковое потребление памяти текущим процессом в байтах или None, если его нельзя определить.
+    """
+    if sys.platform == 'win32':
+        import ctypes
+        from ctypes import wintypes
+
+        class ProcessMemoryCounters(ctypes.Structure):
+            _fields_ = [('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD),
+                        ('PeakWorkingSetSize', ctypes.c_size_t), ('WorkingSetSize', ctypes.c_size_t),
+                        ('QuotaPeakPagedPoolUsage', ctypes.c_size_t), ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                        ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t), ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                        ('PagefileUsage', ctypes.c_size_t), ('PeakPagefileUsage', ctypes.c_size_t)]
+
+        counters = ProcessMemoryCounters()
+        counters.cb = ctypes.sizeof(counters)
+        try:
+            handle = ctypes.windll.kernel32.GetCurrentProcess()
+            if not ctypes.windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+                return None
+        except (AttributeError, OSError):
+            return None
+        return counters.PeakWorkingSetSize
+
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # В Linux значение в КБ, в macOS - в байтах
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def stage(report, name: str):
+    """
+    Возвращает контекст замера этапа name или контекст-заглушку, если отчет не собирается (report is None).
+    """
+    return _NO_STAGE if report is None else report.stage(name)
+
+
+class RunReport:
+    """
+    Отчет о выполнении объединения: время и параметры чтения каждого файла и суммарное время этапов.
+
+    Объект передается в параметре report функций read_file_excel_formats, concatenate_files и save_file,
+    которые заполняют его по ходу работы. Если отчет не передан, замеры не выполняются.
+
+    Этапы:
+        fingerprint - поиск побайтно одинаковых входных файлов;
+        preflight - предварительное чтение заголовков;
+        cache - поиск в кэше прочитанных файлов;
+        open - открытие книги Excel и проверка количества страниц;
+        parse - разбор строк файла;
+        headers - нормализация и устранение повторов заголовков;
+        dtypes - преобразование типов столбцов;
+        dedup - удаление повторяющихся строк;
+        spill - выгрузка накопленных блоков на диск при превышении бюджета памяти;
+        align, reconcile, concat, source - сопоставление столбцов, согласование типов, объединение блоков
+            и создание колонки 'Source';
+        provenance - запись манифеста происхождения строк;
+        save - запись выходного файла.
+    При параллельном чтении время этапов чтения суммируется по всем процессам и может превышать общее время.
+    """
+
+    def __init__(self):
+        self.files = []  # Записи о прочитанных файлах в порядке чтения
+        self.stages = {}  # Этап -> суммарное время, с
+        self.duplicates = []  # Пропущенные одинаковые файлы: {file, original}
+        self.dropped_rows = {}  # Файл -> количество удаленных повторяющихся строк
+        self.output = None  # Запись о выходном файле
+        self.started = time.perf_counter()
+        self.finished = None
+
+    @contextmanager
+    def stage(self, name: str):
+        """
+        Контекст, время выполнения которого добавляется к этапу name.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_stage(name, time.perf_counter() - start)
+
+    def add_stage(self, name: str, seconds: float) -> None:
+        """Добавляет время к этапу name."""
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def record_file(self, file: str, seconds: float, rows: int, columns: int, input_bytes: int, engine: str,
+                    memory_delta: int = None) -> None:
+        """
+        Добавляет запись о прочитанном файле.
+
+        params:
+            file: Путь к файлу.
+            seconds: Время чтения файла.
+            rows: Количество строк данных.
+            columns: Количество столбцов.
+            input_bytes: Размер файла в байтах.
+            engine: Движок чтения ('openpyxl', 'xlrd', 'pyxlsb', 'python', 'c', 'pyarrow') или 'cache'.
+            memory_delta: Прирост пикового потребления памяти процессом за время чтения в байтах.
+        """
+        self.files.append({'file': file, 'seconds': seconds, 'rows': rows, 'columns': columns,
+                           'input_bytes': input_bytes, 'engine': engine, 'memory_delta': memory_delta})
+
+    def record_duplicate(self, file: str, original: str) -> None:
+        """Добавляет запись о файле, пропущенном как побайтная копия файла original."""
+        self.duplicates.append({'file': file, 'original': original})
+
+    def record_dropped_rows(self, file: str, rows: int) -> None:
+        """Записывает количество повторяющихся строк, удаленных из файла."""
+        self.dropped_rows[file] = rows
+
+    def record_output(self, path: str, seconds: float, rows: int, output_bytes: int) -> None:
+        """Добавляет запись о выходном файле."""
+        self.output = {'file': path, 'seconds': seconds, 'rows': rows, 'output_bytes': output_bytes}
+
+    def merge(self, other: 'RunReport') -> None:
+        """
+        Добавляет записи и время этапов другого отчета (например, собранного в процессе пула).
+        """
+        self.files.extend(other.files)
+        self.duplicates.extend(other.duplicates)
+        self.dropped_rows.update(other.dropped_rows)
+        for name, seconds in other.stages.items():
+            self.add_stage(name, seconds)
+
+    def finish(self) -> None:
+        """Фиксирует общее время выполнения."""
+        self.finished = time.perf_counter()
+
+    @property
+    def wall_seconds(self) -> float:
+        """Общее время от создания отчета до finish() (или до текущего момента)."""
+        return (self.finished or time.perf_counter()) - self.started
+
+    def to_dict(self) -> dict:
+        """Возвращает отчет в виде словаря, пригодного для записи в JSON."""
+        return {
+            'wall_seconds': self.wall_seconds,
+            'stages': dict(sorted(self.stages.items(), key=lambda item: _stage_position(item[0]))),
+            'files': self.files,
+            'duplicates': self.duplicates,
+            'dropped_rows': self.dropped_rows,
+            'output': self.output,
+            'totals': {
+                'files': len(self.files),
+                'rows': sum(record['rows'] for record in self.files),
+                'input_bytes': sum(record['input_bytes'] for record in self.files),
+            },
+        }
+
+    def write_json(self, path: str) -> None:
+        """Записывает отчет в JSON файл."""
+        with open(path, 'w', encoding='utf-8') as handle:
+            json.dump(self.to_dict(), handle, ensure_ascii=False, indent=1)
+
+    def summary(self, slowest: int = 10) -> str:
+        """
+        Составляет текстовую сводку: общее время, время этапов и самые медленные файлы.
+
+        params:
+            slowest: Количество самых медленных файлов в сводке.
+        return:
+            Многострочный текст.
+        """
+        report = self.to_dict()
+        totals = report['totals']
+        lines = [f"Общее время: {report['wall_seconds']:.2f} с",
+                 f"Файлов: {totals['files']}, строк: {totals['rows']}, "
+                 f"объем: {totals['input_bytes'] / 2 ** 20:.1f} МБ",
+                 "", "Этапы:"]
+        lines += [f"  {name:<12} {seconds:>9.3f} с" for name, seconds in report['stages'].items()]
+        if self.files:
+            lines += ["", "Самые медленные файлы:"]
+            for record in sorted(self.files, key=lambda record: record['seconds'], reverse=True)[:slowest]:
+                memory = record['memory_delta']
+                memory = '' if memory is None else f", память +{memory / 2 ** 20:.1f} МБ"
+                lines.append(f"  {record['seconds']:>8.3f} с  {record['rows']} строк, {record['columns']} столбцов, "
+                             f"{record['engine']}{memory}  {record['file']}")
+        if self.duplicates:
+            lines += ["", f"Пропущены одинаковые файлы ({len(self.duplicates)}):"]
+            lines += [f"  {record['file']} (копия {record['original']})" for record in self.duplicates]
+        dropped = {file: rows for file, rows in self.dropped_rows.items() if rows}
+        if dropped:
+            lines += ["", f"Удалено повторяющихся строк: {sum(dropped.values())}"]
+            lines += [f"  {rows:>10}  {file}" for file, rows in dropped.items()]
+        if self.output is not None:
+            lines += ["", f"Запись результата: {self.output['seconds']:.3f} с, "
+                          f"{self.output['output_bytes'] / 2 ** 20:.1f} МБ  {self.output['file']}"]
+        return "\n".join(lines)
+
+
+def _stage_position(name: str) -> int:
+    return STAGE_ORDER.index(name) if name in STAGE_ORDER else len(STAGE_ORDER)
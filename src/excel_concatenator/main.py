@@ -1,3 +1,4 @@
+import multiprocessing
 import os
 import sys
 
@@ -19,4 +20,6 @@ def main():
 
 # Добавление текущей директории в sys.path для запуска приложения из пакета
 if __name__ == "__main__":
+    # Необходимо для пула процессов в исполняемом файле, собранном PyInstaller
+    multiprocessing.freeze_support()
     main()
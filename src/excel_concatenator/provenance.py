@@ -0,0 +1,90 @@
+import bisect
+import json
+import os
+
+from src.excel_concatenator.cache import file_sha256
+
+# Версия формата манифеста происхождения строк
+PROVENANCE_VERSION = 1
+
+# Суффикс файла манифеста, который сохраняется рядом с выходным файлом
+PROVENANCE_SUFFIX = '.provenance.json'
+
+
+def provenance_path(save_path: str) -> str:
+    """Возвращает путь к манифесту происхождения строк для выходного файла."""
+    return save_path + PROVENANCE_SUFFIX
+
+
+def build_provenance(files: list, row_counts: list) -> list:
+    """
+    Составляет манифест происхождения строк: для каждого файла - диапазон его строк в результате
+    и SHA-256 содержимого.
+
+    Манифест заменяет колонку 'Source' там, где нужно лишь найти исходный файл строки:
+    вместо имени файла в каждой строке хранится одна запись на файл.
+
+    params:
+        files: Список путей к файлам в порядке объединения.
+        row_counts: Количество строк каждого файла в результате.
+    return:
+        Список словарей {file, first_row, last_row, sha256}. Номера строк отсчитываются от 0 и включают
+        last_row; у файла без строк данных last_row = first_row - 1.
+    """
+    entries = []
+    first_row = 0
+    for file, rows in zip(files, row_counts):
+        entries.append({'file': os.path.abspath(file), 'first_row': first_row, 'last_row': first_row + rows - 1,
+                        'sha256': file_sha256(file)})
+        first_row += rows
+    return entries
+
+
+def write_provenance(path: str, entries: list) -> None:
+    """
+    Записывает манифест происхождения строк в JSON файл.
+
+    params:
+        path: Путь к файлу манифеста.
+        entries: Записи, составленные build_provenance.
+    """
+    manifest = {
+        'version': PROVENANCE_VERSION,
+        'rows': entries[-1]['last_row'] + 1 if entries else 0,
+        'files': entries,
+    }
+    with open(path, 'w', encoding='utf-8') as handle:
+        json.dump(manifest, handle, ensure_ascii=False, indent=1)
+
+
+def read_provenance(path: str) -> list:
+    """
+    Читает записи манифеста происхождения строк.
+
+    raises:
+        ValueError: Если версия манифеста не поддерживается.
+    """
+    with open(path, encoding='utf-8') as handle:
+        manifest = json.load(handle)
+    if manifest.get('version') != PROVENANCE_VERSION:
+        raise ValueError(f"Неподдерживаемая версия манифеста: {manifest.get('version')}")
+    return manifest['files']
+
+
+def find_source(entries: list, row: int) -> dict:
+    """
+    Находит запись файла, из которого получена строка результата с номером row.
+
+    params:
+        entries: Записи манифеста в порядке строк.
+        row: Номер строки результата (от 0).
+    return:
+        Запись манифеста.
+    raises:
+        IndexError: Если строки с таким номером нет в результате.
+    """
+    # Файлы без строк не содержат ни одной строки, поэтому поиск ведется по последней строке файла
+    position = bisect.bisect_left([entry['last_row'] for entry in entries], row)
+    if row < 0 or position == len(entries):
+        raise IndexError(f"Строка {row} отсутствует в результате.")
+    return entries[position]
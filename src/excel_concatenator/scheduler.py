@@ -0,0 +1,223 @@
+import importlib.util
+import os
+import tempfile
+
+import pandas as pd
+
+from src.excel_concatenator.columnar import SOURCE_ATTR, read_arrow_file
+from src.excel_concatenator.writers import ArrowStreamWriter
+
+# Начальная оценка: во сколько раз прочитанный DataFrame больше файла на диске. Значения строк хранятся
+# объектами Python (около 50 байт на ячейку), поэтому сжатые форматы разрастаются сильнее текстовых.
+# По мере чтения оценка для каждого формата заменяется измеренной.
+EXPANSION_ESTIMATES = {
+    '.csv': 8.0,
+    '.xlsx': 12.0,
+    '.xlsm': 12.0,
+    '.xltx': 12.0,
+    '.xltm': 12.0,
+    '.xlsb': 15.0,
+    '.xls': 4.0,
+    '.xlt': 4.0,
+    '.parquet': 10.0,
+    '.feather': 5.0,
+    '.arrow': 5.0,
+}
+
+# Оценка для форматов, отсутствующих в EXPANSION_ESTIMATES
+DEFAULT_EXPANSION = 10.0
+
+# Доля бюджета памяти, при достижении которой накопленные блоки выгружаются на диск
+SPILL_RATIO = 0.8
+
+# Количество строк, по которым оценивается размер текстовых столбцов блока
+MEMORY_SAMPLE_ROWS = 2_000
+
+
+class MemoryScheduler:
+    """
+    Планировщик чтения файлов в пределах бюджета памяти.
+
+    Размер каждого файла в памяти оценивается по его формату и размеру на диске. После чтения файла
+    измеряется фактический размер DataFrame, и оценка для этого формата уточняется отношением
+    суммарного измеренного размера к суммарному размеру прочитанных файлов. Параллельное чтение
+    очередного файла разрешается, только пока накопленные блоки и оценки уже читаемых файлов
+    вместе с ним укладываются в бюджет; накопленные блоки выгружаются на диск при достижении
+    доли spill_ratio бюджета. Блоки выгружаются в файлы Arrow IPC, поэтому требуется pyarrow.
+    """
+
+    def __init__(self, budget_bytes: int, spill_ratio: float = SPILL_RATIO):
+        """
+        params:
+            budget_bytes: Бюджет памяти в байтах.
+            spill_ratio: Доля бюджета, при достижении которой накопленные блоки нужно выгрузить на диск.
+        raises:
+            ValueError: Если бюджет не больше нуля или не установлен pyarrow.
+        """
+        if budget_bytes <= 0:
+            raise ValueError("Бюджет памяти должен быть больше нуля.")
+        # Проверка до чтения файлов: без pyarrow объединение завершилось бы ошибкой при первой выгрузке блоков
+        if importlib.util.find_spec('pyarrow') is None:
+            raise ValueError("Для бюджета памяти требуется pyarrow: выгружаемые на диск блоки "
+                             "сохраняются в формате Arrow. Установите его командой pip install pyarrow.")
+        self.budget_bytes = budget_bytes
+        self.spill_ratio = spill_ratio
+        self.held_bytes = 0  # Размер прочитанных блоков, находящихся в памяти
+        self.reserved_bytes = 0  # Оценка размера файлов, которые сейчас читаются
+        self.spilled_bytes = 0  # Размер блоков, выгруженных на диск
+        self._measured = {}  # Расширение -> [байт на диске, байт в памяти] прочитанных файлов
+
+    def expansion(self, file_extension: str) -> float:
+        """
+        Возвращает отношение размера DataFrame к размеру файла для формата: измеренное по уже
+        прочитанным файлам или начальную оценку.
+        """
+        disk_bytes, memory_bytes = self._measured.get(file_extension, (0, 0))
+        if disk_bytes:
+            return memory_bytes / disk_bytes
+        return EXPANSION_ESTIMATES.get(file_extension, DEFAULT_EXPANSION)
+
+    def estimate(self, file_path: str) -> int:
+        """
+        Оценивает размер файла в памяти после чтения в байтах.
+        """
+        file_extension = os.path.splitext(file_path)[1].lower()
+        return int(os.path.getsize(file_path) * self.expansion(file_extension))
+
+    def can_admit(self, file_path: str) -> bool:
+        """
+        Проверяет, можно ли начать чтение файла параллельно с уже читаемыми. Если ни один файл
+        не читается, чтение разрешается всегда, даже если оценка превышает бюджет.
+        """
+        if not self.reserved_bytes:
+            return True
+        return self.held_bytes + self.reserved_bytes + self.estimate(file_path) <= self.budget_bytes
+
+    def reserve(self, file_path: str) -> int:
+        """
+        Резервирует оценку размера файла на время его чтения.
+
+        return:
+            Зарезервированный размер в байтах, который передается в record после чтения.
+        """
+        reserved = self.estimate(file_path)
+        self.reserved_bytes += reserved
+        return reserved
+
+    def record(self, file_path: str, data: pd.DataFrame, reserved: int = 0) -> int:
+        """
+        Учитывает прочитанный файл: снимает резерв, добавляет измеренный размер блока к накопленным
+        и уточняет оценку для формата файла.
+
+        params:
+            file_path: Путь к прочитанному файлу.
+            data: Прочитанный DataFrame.
+            reserved: Размер, ранее зарезервированный reserve.
+        return:
+            Измеренный размер блока в байтах.
+        """
+        self.reserved_bytes -= reserved
+        memory_bytes = frame_memory_bytes(data)
+        self.held_bytes += memory_bytes
+
+        disk_bytes = os.path.getsize(file_path)
+        if disk_bytes and len(data):
+            measured = self._measured.setdefault(os.path.splitext(file_path)[1].lower(), [0, 0])
+            measured[0] += disk_bytes
+            measured[1] += memory_bytes
+        return memory_bytes
+
+    def should_spill(self) -> bool:
+        """Проверяет, достигли ли накопленные блоки доли spill_ratio бюджета."""
+        return self.held_bytes >= self.spill_ratio * self.budget_bytes
+
+    def release(self, memory_bytes: int) -> None:
+        """Учитывает выгрузку блоков общим размером memory_bytes на диск."""
+        self.held_bytes -= memory_bytes
+        self.spilled_bytes += memory_bytes
+
+
+class SpilledFrame:
+    """
+    Результат объединения, часть блоков которого выгружена во временные файлы Arrow IPC (требуется pyarrow).
+
+    Блоки хранятся в исходном порядке; выгруженные читаются с диска по одному при обходе iter_blocks.
+    Функция transform(position, block), если задана, применяется к каждому блоку при обходе
+    (например, сопоставление столбцов, согласование типов и добавление колонки 'Source', которые
+    требуют сведений обо всех блоках). Объект записывается функцией save_file потоково.
+    Временные файлы удаляются методом close или при удалении объекта.
+    """
+
+    def __init__(self, spill_dir: str = None):
+        """
+        params:
+            spill_dir: Папка для временных файлов (по умолчанию - системная временная папка).
+        """
+        self._directory = tempfile.TemporaryDirectory(prefix='excel_concatenator_', dir=spill_dir,
+                                                      ignore_cleanup_errors=True)
+        self._blocks = []  # DataFrame в памяти или путь к временному файлу выгруженного блока
+        self._rows = 0
+        self.spilled_blocks = 0
+        self.transform = None
+        self.source_column = False  # True, если transform добавляет последним столбцом колонку 'Source'
+
+    def spill(self, blocks: list) -> None:
+        """
+        Выгружает блоки во временные файлы. Блоки без строк остаются в памяти.
+        """
+        for block in blocks:
+            if not len(block):
+                self.extend([block])
+                continue
+            path = os.path.join(self._directory.name, f'block_{len(self._blocks):06d}.arrow')
+            # Признак колонки 'Source' ранее объединенного файла восстанавливается при чтении блока
+            with ArrowStreamWriter(path, source_column=bool(block.attrs.get(SOURCE_ATTR))) as writer:
+                writer.write(block)
+            self._blocks.append(path)
+            self._rows += len(block)
+            self.spilled_blocks += 1
+
+    def extend(self, blocks: list) -> None:
+        """Добавляет блоки, остающиеся в памяти."""
+        self._blocks.extend(blocks)
+        self._rows += sum(len(block) for block in blocks)
+
+    def iter_blocks(self):
+        """
+        Возвращает генератор блоков в исходном порядке с примененной функцией transform.
+        """
+        for position, block in enumerate(self._blocks):
+            if isinstance(block, str):
+                block = read_arrow_file(block)
+            yield block if self.transform is None else self.transform(position, block)
+
+    def close(self) -> None:
+        """Удаляет временные файлы."""
+        self._blocks = []
+        self._directory.cleanup()
+
+    def __len__(self) -> int:
+        return self._rows
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def frame_memory_bytes(data: pd.DataFrame, sample_rows: int = MEMORY_SAMPLE_ROWS) -> int:
+    """
+    Оценивает размер DataFrame в памяти вместе со значениями текстовых столбцов.
+
+    Размер объектов Python в столбцах object оценивается по равномерной выборке sample_rows строк,
+    а не по всем значениям, как DataFrame.memory_usage(deep=True).
+    """
+    size = int(data.memory_usage(index=True, deep=False).sum())
+    objects = [position for position, dtype in enumerate(data.dtypes) if dtype == object]
+    if not objects or not len(data):
+        return size
+
+    sample = data.iloc[::max(1, len(data) // sample_rows), objects]
+    values = sample.memory_usage(index=False, deep=True).sum() - sample.memory_usage(index=False, deep=False).sum()
+    return size + int(values * len(data) / len(sample))
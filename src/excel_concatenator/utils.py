@@ -1,6 +1,10 @@
 import os
 import sys
 
+# Поддерживаемые расширения входных файлов
+SUPPORTED_EXTENSIONS = ('.xlsx', '.xls', '.xlsm', '.xlsb', '.xlt', '.xltm', '.xltx', '.csv', '.parquet', '.feather',
+                        '.arrow')
+
 
 def resource_path(relative_path):
     """ Получить абсолютный путь к ресурсу, который будет работать как при сборке в один файл, так и в стандартном режиме. """
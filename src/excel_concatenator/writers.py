@@ -0,0 +1,273 @@
+import os
+
+import pandas as pd
+
+from src.excel_concatenator.columnar import ARROW_EXTENSIONS, frame_to_table
+
+# Форматы, которые поддерживают потоковую запись по частям
+STREAM_WRITER_EXTENSIONS = ('.xlsx', '.csv') + ARROW_EXTENSIONS
+
+# Сообщение о неподдерживаемом формате выходного файла
+UNSUPPORTED_FORMAT_MESSAGE = ("Неподдерживаемый формат файла. Пожалуйста, выберите .xlsx, .csv, .parquet, "
+                              ".feather или .arrow.")
+
+# Максимальное количество строк на одной странице Excel
+EXCEL_MAX_ROWS = 1_048_576
+
+# Количество строк, значения которых XlsxStreamWriter подготавливает к записи за один раз
+XLSX_BATCH_ROWS = 5_000
+
+
+def open_stream_writer(save_path: str, csv_delimiter: str = ';', index: bool = True, compression: str = None,
+                       row_group_size: int = None, source_column: bool = False):
+    """
+    Создает потоковый писатель для файла, формат которого определяется по расширению пути.
+
+    params:
+        save_path: Строка с полным путем и именем файла, включая расширение
+            (.xlsx, .csv, .parquet, .feather или .arrow).
+        csv_delimiter: Разделитель при записи в формате csv.
+        index: Если False, столбец индекса не записывается.
+        compression: Сжатие для форматов .parquet, .feather и .arrow.
+        row_group_size: Максимальное количество строк в группе строк для форматов .parquet, .feather и .arrow.
+        source_column: True, если последний столбец - колонка 'Source', добавленная при объединении
+            (сохраняется в метаданных форматов .parquet, .feather и .arrow).
+    return:
+        Объект CsvStreamWriter, XlsxStreamWriter или ArrowStreamWriter.
+    raises:
+        ValueError: Если расширение файла не поддерживается.
+    """
+    file_extension = os.path.splitext(save_path)[-1].lower()
+    if file_extension == '.csv':
+        return CsvStreamWriter(save_path, csv_delimiter=csv_delimiter, index=index)
+    if file_extension == '.xlsx':
+        return XlsxStreamWriter(save_path, index=index)
+    if file_extension in ARROW_EXTENSIONS:
+        return ArrowStreamWriter(save_path, compression=compression, row_group_size=row_group_size,
+                                 source_column=source_column)
+    raise ValueError(UNSUPPORTED_FORMAT_MESSAGE)
+
+
+class StreamWriter:
+    """
+    Базовый потоковый писатель: принимает DataFrame по частям и дописывает их в файл.
+
+    Строки нумеруются сквозным индексом, как в DataFrame, полученном от concatenate_files.
+    Первая записанная часть определяет заголовки файла.
+    """
+
+    def __init__(self, save_path: str, index: bool = True):
+        self.save_path = save_path
+        self.index = index
+        self.rows_written = 0
+        self.columns = None
+
+    def write(self, data: pd.DataFrame) -> None:
+        """
+        Дописывает часть данных в файл.
+
+        params:
+            data: DataFrame с теми же заголовками, что и у первой записанной части.
+        """
+        data = data.set_axis(pd.RangeIndex(self.rows_written, self.rows_written + len(data)), axis=0)
+        if self.columns is None:
+            self.columns = data.columns
+            self._write_header(data)
+        self._write_rows(data)
+        self.rows_written += len(data)
+
+    def close(self) -> None:
+        """Завершает запись и закрывает файл."""
+        raise NotImplementedError
+
+    def _write_header(self, data: pd.DataFrame) -> None:
+        raise NotImplementedError
+
+    def _write_rows(self, data: pd.DataFrame) -> None:
+        raise NotImplementedError
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class CsvStreamWriter(StreamWriter):
+    """
+    Потоковая запись в CSV в том же формате, что и save_file: заголовки, затем строки с индексом.
+    """
+
+    def __init__(self, save_path: str, csv_delimiter: str = ';', index: bool = True):
+        super().__init__(save_path, index=index)
+        self.csv_delimiter = csv_delimiter
+        self.handle = open(save_path, 'w', encoding='utf-8', newline='')
+
+    def _write_header(self, data: pd.DataFrame) -> None:
+        # Заголовки записываются методом DataFrame.to_csv, чтобы их формат совпадал с save_file
+        data.iloc[:0].to_csv(self.handle, sep=self.csv_delimiter, header=True, index=self.index)
+
+    def _write_rows(self, data: pd.DataFrame) -> None:
+        data.to_csv(self.handle, sep=self.csv_delimiter, header=False, index=self.index)
+
+    def close(self) -> None:
+        self.handle.close()
+
+
+class XlsxStreamWriter(StreamWriter):
+    """
+    Потоковая запись в .xlsx через книгу openpyxl в режиме write_only.
+
+    Строки записываются в файл по мере поступления, не накапливаясь в памяти. Заголовки
+    MultiIndex записываются отдельными строками (по одной на уровень) без объединения ячеек,
+    первый столбец содержит индекс строки (если index=True). Когда страница заполняется
+    до max_rows строк, запись продолжается на новой странице (Sheet2, Sheet3, ...),
+    и строки заголовков повторяются на каждой странице.
+    """
+
+    def __init__(self, save_path: str, index: bool = True, max_rows: int = EXCEL_MAX_ROWS):
+        from openpyxl import Workbook
+
+        super().__init__(save_path, index=index)
+        self.max_rows = max_rows
+        self.workbook = Workbook(write_only=True)
+        self.sheet = None
+        self.sheet_rows = 0
+        self._new_sheet()
+
+    def _new_sheet(self) -> None:
+        """Создает следующую страницу и повторяет на ней строки заголовков."""
+        self.sheet = self.workbook.create_sheet(f'Sheet{len(self.workbook.worksheets) + 1}')
+        self.sheet_rows = 0
+        if self.columns is not None:
+            self._write_header_rows()
+
+    def _write_header(self, data: pd.DataFrame) -> None:
+        if self.max_rows <= data.columns.nlevels:
+            raise ValueError("Заголовки не помещаются на странице.")
+        self._write_header_rows()
+
+    def _write_header_rows(self) -> None:
+        prefix = [None] if self.index else []
+        for level in range(self.columns.nlevels):
+            self.sheet.append(prefix + [_cell_value(value) for value in self.columns.get_level_values(level)])
+        self.sheet_rows += self.columns.nlevels
+
+    def _write_rows(self, data: pd.DataFrame) -> None:
+        for start in range(0, len(data), XLSX_BATCH_ROWS):
+            batch = data.iloc[start:start + XLSX_BATCH_ROWS]
+            # Пустые значения заменяются на None сразу для группы строк, а не для каждой ячейки; объектная
+            # копия создается только для группы, поэтому запись всего результата не удваивает память
+            values = batch.astype(object).where(batch.notna(), None)
+            rows = values.itertuples(index=self.index, name=None)
+            remaining = len(values)
+            while remaining:
+                if self.sheet_rows >= self.max_rows:
+                    self._new_sheet()
+                count = min(remaining, self.max_rows - self.sheet_rows)
+                for _ in range(count):
+                    self.sheet.append(next(rows))
+                self.sheet_rows += count
+                remaining -= count
+
+    def close(self) -> None:
+        self.workbook.save(self.save_path)
+
+
+class ArrowStreamWriter(StreamWriter):
+    """
+    Потоковая запись в .parquet (группами строк) или в файловый формат Arrow IPC (.feather, .arrow).
+
+    Заголовки MultiIndex и признак колонки 'Source' сохраняются в метаданных схемы и восстанавливаются
+    при чтении файла read_file_excel_formats. Столбец индекса не записывается: в колоночных форматах
+    номер строки определяется ее положением.
+    """
+
+    def __init__(self, save_path: str, compression: str = None, row_group_size: int = None,
+                 source_column: bool = False):
+        """
+        params:
+            save_path: Путь к файлу .parquet, .feather или .arrow.
+            compression: Сжатие (см. save_file).
+            row_group_size: Максимальное количество строк в группе строк.
+            source_column: True, если последний столбец - колонка 'Source', добавленная при объединении.
+                Признак задается явно: столбец пользователя с именем 'Source' колонкой имен файлов не считается.
+        """
+        super().__init__(save_path, index=False)
+        self.source_column = source_column
+        self.parquet = os.path.splitext(save_path)[-1].lower() == '.parquet'
+        self.compression = _arrow_compression(compression, self.parquet)
+        self.row_group_size = row_group_size
+        self.schema = None
+        self.writer = None
+        self.categories = {}  # Категории, уже записанные в словари Arrow IPC: позиция столбца -> Index
+
+    def _write_header(self, data: pd.DataFrame) -> None:
+        import pyarrow as pa
+
+        self.schema = frame_to_table(data.iloc[:0], source_column=self.source_column).schema
+        if self.parquet:
+            import pyarrow.parquet as pq
+
+            self.writer = pq.ParquetWriter(self.save_path, self.schema, compression=self.compression)
+        else:
+            # Файл Arrow IPC допускает только дополнение словаря, но не его замену
+            options = pa.ipc.IpcWriteOptions(compression=self.compression, emit_dictionary_deltas=True)
+            self.writer = pa.ipc.new_file(self.save_path, self.schema, options=options)
+
+    def _write_rows(self, data: pd.DataFrame) -> None:
+        if not self.parquet:
+            data = self._extend_categories(data)
+        table = frame_to_table(data, schema=self.schema)
+        if self.parquet:
+            self.writer.write_table(table, row_group_size=self.row_group_size)
+        else:
+            self.writer.write_table(table, max_chunksize=self.row_group_size)
+
+    def _extend_categories(self, data: pd.DataFrame) -> pd.DataFrame:
+        """
+        Дополняет категории столбцов category категориями ранее записанных частей, чтобы словарь
+        каждого столбца в файле Arrow IPC только пополнялся.
+        """
+        changes = {}
+        for position, dtype in enumerate(data.dtypes):
+            if not isinstance(dtype, pd.CategoricalDtype):
+                continue
+            known = self.categories.get(position, dtype.categories[:0])
+            extra = dtype.categories.difference(known, sort=False)
+            if len(extra):
+                known = known.append(extra)
+            self.categories[position] = known
+            if not dtype.categories.equals(known):
+                changes[position] = data.iloc[:, position].cat.set_categories(known)
+
+        if changes:
+            data = data.copy(deep=False)
+            for position, column in changes.items():
+                data.isetitem(position, column)
+        return data
+
+    def close(self) -> None:
+        if self.writer is None:
+            # Без записанных частей записывается корректный файл без столбцов и строк, а не файл нулевой длины,
+            # который pyarrow не может прочитать
+            self._write_header(pd.DataFrame())
+        self.writer.close()
+
+
+def _arrow_compression(compression: str, parquet: bool):
+    """
+    Приводит название сжатия к виду, принятому pyarrow. По умолчанию Parquet сжимается snappy,
+    а файлы Arrow IPC - lz4, как в pyarrow.feather.write_feather.
+    """
+    if compression is None:
+        return 'snappy' if parquet else 'lz4'
+    compression = compression.lower()
+    if compression in ('none', 'uncompressed'):
+        return 'none' if parquet else None
+    return compression
+
+
+def _cell_value(value):
+    """Преобразует значение DataFrame в значение ячейки: пустые значения (NaN, None) становятся пустыми ячейками."""
+    return None if pd.isna(value) else value
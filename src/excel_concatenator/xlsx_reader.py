@@ -0,0 +1,486 @@
+import posixpath
+import zipfile
+from xml.etree import ElementTree
+
+import numpy as np
+import pandas as pd
+from pandas._libs.parsers import STR_NA_VALUES
+from pandas.errors import EmptyDataError
+from pandas.io.excel._util import fill_mi_header
+from pandas.io.parsers import TextParser
+
+# Пространство имен SpreadsheetML, используемое в частях книги Office Open XML
+SPREADSHEETML_NAMESPACE = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+
+# Пространство имен связей между частями пакета (атрибут r:id)
+RELATIONSHIPS_NAMESPACE = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+
+_ROW_TAG = f'{{{SPREADSHEETML_NAMESPACE}}}row'
+_VALUE_TAG = f'{{{SPREADSHEETML_NAMESPACE}}}v'
+_TEXT_TAG = f'{{{SPREADSHEETML_NAMESPACE}}}t'
+_RUN_TEXT_PATH = f'{{{SPREADSHEETML_NAMESPACE}}}r/{{{SPREADSHEETML_NAMESPACE}}}t'
+_INLINE_STRING_TAG = f'{{{SPREADSHEETML_NAMESPACE}}}is'
+
+
+def find_workbook_part(archive: zipfile.ZipFile) -> str:
+    """
+    Определяет путь к части workbook.xml внутри архива по связям пакета (_rels/.rels).
+    """
+    for relationship_type, target in _read_relationships(archive, '').items():
+        if relationship_type.endswith('/officeDocument'):
+            return target
+    return 'xl/workbook.xml'
+
+
+class XlsxReader:
+    """
+    Движок чтения книг .xlsx и .xlsm без создания объектов ячеек.
+
+    Архив книги открывается один раз. Таблица общих строк загружается в плоский список, а XML страницы
+    разбирается потоково (lxml.etree.iterparse): значения ячеек строк данных сразу записываются в списки
+    столбцов в том виде, в котором их возвращает pandas при чтении с dtype=str. Заголовки разбираются
+    тем же кодом pandas, что и при чтении через openpyxl, поэтому результат parse совпадает с
+    pd.ExcelFile(..., engine='openpyxl').parse(..., dtype=str).
+
+    Объект поддерживает ту часть интерфейса pd.ExcelFile, которая используется при чтении файлов:
+    sheet_names, parse и протокол контекстного менеджера.
+    """
+
+    def __init__(self, file_path: str):
+        """
+        params:
+            file_path: Путь к файлу книги.
+        raises:
+            ValueError: Если файл не является корректной книгой Office Open XML.
+        """
+        self._archive = zipfile.ZipFile(file_path)
+        try:
+            self._read_workbook()
+        except BaseException:
+            self._archive.close()
+            raise
+        self._strings = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self) -> None:
+        """Закрывает архив книги."""
+        self._archive.close()
+
+    @property
+    def sheet_names(self) -> list:
+        """Имена рабочих страниц книги по порядку (страницы-диаграммы не включаются, как в openpyxl)."""
+        return list(self._sheets)
+
+    def parse(self, sheet_name=0, skiprows: int = 0, header=0, skipfooter: int = 0, dtype=str,
+              nrows: int = None) -> pd.DataFrame:
+        """
+        Читает страницу книги.
+
+        params:
+            sheet_name: Имя или номер страницы.
+            skiprows: Количество строк для пропуска сверху.
+            header: Номер строки заголовков или список номеров строк (после пропущенных строк).
+            skipfooter: Количество строк для пропуска снизу.
+            dtype: Поддерживается только str: все значения читаются как строки.
+            nrows: Количество строк данных, которые нужно прочитать; разбор страницы прекращается
+                после них. skipfooter применяется к прочитанным строкам, как в pandas.
+        return:
+            DataFrame со значениями-строками и NaN на месте пустых ячеек.
+        raises:
+            ValueError: Если страница не найдена или параметры не поддерживаются.
+        """
+        if dtype is not str:
+            raise ValueError("Движок lxml поддерживает только чтение значений строками (dtype=str).")
+        if isinstance(sheet_name, int):
+            if not 0 <= sheet_name < len(self._sheets):
+                raise ValueError(f"Страница с номером {sheet_name} не найдена, страниц в книге: {len(self._sheets)}.")
+            sheet_name = list(self._sheets)[sheet_name]
+        elif sheet_name not in self._sheets:
+            raise ValueError(f"Страница '{sheet_name}' не найдена.")
+
+        header_rows = list(header) if isinstance(header, (list, tuple, range)) else [header]
+        head_count = skiprows + (max(header_rows) + 1 if header_rows else 0)
+        if self._strings is None:
+            self._strings = self._read_shared_strings()
+
+        with self._archive.open(self._sheets[sheet_name]) as source:
+            head, buffers, width, row_count = self._read_rows(source, head_count,
+                                                              None if nrows is None else head_count + nrows)
+
+        if row_count <= head_count:
+            # Строк данных нет: результат (пустой DataFrame или ошибка заголовков) определяет pandas
+            return _parse_rows(head[:row_count], width, skiprows, header_rows, skipfooter)
+
+        # Заголовки разбираются pandas по строкам заголовков и одной пустой строке данных
+        columns = _parse_rows(head + [[''] * width], width, skiprows, header_rows, 0).columns
+        data_rows = max(row_count - head_count - skipfooter, 0)
+        arrays = {}
+        for position in range(width):
+            values = buffers[position] if position < len(buffers) else []
+            del values[data_rows:]
+            values.extend([np.nan] * (data_rows - len(values)))
+            arrays[position] = np.array(values, dtype=object)
+        df = pd.DataFrame(arrays)
+        df.columns = columns
+        return df
+
+    def sheet_row_count(self, sheet_name: str) -> int:
+        """
+        Возвращает номер последней строки страницы по ее размерам (элемент dimension), не читая ячейки.
+        Если размеры не указаны или содержат одну ячейку, строки страницы подсчитываются.
+        """
+        from lxml import etree
+
+        with self._archive.open(self._sheets[sheet_name]) as source:
+            for _, element in etree.iterparse(source, events=('start',)):
+                if element.tag == f'{{{SPREADSHEETML_NAMESPACE}}}dimension':
+                    last = element.get('ref', '').rpartition(':')[2].lstrip('$ABCDEFGHIJKLMNOPQRSTUVWXYZ')
+                    if ':' in element.get('ref', '') and last.isdigit():
+                        return int(last)
+                    break
+                if element.tag == f'{{{SPREADSHEETML_NAMESPACE}}}sheetData':
+                    break
+        with self._archive.open(self._sheets[sheet_name]) as source:
+            count = 0
+            for _, element in etree.iterparse(source, tag=_ROW_TAG):
+                count += 1
+                _release(element)
+            return count
+
+    def sheet_column_count(self, sheet_name: str):
+        """
+        Возвращает номер последнего столбца страницы по ее размерам (элемент dimension), не читая ячейки,
+        или None, если размеры не указаны.
+        """
+        from lxml import etree
+
+        with self._archive.open(self._sheets[sheet_name]) as source:
+            for _, element in etree.iterparse(source, events=('start',)):
+                if element.tag == f'{{{SPREADSHEETML_NAMESPACE}}}dimension':
+                    last = element.get('ref', '').rpartition(':')[2].replace('$', '').rstrip('0123456789')
+                    return _column_index(last) + 1 if last.isalpha() else None
+                if element.tag == f'{{{SPREADSHEETML_NAMESPACE}}}sheetData':
+                    return None
+        return None
+
+    def _read_rows(self, source, head_count: int, row_limit: int = None) -> tuple:
+        """
+        Потоково читает строки страницы (при заданном row_limit - только первые row_limit строк).
+
+        Первые head_count строк (пропускаемые и заголовки) сохраняются как списки значений в том виде,
+        в котором их передает в разбор заголовков pandas. Значения остальных строк записываются
+        в списки столбцов как строки (NaN для пустых ячеек и значений, которые pandas считает пропусками).
+
+        return:
+            Кортеж (строки заголовков, списки столбцов, количество столбцов, количество строк без пустых строк в конце).
+        """
+        from lxml import etree
+
+        strings, texts = self._strings
+        date_styles, timedelta_styles = self._date_styles, self._timedelta_styles
+        na_values = STR_NA_VALUES
+        nan = np.nan
+        column_indexes = {}
+        aliases = {}
+
+        head = []
+        buffers = []
+        width = 0
+        row_count = 0  # Номер последней непустой строки + 1
+        position = -1  # Номер текущей строки (с 0)
+        for _, row in etree.iterparse(source, events=('end',), tag=_ROW_TAG, huge_tree=True):
+            number = row.get('r')
+            number = int(float(number)) - 1 if number is not None else position + 1
+            if number <= position:
+                # Строки с повторным или меньшим номером openpyxl пропускает
+                _release(row)
+                continue
+            if row_limit is not None and number >= row_limit:
+                break
+            position = number
+
+            data_row = position - head_count
+            last_value = -1  # Столбец последнего непустого значения строки
+            values = None
+            if data_row < 0:
+                values = []
+            column = -1
+            for cell in row:
+                reference = cell.get('r')
+                if reference is None:
+                    column += 1
+                else:
+                    letters = reference.rstrip('0123456789')
+                    column = column_indexes.get(letters)
+                    if column is None:
+                        column = column_indexes[letters] = _column_index(letters)
+
+                cell_type = cell.get('t', 'n')
+                if cell_type == 'inlineStr':
+                    raw = None
+                    for element in cell:
+                        if element.tag == _INLINE_STRING_TAG:
+                            # Обычно строка состоит из одного элемента t без фрагментов форматирования
+                            if len(element) == 1 and element[0].tag == _TEXT_TAG:
+                                raw = element[0].text or ''
+                            else:
+                                raw = _text_content(element)
+                    if raw is not None and raw != '':
+                        text = nan if raw in na_values else raw
+                    else:
+                        raw = text = None
+                else:
+                    raw = None
+                    for element in cell:
+                        if element.tag == _VALUE_TAG:
+                            raw = element.text or None
+                            break
+                    if raw is None:
+                        text = None
+                    elif cell_type == 'n':
+                        style = cell.get('s')
+                        if style is not None and int(style) in date_styles:
+                            raw = _excel_date(raw, self._epoch, int(style) in timedelta_styles)
+                            text = nan if raw is nan else str(raw)
+                        elif '.' in raw or 'E' in raw or 'e' in raw:
+                            raw = float(raw)
+                            integer = int(raw)
+                            if integer == raw:
+                                raw = integer
+                            text = str(raw)
+                        else:
+                            raw = int(raw)
+                            text = str(raw)
+                    elif cell_type == 's':
+                        index = int(raw)
+                        raw, text = strings[index], texts[index]
+                        if raw == '':
+                            raw = text = None
+                    elif cell_type == 'b':
+                        raw = bool(int(raw))
+                        text = str(raw)
+                    elif cell_type == 'e':
+                        raw = text = nan
+                    elif cell_type == 'd':
+                        from openpyxl.utils.datetime import from_ISO8601
+
+                        raw = from_ISO8601(raw)
+                        text = str(raw)
+                    else:
+                        text = nan if raw in na_values else raw
+
+                if raw is not None:
+                    last_value = column
+                if values is not None:
+                    if column >= len(values):
+                        values.extend([''] * (column + 1 - len(values)))
+                    values[column] = '' if raw is None else raw
+                elif text is not None:
+                    if cell_type != 's' and (raw == 0 or raw == 1):
+                        # pandas заменяет равные значения столбца первым из них (1 и True, 0 и False),
+                        # поэтому такие значения записываются так же, как первое из них в столбце
+                        text = aliases.setdefault((column, raw), text)
+                    while column >= len(buffers):
+                        buffers.append([])
+                    values_column = buffers[column]
+                    if len(values_column) < data_row:
+                        values_column.extend([nan] * (data_row - len(values_column)))
+                    if len(values_column) == data_row:
+                        values_column.append(text)
+                    else:
+                        values_column[data_row] = text
+            _release(row)
+
+            if last_value >= 0:
+                width = max(width, last_value + 1)
+                row_count = position + 1
+            if values is not None:
+                head.extend([] for _ in range(position - len(head)))
+                head.append(values[:last_value + 1])
+
+        head.extend([] for _ in range(min(row_count, head_count) - len(head)))
+        return head, buffers, width, row_count
+
+    def _read_workbook(self) -> None:
+        """
+        Читает список страниц, календарь дат и стили книги.
+        """
+        from lxml import etree
+
+        workbook_part = find_workbook_part(self._archive)
+        relationships = _read_relationships(self._archive, workbook_part, by_id=True)
+        with self._archive.open(workbook_part) as workbook:
+            tree = etree.parse(workbook)
+
+        properties = tree.find(f'{{{SPREADSHEETML_NAMESPACE}}}workbookPr')
+        date1904 = properties is not None and properties.get('date1904', '').lower() in ('1', 'true')
+        from openpyxl.utils.datetime import CALENDAR_MAC_1904, CALENDAR_WINDOWS_1900
+
+        self._epoch = CALENDAR_MAC_1904 if date1904 else CALENDAR_WINDOWS_1900
+
+        self._sheets = {}
+        for sheet in tree.iter(f'{{{SPREADSHEETML_NAMESPACE}}}sheet'):
+            relationship_type, target = relationships.get(sheet.get(f'{{{RELATIONSHIPS_NAMESPACE}}}id'), ('', ''))
+            if relationship_type.endswith('/worksheet'):
+                self._sheets[sheet.get('name')] = target
+
+        self._parts = {relationship_type.rsplit('/', 1)[-1]: target
+                       for relationship_type, target in relationships.values()}
+        self._date_styles, self._timedelta_styles = self._read_date_styles()
+
+    def _read_date_styles(self) -> tuple:
+        """
+        Определяет номера стилей ячеек с форматами даты и длительности так же, как openpyxl.
+
+        return:
+            Пара множеств (стили дат, стили длительностей).
+        """
+        from lxml import etree
+        from openpyxl.styles.numbers import builtin_format_code, is_date_format, is_timedelta_format
+
+        date_styles, timedelta_styles = set(), set()
+        part = self._parts.get('styles')
+        if part is None or part not in self._archive.namelist():
+            return date_styles, timedelta_styles
+        with self._archive.open(part) as styles:
+            tree = etree.parse(styles)
+
+        custom = {int(element.get('numFmtId')): element.get('formatCode')
+                  for element in tree.iter(f'{{{SPREADSHEETML_NAMESPACE}}}numFmt')}
+        cell_formats = tree.find(f'{{{SPREADSHEETML_NAMESPACE}}}cellXfs')
+        if cell_formats is None:
+            return date_styles, timedelta_styles
+        for index, element in enumerate(cell_formats.iterfind(f'{{{SPREADSHEETML_NAMESPACE}}}xf')):
+            format_id = int(element.get('numFmtId', 0))
+            number_format = custom[format_id] if format_id in custom else builtin_format_code(format_id)
+            if is_date_format(number_format):
+                date_styles.add(index)
+            if is_timedelta_format(number_format):
+                timedelta_styles.add(index)
+        return date_styles, timedelta_styles
+
+    def _read_shared_strings(self) -> tuple:
+        """
+        Загружает таблицу общих строк.
+
+        return:
+            Пара списков: строки в том виде, в котором их возвращает openpyxl, и значения для строк
+            данных (NaN для пустых строк и значений, которые pandas считает пропусками).
+        """
+        from lxml import etree
+
+        strings = []
+        part = self._parts.get('sharedStrings')
+        if part is not None and part in self._archive.namelist():
+            with self._archive.open(part) as source:
+                for _, item in etree.iterparse(source, events=('end',), tag=f'{{{SPREADSHEETML_NAMESPACE}}}si',
+                                               huge_tree=True):
+                    if len(item) == 1 and item[0].tag == _TEXT_TAG:
+                        text = item[0].text or ''
+                    else:
+                        text = _text_content(item)
+                    # Как и openpyxl, удаляем экранирование символа '_' (_x005F_)
+                    strings.append(text.replace('x005F_', ''))
+                    _release(item)
+        texts = [np.nan if text == '' or text in STR_NA_VALUES else text for text in strings]
+        return strings, texts
+
+
+def _parse_rows(rows: list, width: int, skip_top_rows: int, header_rows: list, skip_bottom_rows: int) -> pd.DataFrame:
+    """
+    Разбирает строки значений так же, как pd.ExcelFile.parse с dtype=str.
+    """
+    if not rows:
+        return pd.DataFrame()
+    data = [row + [''] * (width - len(row)) for row in rows]
+    header = header_rows[0] if len(header_rows) == 1 else header_rows
+    if len(header_rows) > 1:
+        # Пустые ячейки многострочного заголовка заполняются значением слева, как в pandas
+        control_row = [True] * width
+        for row in header_rows:
+            row += skip_top_rows
+            if row > len(data) - 1:
+                raise ValueError(f"header index {row} exceeds maximum index {len(data) - 1} of data.")
+            data[row], control_row = fill_mi_header(data[row], control_row)
+    try:
+        return TextParser(data, header=header, dtype=str, skiprows=skip_top_rows, skipfooter=skip_bottom_rows,
+                          skip_blank_lines=False).read()
+    except EmptyDataError:
+        return pd.DataFrame()
+
+
+def _read_relationships(archive: zipfile.ZipFile, part: str, by_id: bool = False) -> dict:
+    """
+    Читает связи части пакета с путями целевых частей относительно корня архива.
+
+    return:
+        Словарь {тип связи: путь} или, при by_id=True, {идентификатор: (тип связи, путь)}.
+    """
+    directory, name = posixpath.split(part)
+    rels_part = posixpath.join(directory, '_rels', f'{name}.rels')
+    relationships = {}
+    try:
+        with archive.open(rels_part) as rels:
+            for _, element in ElementTree.iterparse(rels):
+                target = element.get('Target')
+                if target is None or element.get('TargetMode') == 'External':
+                    continue
+                if target.startswith('/'):
+                    target = target.lstrip('/')
+                else:
+                    target = posixpath.join(directory, target)
+                target = posixpath.normpath(target)
+                if by_id:
+                    relationships[element.get('Id')] = (element.get('Type', ''), target)
+                else:
+                    relationships.setdefault(element.get('Type', ''), target)
+    except KeyError:
+        pass
+    return relationships
+
+
+def _text_content(element) -> str:
+    """
+    Текст строки SpreadsheetML без форматирования: текст элемента t и всех фрагментов r/t
+    (фонетические подсказки rPh не включаются).
+    """
+    text = element.findtext(_TEXT_TAG)
+    snippets = [text] if text is not None else []
+    snippets.extend(run.text or '' for run in element.iterfind(_RUN_TEXT_PATH))
+    return ''.join(snippets)
+
+
+def _excel_date(value: str, epoch, timedelta: bool):
+    """
+    Преобразует число ячейки с форматом даты в дату, время или длительность, как openpyxl.
+    Значение вне допустимого диапазона дат, как и в openpyxl, считается ошибкой (NaN).
+    """
+    from openpyxl.utils.datetime import from_excel
+
+    number = float(value) if '.' in value or 'E' in value or 'e' in value else int(value)
+    try:
+        return from_excel(number, epoch, timedelta=timedelta)
+    except (OverflowError, ValueError):
+        return np.nan
+
+
+def _column_index(letters: str) -> int:
+    """Номер столбца (с 0) по буквенному обозначению ('A' - 0, 'AA' - 26)."""
+    index = 0
+    for letter in letters.upper():
+        index = index * 26 + ord(letter) - ord('A') + 1
+    return index - 1
+
+
+def _release(element) -> None:
+    """Освобождает память разобранного элемента и предшествующих ему элементов при потоковом разборе."""
+    element.clear()
+    parent = element.getparent()
+    if parent is not None:
+        while element.getprevious() is not None:
+            del parent[0]